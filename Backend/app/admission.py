@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+from app.config import (
+    admission_max_concurrency,
+    admission_max_queue,
+    admission_max_wait,
+    rate_limit_per_second,
+    rate_limit_burst,
+)
+from app.metrics import span
+
+# Most users whose token buckets are kept; the least recently seen are forgotten (i.e. refilled)
+MAX_TRACKED_USERS = 10000
+
+class RateLimited(Exception):
+    """Raised when a user has no tokens left; retry_after is when the next one arrives."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Too many requests, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class Overloaded(Exception):
+    """Raised when the server is at capacity and the request can't be queued, or waited too long."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+class TokenBucketLimiter:
+    """Per-user token buckets: `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, max_users: int = MAX_TRACKED_USERS):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_users = max_users
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id: str) -> None:
+        """Take one token for the user or raise RateLimited."""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(user_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[user_id] = (tokens, now)
+                raise RateLimited((1 - tokens) / self.rate)
+            self._buckets[user_id] = (tokens - 1, now)
+            while len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+
+    def refund(self, user_id: str) -> None:
+        """Give back the token taken for a request that was turned away for another reason."""
+        with self._lock:
+            bucket = self._buckets.get(user_id)
+            if bucket is not None:
+                self._buckets[user_id] = (min(self.burst, bucket[0] + 1), bucket[1])
+
+class AdmissionController:
+    """
+    Admission control for requests that call the LLM and tools: a per-user rate limit, then a
+    concurrency gate of `max_concurrency` slots. Requests that find every slot busy queue for at
+    most `max_wait` seconds; if `max_queue` are already waiting they are rejected immediately,
+    so overload fails fast instead of piling up behind slow upstream calls.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float, limiter: TokenBucketLimiter):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.limiter = limiter
+        self._semaphore = None
+        self.in_flight = 0
+        self.queued = 0
+        self.stats = {"admitted": 0, "rate_limited": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the worker's running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def acquire(self, user_id: Optional[str] = None) -> None:
+        """
+        Admit a request or raise RateLimited / Overloaded. Admitted requests must call release().
+        A request turned away for lack of capacity gets its rate-limit token back.
+        """
+        if user_id is not None:
+            try:
+                self.limiter.acquire(user_id)
+            except RateLimited:
+                self.stats["rate_limited"] += 1
+                raise
+        try:
+            await self._acquire_slot()
+        except BaseException:
+            if user_id is not None:
+                self.limiter.refund(user_id)
+            raise
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+
+    async def _acquire_slot(self) -> None:
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.stats["rejected_queue_full"] += 1
+                raise Overloaded("Server is busy, please retry shortly", self.max_wait)
+            self.queued += 1
+            try:
+                with span("admission"):
+                    await asyncio.wait_for(semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.stats["rejected_timeout"] += 1
+                raise Overloaded(f"Server is busy, no capacity within {self.max_wait}s", self.max_wait)
+            finally:
+                self.queued -= 1
+        else:
+            await semaphore.acquire()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+    @asynccontextmanager
+    async def admit(self, user_id: Optional[str] = None):
+        await self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["in_flight"] = self.in_flight
+        stats["queued"] = self.queued
+        stats["max_concurrency"] = self.max_concurrency
+        stats["max_queue"] = self.max_queue
+        return stats
+
+# Global controller instance
+controller = AdmissionController(
+    admission_max_concurrency,
+    admission_max_queue,
+    admission_max_wait,
+    TokenBucketLimiter(rate_limit_per_second, rate_limit_burst),
+)
+
+def get_admission_controller() -> AdmissionController:
+    return controller
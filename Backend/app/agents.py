@@ -1,7 +1,20 @@
-from typing import List, Dict, TypedDict
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage
-from app.config import get_llm
+import asyncio
+import math
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Optional, Tuple, TypedDict
+from app.config import get_llm, translation_branch_timeout, grammar_branch_timeout, background_jobs
+from app.concurrency import run_blocking
+from app.progress import get_progress_store
+from app.intent_router import DEFAULT_AGENT
+from app.intent_classifier import get_intent_router
+from app.intent_slots import extract_term, extract_translation_source
+from app.response_cache import get_response_cache
+from app.conversation_memory import ConversationContext, get_conversation_memory
+from app.jobs import JobQueueFull, get_job_queue
+from app.resilience import CircuitOpen, deadline_after, get_breaker
+from app.translation import translate
+from app.metrics import span, timed
+from app.log_utils import log_payload
 from app.tools import (
     check_grammar,
     define_word,
@@ -9,154 +22,149 @@ from app.tools import (
     language_translator_en,
     language_translator_bn,
     explain_grammar,
+    build_grammar_explanation,
 )
+import threading
 import logging
 
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langgraph.graph import StateGraph
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StateType(TypedDict):
     messages: List[Dict[str, str]]
     next: str
+    user_id: str
+    job_id: Optional[str]
 
 State = StateType
 
-class UserProgress:
-    def __init__(self):
-        self.correct_answers = 0
-        self.total_questions = 0
-        self.level_thresholds = {"advanced": 0.8, "intermediate": 0.5}
-    
-    def update(self, is_correct: bool) -> None:
-        """Update progress based on user performance"""
-        self.total_questions += 1
-        if is_correct:
-            self.correct_answers += 1
-        logger.info(f"Progress updated: {self.correct_answers}/{self.total_questions}")
-    
-    def get_level(self) -> str:
-        """Determine user level based on accuracy"""
-        accuracy = self.correct_answers / self.total_questions if self.total_questions > 0 else 0
-        if accuracy > self.level_thresholds["advanced"]:
-            return "advanced"
-        elif accuracy > self.level_thresholds["intermediate"]:
-            return "intermediate"
-        return "beginner"
-
-progress = UserProgress()
-
-def teacher_agent(state: State) -> State:
+# Placeholder replies for tool work handed to the background job queue
+PENDING_MESSAGES = {
+    "pronunciation": "Generating pronunciation audio...",
+    "grammar_explain": "Preparing the grammar explanation...",
+}
+
+async def run_tool_as_job(state: State, kind: str, tool, text: str) -> str:
+    """
+    Hand slow tool work to the background job queue. Returns the result straight away when an
+    identical job has already finished; otherwise records the job id in the state and returns a
+    placeholder. Runs the tool inline when background jobs are disabled or the queue is full,
+    and for empty text, which the tool answers by asking for some.
+    """
+    if background_jobs and text.strip():
+        try:
+            job = await run_blocking(get_job_queue().submit, kind, text)
+            if job.status == "done":
+                return job.result
+            state["job_id"] = job.id
+            return PENDING_MESSAGES[kind]
+        except JobQueueFull as e:
+            logger.warning(f"Running {kind} inline: {str(e)}")
+    return await run_blocking(tool.invoke, text)
+
+def finish(state: State) -> State:
+    """Mark the state as done; langgraph is imported here, once a graph runs, not at app import."""
+    from langgraph.constants import END
+    state["next"] = END
+    return state
+
+@timed("node", node="teacher_agent")
+async def teacher_agent(state: State) -> State:
     """Route user input to the appropriate agent based on intent."""
     if not state["messages"]:
         state["next"] = "conversation_agent"
         return state
         
     user_input = state["messages"][-1]["content"].lower().strip()
-    logger.info(f"User input: {user_input}")
+    log_payload(logger, "User input", user_input)
     if not user_input:
         state["next"] = "conversation_agent"
         return state
 
-    intents = {
-        "grammar_agent": ["grammar", "check grammar", "grammar check"],
-        "vocabulary_agent": ["vocabulary", "word", "define", "meaning"],
-        "pronunciation_agent": ["pronounce", "pronunciation", "say"],
-        "translator_en_agent": ["translate to english", "translation english", "english", "en"],
-        "translator_bn_agent": ["translate to bangla", "translation bangla", "bangla", "bn"],
-        "grammar_explain_agent": ["explain grammar", "grammar explanation", "explain"],
-    }
-    
-    state["next"] = "conversation_agent"  # Default to conversation
-    for agent, keywords in intents.items():
-        if any(keyword in user_input for keyword in keywords):
-            state["next"] = agent
-            logger.info(f"Routed to: {state['next']}")
-            break
+    state["next"] = await get_intent_router().route(user_input)
+    if state["next"] != DEFAULT_AGENT:
+        logger.info(f"Routed to: {state['next']}")
     return state
 
-def grammar_agent(state: State) -> State:
+@timed("node", node="grammar_agent")
+async def grammar_agent(state: State) -> State:
     """Check grammar of user input."""
     try:
         user_input = state["messages"][-1]["content"]
-        response = check_grammar.invoke(user_input)
-        logger.info(f"Grammar check response: {response}")
+        response = await run_blocking(check_grammar.invoke, user_input)
+        log_payload(logger, "Grammar check response", response)
         state["messages"].append({"role": "ai", "content": response})
-        progress.update("No grammar errors" in response)
+        await run_blocking(get_progress_store().update, state["user_id"], "No grammar errors" in response)
     except Exception as e:
         err = f"Error in grammar agent: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
 
-def vocabulary_agent(state: State) -> State:
+@timed("node", node="vocabulary_agent")
+async def vocabulary_agent(state: State) -> State:
     """Define a word from user input."""
     try:
-        user_input = state["messages"][-1]["content"].strip()
-        words = user_input.split()
-        response = define_word.invoke(words[-1] if words else "")
-        logger.info(f"Vocabulary definition response: {response}")
+        user_input = state["messages"][-1]["content"]
+        response = await run_blocking(define_word.invoke, extract_term(user_input))
+        log_payload(logger, "Vocabulary definition response", response)
         state["messages"].append({"role": "ai", "content": response})
     except Exception as e:
         err = f"Error in vocabulary agent: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
 
-def pronunciation_agent(state: State) -> State:
+@timed("node", node="pronunciation_agent")
+async def pronunciation_agent(state: State) -> State:
     """Generate pronunciation audio for text."""
     try:
         user_input = state["messages"][-1]["content"]
-        response = pronounce_text.invoke(user_input)
-        logger.info(f"Pronunciation response: {response}")
+        response = await run_tool_as_job(state, "pronunciation", pronounce_text, user_input)
+        log_payload(logger, "Pronunciation response", response)
         state["messages"].append({"role": "ai", "content": response})
     except Exception as e:
         err = f"Error in pronunciation agent: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
 
-def translator_en_agent(state: State) -> State:
+@timed("node", node="translator_en_agent")
+async def translator_en_agent(state: State) -> State:
     """Translate user input to English."""
     try:
         user_input = state["messages"][-1]["content"]
-        if "translate to english" in user_input.lower():
-            text_to_translate = user_input.lower().split("translate to english")[-1].strip()
-        else:
-            text_to_translate = user_input
-        response = language_translator_en.invoke(text_to_translate)
+        response = await run_blocking(language_translator_en.invoke, extract_translation_source(user_input))
         full_response = f"English: {response}"
-        logger.info(f"English translation: {full_response}")
+        log_payload(logger, "English translation", full_response)
         state["messages"].append({"role": "ai", "content": full_response})
     except Exception as e:
         err = f"Error in English translation: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
 
-def translator_bn_agent(state: State) -> State:
+@timed("node", node="translator_bn_agent")
+async def translator_bn_agent(state: State) -> State:
     """Translate user input to Bengali."""
     try:
         user_input = state["messages"][-1]["content"]
-        if "translate to bangla" in user_input.lower():
-            text_to_translate = user_input.lower().split("translate to bangla")[-1].strip()
-        else:
-            text_to_translate = user_input
-        response = language_translator_bn.invoke(text_to_translate)
+        response = await run_blocking(language_translator_bn.invoke, extract_translation_source(user_input))
         full_response = f"Bangla: {response}"
-        logger.info(f"Bangla translation: {full_response}")
+        log_payload(logger, "Bangla translation", full_response)
         state["messages"].append({"role": "ai", "content": full_response})
     except Exception as e:
         err = f"Error in Bangla translation: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
 
-def grammar_explain_agent(state: State) -> State:
+@timed("node", node="grammar_explain_agent")
+async def grammar_explain_agent(state: State) -> State:
     """Explain the grammar of the user input in German and English."""
     try:
         user_input = state["messages"][-1]["content"]
@@ -164,54 +172,210 @@ def grammar_explain_agent(state: State) -> State:
             text_to_explain = user_input.lower().split("explain grammar")[-1].strip()
         else:
             text_to_explain = user_input
-        response = explain_grammar.invoke(text_to_explain)
-        logger.info(f"Grammar explanation: {response}")
+        response = await run_tool_as_job(state, "grammar_explain", explain_grammar, text_to_explain)
+        log_payload(logger, "Grammar explanation", response)
         state["messages"].append({"role": "ai", "content": response})
     except Exception as e:
         err = f"Error in grammar explanation: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
+
+# Independent follow-up steps run on every German reply: name -> (function, timeout in seconds).
+# Unlike the tools, these raise on failure, so a failed step is left out of the reply
+POST_PROCESSING_BRANCHES = {
+    "english": (partial(translate, target="en"), translation_branch_timeout),
+    "bangla": (partial(translate, target="bn"), translation_branch_timeout),
+    "grammar": (build_grammar_explanation, grammar_branch_timeout),
+}
+
+async def run_post_processing_branch(name: str, german_response: str) -> Optional[str]:
+    """
+    Run one follow-up step with its timeout. Returns None if it fails or times out. The timeout
+    is also the step's deadline inside the worker thread, so HTTP timeouts, retries and pool
+    waits end with it instead of holding a blocking-pool thread after the reply has moved on.
+    """
+    func, timeout = POST_PROCESSING_BRANCHES[name]
+    try:
+        with deadline_after(timeout):
+            result = await asyncio.wait_for(run_blocking(func, german_response), timeout)
+        log_payload(logger, f"Post-processing {name}", result)
+        return result
+    except asyncio.TimeoutError:
+        logger.warning(f"Post-processing {name} timed out after {timeout}s")
+    except Exception as e:
+        logger.error(f"Post-processing {name} failed: {str(e)}")
+    return None
 
-def conversation_agent(state: State) -> State:
+def start_post_processing(german_response: str) -> Dict[str, asyncio.Task]:
+    """Start all follow-up branches concurrently and return their tasks by name."""
+    return {
+        name: asyncio.ensure_future(run_post_processing_branch(name, german_response))
+        for name in POST_PROCESSING_BRANCHES
+    }
+
+def compose_conversation_response(german_response: str, results: Dict[str, Optional[str]]) -> str:
+    """Join the German reply with whichever follow-up results are available, in a fixed order."""
+    parts = [german_response]
+    parts.extend(results[name] for name in POST_PROCESSING_BRANCHES if results.get(name))
+    return "\n".join(parts)
+
+def unavailable_reply(e: CircuitOpen) -> str:
+    """What the teacher says while the LLM's circuit breaker is open."""
+    seconds = max(1, math.ceil(e.retry_after))
+    return (f"Ich bin gerade nicht erreichbar. Bitte versuche es in {seconds} Sekunden noch einmal.\n"
+            f"The teacher is unavailable right now. Please try again in {seconds} seconds.")
+
+async def get_user_level(user_id: str) -> str:
+    return await run_blocking(get_progress_store().get_level, user_id)
+
+def build_conversation_prompt(level: str, user_input: str) -> str:
+    return f"Respond in German at {level} level to: {user_input}"
+
+def build_conversation_messages(level: str, user_input: str, context: ConversationContext) -> List["BaseMessage"]:
+    """The LLM input: summary of earlier conversation, the recent turns, then the prompt."""
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    messages = []
+    if context.summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation with this learner: {context.summary}"))
+    for turn in context.turns:
+        message_class = AIMessage if turn["role"] == "ai" else HumanMessage
+        messages.append(message_class(content=turn["content"]))
+    messages.append(HumanMessage(content=build_conversation_prompt(level, user_input)))
+    return messages
+
+def response_cache_scope(level: str, context: ConversationContext) -> str:
+    """
+    Cache partition for a reply. A reply depends on the conversation it was written for, so it is
+    only shared with conversations at the same level whose context (summary and recent turns) is
+    identical; a conversation's first message has no context and shares the level's partition.
+    """
+    fingerprint = context.fingerprint()
+    return f"{level}:{fingerprint}" if fingerprint else level
+
+def get_cached_conversation_response(level: str, user_input: str, context: ConversationContext) -> Optional[str]:
+    return get_response_cache().get(response_cache_scope(level, context), user_input)
+
+def cache_conversation_response(level: str, user_input: str, response: str, results: Dict[str, Optional[str]],
+                                context: ConversationContext) -> None:
+    """Cache a composed reply, but only when every follow-up branch succeeded."""
+    if all(results.get(name) for name in POST_PROCESSING_BRANCHES):
+        get_response_cache().put(response_cache_scope(level, context), user_input, response)
+
+@timed("node", node="conversation_agent")
+async def conversation_agent(state: State) -> State:
     """
     Handle general conversation in German.
     Returns the response in German along with English and Bangla translations and a grammar explanation.
     """
     try:
         user_input = state["messages"][-1]["content"]
-        level = progress.get_level()
-        prompt = f"Respond in German at {level} level to: {user_input}"
-        logger.info(f"LLM prompt: {prompt}")
-        german_response = get_llm().invoke([HumanMessage(content=prompt)]).content.strip()
-        logger.info(f"German response: {german_response}")
-        
-        # Directly call the underlying tools and log the outputs
-        english_response = language_translator_en.invoke(german_response)
-        logger.info(f"English translation: {english_response}")
-        bangla_response = language_translator_bn.invoke(german_response)
-        logger.info(f"Bangla translation: {bangla_response}")
-        grammer_response = explain_grammar.invoke(german_response)
-        logger.info(f"Grammar explanation: {grammer_response}")
-        
-        full_response = (
-            f"{german_response}\n"
-            f"{english_response}\n"
-            f"{bangla_response}\n"
-            f"{grammer_response}"
+        level, context = await asyncio.gather(
+            get_user_level(state["user_id"]),
+            get_conversation_memory().build(state["user_id"], user_input),
         )
-        logger.info(f"Full conversation response: {full_response}")
+        full_response = get_cached_conversation_response(level, user_input, context)
+        if full_response is not None:
+            logger.info("Conversation response served from cache")
+        else:
+            messages = build_conversation_messages(level, user_input, context)
+            log_payload(logger, "LLM prompt", messages[-1].content)
+            with span("llm"), get_breaker("llm").guard():
+                german_response = (await get_llm().ainvoke(messages)).content.strip()
+            log_payload(logger, "German response", german_response)
+
+            # Translations and grammar explanation are independent, so run them side by side;
+            # a failed or slow branch is dropped instead of failing the whole reply
+            tasks = start_post_processing(german_response)
+            results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+            full_response = compose_conversation_response(german_response, results)
+            cache_conversation_response(level, user_input, full_response, results, context)
+        log_payload(logger, "Full conversation response", full_response)
         state["messages"].append({"role": "ai", "content": full_response})
+    except CircuitOpen as e:
+        logger.warning(str(e))
+        state["messages"].append({"role": "ai", "content": unavailable_reply(e)})
     except Exception as e:
         err = f"Error in conversation: {str(e)}"
         logger.error(err)
         state["messages"].append({"role": "ai", "content": err})
-    state["next"] = END
-    return state
+    return finish(state)
+
+# Nodes the teacher can route to, by graph node name
+AGENT_NODES = {
+    "grammar_agent": grammar_agent,
+    "vocabulary_agent": vocabulary_agent,
+    "pronunciation_agent": pronunciation_agent,
+    "translator_en_agent": translator_en_agent,
+    "translator_bn_agent": translator_bn_agent,
+    "grammar_explain_agent": grammar_explain_agent,
+    "conversation_agent": conversation_agent,
+}
 
-def create_graph() -> StateGraph:
+async def stream_agent_events(state: State) -> AsyncIterator[Tuple[str, Dict[str, str]]]:
+    """
+    Route the input and yield (event, data) pairs as results become available.
+    Conversation replies stream LLM tokens first, then one event per follow-up branch.
+    Other agents produce a single "message" event. The last event is always "response", carrying
+    the background job id when the reply is a placeholder for work still running.
+    """
+    state = await teacher_agent(state)
+    if state["next"] != "conversation_agent":
+        state = await AGENT_NODES[state["next"]](state)
+        response = state["messages"][-1]["content"]
+        yield "message", {"content": response}
+        yield "response", {"content": response, "job_id": state.get("job_id")}
+        return
+
+    try:
+        user_input = state["messages"][-1]["content"]
+        level, context = await asyncio.gather(
+            get_user_level(state["user_id"]),
+            get_conversation_memory().build(state["user_id"], user_input),
+        )
+        cached = get_cached_conversation_response(level, user_input, context)
+        if cached is not None:
+            yield "message", {"content": cached}
+            yield "response", {"content": cached}
+            return
+
+        messages = build_conversation_messages(level, user_input, context)
+        log_payload(logger, "LLM prompt", messages[-1].content)
+        tokens = []
+        with span("llm", mode="stream"), get_breaker("llm").guard():
+            async for chunk in get_llm().astream(messages):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield "token", {"token": chunk.content}
+        german_response = "".join(tokens).strip()
+        log_payload(logger, "German response", german_response)
+
+        tasks = start_post_processing(german_response)
+        pending = {task: name for name, task in tasks.items()}
+        results = {}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                results[name] = task.result()
+                if results[name]:
+                    yield name, {"content": results[name]}
+        response = compose_conversation_response(german_response, results)
+        cache_conversation_response(level, user_input, response, results, context)
+    except CircuitOpen as e:
+        logger.warning(str(e))
+        response = unavailable_reply(e)
+        yield "message", {"content": response}
+    except Exception as e:
+        response = f"Error in conversation: {str(e)}"
+        logger.error(response)
+        yield "error", {"detail": response}
+    yield "response", {"content": response}
+
+def create_graph() -> "StateGraph":
     """Create and compile the state graph."""
+    from langgraph.constants import END
+    from langgraph.graph import StateGraph
     try:
         graph = StateGraph(State)
         graph.add_node("teacher_agent", teacher_agent)
@@ -246,4 +410,14 @@ def create_graph() -> StateGraph:
         logger.error(err)
         raise RuntimeError(err)
 
-app_graph = create_graph()
+# Compiled graph, built on first use
+app_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    global app_graph
+    if app_graph is None:
+        with _graph_lock:
+            if app_graph is None:
+                app_graph = create_graph()
+    return app_graph
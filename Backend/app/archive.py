@@ -0,0 +1,149 @@
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from app.config import (
+    archive_dir,
+    archive_interval,
+    archive_segment_size,
+    history_hot_days,
+    history_hot_messages,
+)
+from app.database import (
+    init_db,
+    iter_history_users,
+    archive_messages,
+    compact_segments,
+    list_fragmented_archives,
+    list_segment_paths,
+    reclaim_space,
+    get_archive_totals,
+)
+from app.segments import default_codec, get_segment_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Segment files the index doesn't know are only deleted once this old: another worker process
+# may have written one for an archive transaction that hasn't committed yet, and a page that
+# read the index just before a compaction may still open a segment it replaced
+ORPHAN_GRACE_SECONDS = 3600
+
+class HistoryArchiver:
+    """
+    Retention job for the chat history. Each run moves messages older than hot_days (apart
+    from each user's newest keep_recent) into compressed archive segments, merges small
+    segments left by earlier runs, deletes segment files that no index row refers to and
+    returns the freed database pages. Reads merge the archive back in (see
+    database.iter_chat_history), so the hot table and its indexes stay small however long
+    users' histories get.
+    """
+
+    def __init__(self, interval: float, hot_days: float, keep_recent: int, segment_size: int):
+        self.interval = interval
+        self.hot_days = hot_days
+        self.keep_recent = keep_recent
+        self.segment_size = max(1, segment_size)
+        self.codec = default_codec()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"runs": 0, "archived": 0, "merged": 0, "orphans_removed": 0, "last_run_seconds": 0.0}
+
+    def archive(self) -> int:
+        older_than = (datetime.now(timezone.utc) - timedelta(days=self.hot_days)).strftime("%Y-%m-%d %H:%M:%S")
+        moved = 0
+        for user_id in iter_history_users():
+            while not self._stop.is_set():
+                count = archive_messages(user_id, older_than, self.keep_recent, self.segment_size, self.codec)
+                moved += count
+                if count < self.segment_size:
+                    break
+        return moved
+
+    def compact(self) -> int:
+        return sum(compact_segments(user_id, self.segment_size, self.codec)
+                   for user_id in list_fragmented_archives(self.segment_size))
+
+    def remove_orphans(self) -> int:
+        known = list_segment_paths()
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        removed = 0
+        for root, _, files in os.walk(archive_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.relpath(path, archive_dir) in known:
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def run_once(self) -> dict:
+        started = time.perf_counter()
+        result = {"archived": self.archive(), "merged": self.compact(), "orphans_removed": self.remove_orphans()}
+        reclaim_space()
+        for key, value in result.items():
+            self.stats[key] += value
+        self.stats["runs"] += 1
+        self.stats["last_run_seconds"] = round(time.perf_counter() - started, 3)
+        if result["archived"] or result["merged"]:
+            logger.info(f"Archived {result['archived']} message(s), merged {result['merged']} segment(s)")
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Chat history archiving failed: {str(e)}")
+
+    def start(self) -> None:
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="history-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats.update(get_archive_totals())
+        stats["codec"] = self.codec
+        stats["segment_store"] = get_segment_store().get_stats()
+        return stats
+
+# Global archiver instance
+history_archiver = None
+_archiver_lock = threading.Lock()
+
+def get_history_archiver() -> HistoryArchiver:
+    global history_archiver
+    if history_archiver is None:
+        with _archiver_lock:
+            if history_archiver is None:
+                history_archiver = HistoryArchiver(archive_interval, history_hot_days, history_hot_messages,
+                                                   archive_segment_size)
+    return history_archiver
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old chat history now, outside the server's schedule.")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="afterwards rebuild the database file with VACUUM (blocks writers while it runs)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    print(get_history_archiver().run_once())
+    if args.vacuum:
+        reclaim_space(full=True)
+    print(get_archive_totals())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import hashlib
+import os
+from contextlib import contextmanager
+import threading
+import unicodedata
+import uuid
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process coordination only
+    fcntl = None
+from app.metrics import span
+from app.http_client import HTTP_TIMEOUT
+from app.resilience import get_breaker, is_transient, retry_call
+from app.config import audio_cache_dir, audio_cache_url_prefix, audio_cache_max_bytes, tool_max_retries
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the cache holding the synthesis lock files
+LOCK_DIR = ".locks"
+
+def gtts_synthesize(text: str, lang: str, slow: bool, tld: str, path: str) -> None:
+    from gtts import gTTS
+    gTTS(text=text, lang=lang, slow=slow, tld=tld, timeout=HTTP_TIMEOUT).save(path)
+
+class AudioCache:
+    """
+    Content-addressed store for synthesized speech.
+    Files are named by a hash of (normalized text, language, voice settings), so identical
+    requests share one file. Concurrent requests for the same content trigger one synthesis.
+    """
+
+    def __init__(self, directory: str, url_prefix: str, max_bytes: int, synthesize=gtts_synthesize):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.synthesize = synthesize
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def content_key(text: str, lang: str = "de", slow: bool = False, tld: str = "com") -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(f"{lang}|{tld}|{int(slow)}|{normalized}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}.mp3"
+
+    @contextmanager
+    def _process_lock(self, key: str):
+        """
+        Serialize synthesis of one key across worker processes sharing the directory. Keys share
+        256 lock files by hash prefix; the files are never removed, since unlinking a lock file
+        lets a process that already opened it and a newcomer hold "the" lock at the same time.
+        """
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.path.join(self.directory, LOCK_DIR)
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{key[:2]}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _touch(self, path: str) -> bool:
+        """Mark a cached file as recently used. Returns False if it is gone."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_or_synthesize(self, text: str, lang: str = "de", slow: bool = False, tld: str = "com") -> str:
+        """Return the URL of the audio for this content, synthesizing it only if it is not cached."""
+        key = self.content_key(text, lang, slow, tld)
+        path = self._path(key)
+        if self._touch(path):
+            with self._lock:
+                self.stats["hits"] += 1
+            return self._url(key)
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            event.wait()
+            if not os.path.exists(path):
+                raise RuntimeError("Speech synthesis failed for this text")
+            return self._url(key)
+
+        try:
+            with self._process_lock(key):
+                # Another worker process may have produced it while we waited for the lock
+                if os.path.exists(path):
+                    return self._url(key)
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                try:
+                    # gTTS wraps network failures in its own error type; retry the transient ones
+                    with span("gtts"):
+                        retry_call(get_breaker("gtts").call, self.synthesize, text, lang, slow, tld, tmp_path,
+                                   retries=tool_max_retries, retry_on=(Exception,), retry_if=is_transient)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+        self._enforce_quota(keep=path)
+        return self._url(key)
+
+    def _enforce_quota(self, keep: str = None) -> None:
+        """Delete least recently used files until the directory fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self.stats["evictions"] += 1
+        logger.info(f"Audio cache trimmed to {total} bytes")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+# Global cache instance
+cache = None
+_cache_lock = threading.Lock()
+
+def get_audio_cache() -> AudioCache:
+    global cache
+    if cache is None:
+        with _cache_lock:
+            if cache is None:
+                cache = AudioCache(audio_cache_dir, audio_cache_url_prefix, audio_cache_max_bytes)
+    return cache
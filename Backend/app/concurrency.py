@@ -0,0 +1,32 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.config import blocking_pool_size
+
+# Shared, bounded pool for blocking work (tools, SQLite) called from async code
+executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    global executor
+    if executor is None:
+        with _executor_lock:
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=blocking_pool_size, thread_name_prefix="blocking")
+    return executor
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable on the bounded thread pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the request's timing spans) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), partial(context.run, func, *args, **kwargs))
+
+def shutdown_executor():
+    global executor
+    with _executor_lock:
+        if executor is not None:
+            executor.shutdown(wait=False)
+            executor = None
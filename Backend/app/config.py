@@ -1,13 +1,158 @@
 import os
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-from langchain_openai import ChatOpenAI
 
 # Load environment variables
 load_dotenv()
 deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-if not deepseek_api_key:
-    raise ValueError("Please set the DEEPSEEK_API_KEY environment variable in .env")
+deepseek_base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+
+# Server process settings for the production entry point (app.serve)
+server_host = os.getenv("HOST", "0.0.0.0")
+server_port = int(os.getenv("PORT", "8000"))
+server_workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+# Directory for state shared by all worker processes (databases); point it at a shared volume
+data_dir = os.getenv("DATA_DIR", ".")
+
+# Chat history database
+database_path = os.getenv("DATABASE_PATH", os.path.join(data_dir, "chat_history.db"))
+database_pool_size = int(os.getenv("DATABASE_POOL_SIZE", "8"))
+
+# Chat history retention: messages older than HISTORY_HOT_DAYS move out of the chat_history table
+# into compressed per-user archive segments of up to ARCHIVE_SEGMENT_SIZE messages ("zstd" needs
+# the zstandard package, otherwise gzip is used), except each user's newest HISTORY_HOT_MESSAGES.
+# The archiver and segment compaction run every ARCHIVE_INTERVAL seconds (0 disables them)
+history_hot_days = float(os.getenv("HISTORY_HOT_DAYS", "30"))
+history_hot_messages = int(os.getenv("HISTORY_HOT_MESSAGES", "200"))
+archive_dir = os.getenv("ARCHIVE_DIR", os.path.join(data_dir, "archive"))
+archive_compression = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+archive_segment_size = int(os.getenv("ARCHIVE_SEGMENT_SIZE", "1000"))
+archive_segment_cache_size = int(os.getenv("ARCHIVE_SEGMENT_CACHE_SIZE", "64"))
+archive_interval = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+
+# Per-user progress: cache lifetime and write-behind batching
+progress_cache_ttl = float(os.getenv("PROGRESS_CACHE_TTL", "30"))
+progress_flush_interval = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5"))
+progress_flush_batch_size = int(os.getenv("PROGRESS_FLUSH_BATCH_SIZE", "50"))
+
+# LanguageTool pool settings
+language_tool_language = os.getenv("LANGUAGE_TOOL_LANGUAGE", "de-DE")
+language_tool_pool_size = int(os.getenv("LANGUAGE_TOOL_POOL_SIZE", "2"))
+language_tool_checkout_timeout = float(os.getenv("LANGUAGE_TOOL_CHECKOUT_TIMEOUT", "30"))
+language_tool_health_check_interval = float(os.getenv("LANGUAGE_TOOL_HEALTH_CHECK_INTERVAL", "60"))
+
+# Thread pool size for blocking tool and database calls made from async code
+blocking_pool_size = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+
+# Per-branch timeouts (seconds) for the conversation post-processing fan-out
+translation_branch_timeout = float(os.getenv("TRANSLATION_BRANCH_TIMEOUT", "8"))
+grammar_branch_timeout = float(os.getenv("GRAMMAR_BRANCH_TIMEOUT", "15"))
+
+# Translation backend ("google", "local" for on-device models, or "stub" for offline tests),
+# optional per-target-language choices such as "en=local,bn=google", and the translation cache
+translator_backend = os.getenv("TRANSLATOR_BACKEND", "google")
+translator_backend_by_language = os.getenv("TRANSLATOR_BACKEND_BY_LANGUAGE", "")
+translation_cache_path = os.getenv("TRANSLATION_CACHE_PATH", os.path.join(data_dir, "translation_cache.db"))
+translation_cache_memory_size = int(os.getenv("TRANSLATION_CACHE_MEMORY_SIZE", "1024"))
+translation_cache_disk_size = int(os.getenv("TRANSLATION_CACHE_DISK_SIZE", "100000"))
+translation_cache_ttl = float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+# Grouped translation requests stay below the translator's per-request size limit
+translation_batch_max_chars = int(os.getenv("TRANSLATION_BATCH_MAX_CHARS", "4500"))
+
+# Google Translate page used by the "google" backend (point it at a fake server for fault tests)
+google_translate_url = os.getenv("GOOGLE_TRANSLATE_URL", "https://translate.google.com/m")
+
+# Keep-alive HTTP connection pool shared by the translator clients: hosts kept, connections
+# per host (match the concurrent translation calls), and connect/read timeouts in seconds
+http_pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+http_pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+http_connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+http_read_timeout = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# Intent routing tiers: keyword rules, then an n-gram classifier trained from the TSV (used when
+# its confidence reaches the threshold), then the LLM for ambiguous messages, with its answers
+# memoized (false: ambiguous messages go to the conversation agent). Only messages the model
+# leans towards a helper agent for, with at least the min confidence, wait on the LLM; the rest
+# (mostly small talk) go straight to the conversation agent
+intent_training_path = os.getenv("INTENT_TRAINING_PATH", "intents/training.tsv")
+intent_model_threshold = float(os.getenv("INTENT_MODEL_THRESHOLD", "0.7"))
+intent_llm_fallback = os.getenv("INTENT_LLM_FALLBACK", "true").lower() in ("1", "true", "yes")
+intent_llm_min_confidence = float(os.getenv("INTENT_LLM_MIN_CONFIDENCE", "0.3"))
+intent_llm_timeout = float(os.getenv("INTENT_LLM_TIMEOUT", "3"))
+intent_llm_cache_size = int(os.getenv("INTENT_LLM_CACHE_SIZE", "10000"))
+
+# Outbound call resilience: LLM request timeout and retries (made by the OpenAI client), retries
+# of translation and speech calls with jittered exponential backoff (base and cap in seconds), and
+# circuit breakers that fail fast for reset_timeout seconds after `threshold` consecutive failures
+llm_timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+tool_max_retries = int(os.getenv("TOOL_MAX_RETRIES", "2"))
+retry_backoff_base = float(os.getenv("RETRY_BACKOFF_BASE", "0.2"))
+retry_backoff_max = float(os.getenv("RETRY_BACKOFF_MAX", "2"))
+breaker_failure_threshold = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+breaker_reset_timeout = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Local translation engine: model per target language (Hugging Face name or local directory),
+# CPU threads, sentences per generate() call, output length cap and int8 quantization
+local_translation_models = os.getenv(
+    "LOCAL_TRANSLATION_MODELS", "en=Helsinki-NLP/opus-mt-de-en,bn=facebook/nllb-200-distilled-600M"
+)
+local_translation_threads = int(os.getenv("LOCAL_TRANSLATION_THREADS", "4"))
+local_translation_batch_size = int(os.getenv("LOCAL_TRANSLATION_BATCH_SIZE", "16"))
+local_translation_max_length = int(os.getenv("LOCAL_TRANSLATION_MAX_LENGTH", "256"))
+local_translation_quantize = os.getenv("LOCAL_TRANSLATION_QUANTIZE", "true").lower() in ("1", "true", "yes")
+
+# Largest list accepted by the batch endpoints
+batch_max_items = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+# German-English lexicon for define_word: a FreeDict deu-eng dump (TEI, or the release tarball),
+# a TSV of curated entries that override it, and the SQLite file compiled from both
+lexicon_dictionary = os.getenv("LEXICON_DICTIONARY", "lexicon/freedict-deu-eng.src.tar.xz")
+lexicon_source = os.getenv("LEXICON_SOURCE", "lexicon/de_en.tsv")
+lexicon_path = os.getenv("LEXICON_PATH", "lexicon/lexicon.db")
+
+# Content-addressed pronunciation audio cache
+audio_cache_dir = os.getenv("AUDIO_CACHE_DIR", "static/audio")
+audio_cache_url_prefix = os.getenv("AUDIO_CACHE_URL_PREFIX", "/static/audio")
+audio_cache_max_bytes = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Conversation response cache; similarity > 0 enables fuzzy matching (trigram Jaccard, 0-1)
+response_cache_size = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+response_cache_similarity = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+
+# Conversation memory: recent messages sent verbatim, older ones folded into a rolling summary,
+# all within a prompt token budget (tokens estimated at ~4 characters each)
+context_recent_messages = int(os.getenv("CONTEXT_RECENT_MESSAGES", "8"))
+context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+context_message_max_tokens = int(os.getenv("CONTEXT_MESSAGE_MAX_TOKENS", "200"))
+context_summary_max_tokens = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "300"))
+context_summary_batch = int(os.getenv("CONTEXT_SUMMARY_BATCH", "10"))
+
+# Admission control per worker: concurrent LLM/tool requests, how many may queue for a slot and
+# for how long, and a per-user token bucket (requests per second, burst; rate 0 disables it)
+admission_max_concurrency = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+admission_max_queue = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+admission_max_wait = float(os.getenv("ADMISSION_MAX_WAIT", "5"))
+rate_limit_per_second = float(os.getenv("RATE_LIMIT_PER_SECOND", "0.5"))
+rate_limit_burst = int(os.getenv("RATE_LIMIT_BURST", "10"))
+
+# Background jobs for slow tools (pronunciation audio, grammar explanations): worker threads per
+# process, largest backlog, and how long finished results are kept for polling and deduplication
+background_jobs = os.getenv("BACKGROUND_JOBS", "true").lower() in ("1", "true", "yes")
+job_workers = int(os.getenv("JOB_WORKERS", "4"))
+job_max_pending = int(os.getenv("JOB_MAX_PENDING", "1000"))
+job_result_ttl = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+# Load the LLM client, LanguageTool pool, translator and speech backends at startup instead of
+# on first use (slower start, no first-request penalty); app.serve turns it on for multi-worker runs
+warmup_on_startup = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Observability: Server-Timing breakdown header and payload logging budget
+server_timing_header = os.getenv("SERVER_TIMING_HEADER", "false").lower() in ("1", "true", "yes")
+log_payload_max_chars = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "200"))
+log_payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
 
 # Global LLM instance
 model = None
@@ -19,15 +164,22 @@ def configure_cors(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Retry-After"],
     )
 
 def init_llm():
     global model
+    if not deepseek_api_key:
+        raise ValueError("Please set the DEEPSEEK_API_KEY environment variable in .env")
+    # Imported here: langchain_openai (and openai) is a large part of the app's import time
+    from langchain_openai import ChatOpenAI
     model = ChatOpenAI(
         model="deepseek-chat",
         api_key=deepseek_api_key,
-        base_url="https://api.deepseek.com/v1",
-        temperature=0.7
+        base_url=deepseek_base_url,
+        temperature=0.7,
+        timeout=llm_timeout,
+        max_retries=llm_max_retries,
     )
 
 def get_llm():
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.config import (
+    get_llm,
+    context_recent_messages,
+    context_token_budget,
+    context_message_max_tokens,
+    context_summary_max_tokens,
+    context_summary_batch,
+)
+from app.concurrency import run_blocking
+from app.database import iter_chat_history, load_summary, save_summary
+from app.metrics import span
+from app.resilience import get_breaker
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prefixes routes.py stores messages with
+USER_PREFIX = "You: "
+TEACHER_PREFIX = "Teacher: "
+
+SUMMARY_PROMPT = (
+    "You keep notes on a German lesson between a teacher and a learner. Update the summary with "
+    "the new messages: topics covered, facts the learner shared about themselves, and recurring "
+    "mistakes. Write at most {max_words} words in English.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{transcript}"
+)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "..."
+
+def to_turn(message: str) -> Dict[str, str]:
+    """Turn a stored "You: ..." / "Teacher: ..." line into a {"role", "content"} message."""
+    if message.startswith(TEACHER_PREFIX):
+        return {"role": "ai", "content": message[len(TEACHER_PREFIX):]}
+    if message.startswith(USER_PREFIX):
+        return {"role": "human", "content": message[len(USER_PREFIX):]}
+    return {"role": "human", "content": message}
+
+class ConversationContext:
+    """What the LLM sees of earlier conversation: a rolling summary and the most recent turns."""
+
+    def __init__(self, summary: str = "", turns: Optional[List[Dict[str, str]]] = None):
+        self.summary = summary
+        self.turns = turns or []
+
+    def fingerprint(self) -> str:
+        """Short digest of the summary and turns; empty for a conversation with no context yet."""
+        if not self.summary and not self.turns:
+            return ""
+        data = json.dumps([self.summary, self.turns], ensure_ascii=False, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()[:16]
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+class ConversationMemory:
+    """
+    Builds bounded conversation context from chat history. The last few messages are passed
+    verbatim (each capped, newest first until the token budget runs out); older messages are
+    folded into a per-user summary in batches, in the background, so prompt size stays flat
+    however long the conversation gets.
+    """
+
+    def __init__(self, recent_messages: int, token_budget: int, message_max_tokens: int,
+                 summary_max_tokens: int, summary_batch: int):
+        self.recent_messages = recent_messages
+        self.token_budget = token_budget
+        self.message_max_tokens = message_max_tokens
+        self.summary_max_tokens = min(summary_max_tokens, token_budget)
+        self.summary_batch = summary_batch
+        self._folding = set()
+        self._tasks = set()
+
+    def _load(self, user_id: str, user_input: str) -> Tuple[ConversationContext, List[dict]]:
+        """Read the summary and recent messages; also return older messages due to be summarized."""
+        summary, summary_last_id = load_summary(user_id)
+        rows = list(iter_chat_history(user_id, self.recent_messages + 1))
+        # The route saves the incoming message before the graph runs; it is the prompt, not context
+        if rows and rows[-1]["message"] == f"{USER_PREFIX}{user_input}":
+            rows.pop()
+        rows = [row for row in rows if row["id"] > summary_last_id][-self.recent_messages:]
+
+        summary = truncate_to_tokens(summary, self.summary_max_tokens)
+        remaining = self.token_budget - estimate_tokens(summary)
+        turns = []
+        for row in reversed(rows):
+            turn = to_turn(row["message"])
+            turn["content"] = truncate_to_tokens(turn["content"], self.message_max_tokens)
+            remaining -= estimate_tokens(turn["content"])
+            if remaining < 0:
+                break
+            turns.append(turn)
+        turns.reverse()
+
+        # Fold the oldest unsummarized messages first, one full batch per turn, so a backlog
+        # (e.g. history from before summaries existed) is caught up rather than skipped
+        to_fold = []
+        if rows and self.summary_batch > 0:
+            older = iter_chat_history(user_id, self.summary_batch, after=summary_last_id)
+            to_fold = [row for row in older if row["id"] < rows[0]["id"]]
+            if len(to_fold) < self.summary_batch:
+                to_fold = []
+        return ConversationContext(summary, turns), to_fold
+
+    async def build(self, user_id: str, user_input: str) -> ConversationContext:
+        if self.recent_messages <= 0 or self.token_budget <= 0:
+            return ConversationContext()
+        context, to_fold = await run_blocking(self._load, user_id, user_input)
+        if to_fold:
+            self._schedule_fold(user_id, context.summary, to_fold)
+        return context
+
+    def _schedule_fold(self, user_id: str, summary: str, rows: List[dict]) -> None:
+        """Summarize in the background so the reply never waits on it; one fold per user at a time."""
+        if user_id in self._folding:
+            return
+        self._folding.add(user_id)
+        task = asyncio.ensure_future(self._fold(user_id, summary, rows))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fold(self, user_id: str, summary: str, rows: List[dict]) -> None:
+        from langchain_core.messages import HumanMessage
+        try:
+            transcript = "\n".join(truncate_to_tokens(row["message"], self.message_max_tokens) for row in rows)
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.summary_max_tokens * 3 // 4,
+                summary=summary or "(none yet)",
+                transcript=transcript,
+            )
+            with span("llm", mode="summary"), get_breaker("llm").guard():
+                new_summary = (await get_llm().ainvoke([HumanMessage(content=prompt)])).content.strip()
+            new_summary = truncate_to_tokens(new_summary, self.summary_max_tokens)
+            await run_blocking(save_summary, user_id, new_summary, rows[-1]["id"])
+            logger.info(f"Folded {len(rows)} messages into the conversation summary for {user_id}")
+        except Exception as e:
+            logger.warning(f"Updating the conversation summary for {user_id} failed: {str(e)}")
+        finally:
+            self._folding.discard(user_id)
+
+# Global memory instance
+memory = None
+_memory_lock = threading.Lock()
+
+def get_conversation_memory() -> ConversationMemory:
+    global memory
+    if memory is None:
+        with _memory_lock:
+            if memory is None:
+                memory = ConversationMemory(
+                    context_recent_messages,
+                    context_token_budget,
+                    context_message_max_tokens,
+                    context_summary_max_tokens,
+                    context_summary_batch,
+                )
+    return memory
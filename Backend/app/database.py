@@ -1,33 +1,426 @@
+import queue
 import sqlite3
-from typing import List, Dict
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Dict, Optional, Tuple
+from app.config import database_path, database_pool_size
+from app.metrics import span, timed
+from app.segments import get_segment_store, segment_path
+
+class ConnectionPool:
+    """A fixed number of reusable SQLite connections in WAL mode, opened on first use."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self._idle = queue.Queue()
+        for _ in range(max(1, size)):
+            self._idle.put(None)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # Only takes effect on a new database file (or with `python -m app.archive --vacuum`); lets the
+        # archiver hand the pages freed by archived messages back to the filesystem bit by bit
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        except Exception:
+            if conn is not None:
+                conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                conn.close()
+
+# Upper bound for message ids, used when paging back from the newest message
+MAX_MESSAGE_ID = 2 ** 63 - 1
+
+# Global connection pool
+pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global pool
+    if pool is None:
+        with _pool_lock:
+            if pool is None:
+                pool = ConnectionPool(database_path, database_pool_size)
+    return pool
+
+def close_db():
+    global pool
+    with _pool_lock:
+        if pool is not None:
+            pool.close()
+            pool = None
+
+# AUTOINCREMENT keeps ids from being reused after deletes, so they are safe as cursors
+CREATE_CHAT_HISTORY = '''CREATE TABLE IF NOT EXISTS chat_history
+                         (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, timestamp TEXT, message TEXT)'''
+
+def _migrate_chat_history(c: sqlite3.Cursor):
+    """Rebuild a pre-pagination chat_history table with a stable, monotonic message id."""
+    columns = [row[1] for row in c.execute("PRAGMA table_info(chat_history)")]
+    if not columns or "id" in columns:
+        return
+    c.execute("ALTER TABLE chat_history RENAME TO chat_history_old")
+    c.execute(CREATE_CHAT_HISTORY)
+    c.execute('''INSERT INTO chat_history (user_id, timestamp, message)
+                 SELECT user_id, timestamp, message FROM chat_history_old ORDER BY timestamp, rowid''')
+    c.execute("DROP TABLE chat_history_old")
 
 def init_db():
-    conn = sqlite3.connect("chat_history.db")
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS chat_history 
-                 (user_id TEXT, timestamp TEXT, message TEXT)''')
-    conn.commit()
-    conn.close()
-
-def save_message(user_id: str, message: str):
-    conn = sqlite3.connect("chat_history.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO chat_history (user_id, timestamp, message) VALUES (?, datetime('now'), ?)", 
-              (user_id, message))
-    conn.commit()
-    conn.close()
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        _migrate_chat_history(c)
+        c.execute(CREATE_CHAT_HISTORY)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_user_timestamp ON chat_history (user_id, timestamp)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_user_id ON chat_history (user_id, id)")
+        c.execute('''CREATE TABLE IF NOT EXISTS user_progress
+                     (user_id TEXT PRIMARY KEY, correct_answers INTEGER NOT NULL DEFAULT 0,
+                      total_questions INTEGER NOT NULL DEFAULT 0, updated_at TEXT)''')
+        c.execute('''CREATE TABLE IF NOT EXISTS conversation_summary
+                     (user_id TEXT PRIMARY KEY, summary TEXT NOT NULL, last_message_id INTEGER NOT NULL,
+                      updated_at TEXT)''')
+        c.execute('''CREATE TABLE IF NOT EXISTS job_results
+                     (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT,
+                      updated_at REAL NOT NULL)''')
+        # One row per archived segment (app.segments) holding a run of a user's oldest messages
+        c.execute('''CREATE TABLE IF NOT EXISTS archive_segments
+                     (user_id TEXT NOT NULL, first_id INTEGER NOT NULL, last_id INTEGER NOT NULL,
+                      first_timestamp TEXT NOT NULL, last_timestamp TEXT NOT NULL, message_count INTEGER NOT NULL,
+                      path TEXT NOT NULL, bytes INTEGER NOT NULL, created_at REAL NOT NULL,
+                      PRIMARY KEY (user_id, first_id))''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_archive_segments_user_last ON archive_segments (user_id, last_id)")
+        conn.commit()
+
+@timed("sqlite", op="save_message")
+def save_message(user_id: str, message: str) -> str:
+    """Insert a message and return the timestamp stored with it."""
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    with get_pool().connection() as conn:
+        conn.execute("INSERT INTO chat_history (user_id, timestamp, message) VALUES (?, ?, ?)",
+                     (user_id, timestamp, message))
+        conn.commit()
+    return timestamp
 
+# Archived messages are always the oldest of a user's history (the archiver moves a prefix), so a
+# page is the archived rows followed by the hot ones. Hot rows are read first and archived rows
+# are only taken below the oldest of them: a row the archiver moves in between is seen once.
+
+def _archived_before(conn: sqlite3.Connection, user_id: str, before: int, limit: int) -> List[dict]:
+    """Up to `limit` archived messages just before message id `before`, oldest first."""
+    store = get_segment_store()
+    rows = []
+    segments = conn.execute('''SELECT path FROM archive_segments WHERE user_id = ? AND first_id < ?
+                               ORDER BY first_id DESC''', (user_id, before)).fetchall()
+    for (path,) in segments:
+        segment = store.read(path)
+        stop = segment.index_of_id(before)
+        rows[:0] = segment.rows(max(0, stop - (limit - len(rows))), stop)
+        if len(rows) >= limit:
+            break
+    return rows
+
+def _archived_after(conn: sqlite3.Connection, user_id: str, after: int, below: int, limit: int) -> List[dict]:
+    """Up to `limit` archived messages with ids between `after` and `below` (both exclusive)."""
+    store = get_segment_store()
+    rows = []
+    segments = conn.execute('''SELECT path FROM archive_segments WHERE user_id = ? AND last_id > ?
+                               AND first_id < ? ORDER BY first_id''', (user_id, after, below)).fetchall()
+    for (path,) in segments:
+        segment = store.read(path)
+        start = segment.index_of_id(after + 1)
+        stop = min(segment.index_of_id(below), start + limit - len(rows))
+        rows.extend(segment.rows(start, stop))
+        if len(rows) >= limit:
+            break
+    return rows
+
+@timed("sqlite", op="get_chat_history")
 def get_chat_history(user_id: str) -> List[dict]:
-    conn = sqlite3.connect("chat_history.db")
-    c = conn.cursor()
-    c.execute("SELECT timestamp, message FROM chat_history WHERE user_id = ? ORDER BY timestamp", (user_id,))
-    history = [{"timestamp": row[0], "message": row[1]} for row in c.fetchall()]
-    conn.close()
+    with get_pool().connection() as conn:
+        c = conn.execute("SELECT id, timestamp, message FROM chat_history WHERE user_id = ? ORDER BY id", (user_id,))
+        hot = c.fetchall()
+        below = hot[0][0] if hot else MAX_MESSAGE_ID
+        archived = _archived_after(conn, user_id, 0, below, MAX_MESSAGE_ID)
+    history = [{"timestamp": row["timestamp"], "message": row["message"]} for row in archived]
+    history.extend({"timestamp": row[1], "message": row[2]} for row in hot)
     return history
 
+def iter_chat_history(user_id: str, limit: int, before: int = None, after: int = None) -> Iterator[dict]:
+    """
+    Yield one page of messages in chronological order, from the chat_history table and, where
+    the page reaches past it, the user's archive segments. `after` pages forward from a message
+    id; otherwise the page ends just before `before` (or at the newest message). Paging is by id
+    only: timestamps have one-second resolution, so several messages can share one.
+    """
+    if after is not None:
+        query = """SELECT id, timestamp, message FROM chat_history
+                   WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?"""
+        params = (user_id, after, limit)
+    else:
+        query = """SELECT * FROM (SELECT id, timestamp, message FROM chat_history
+                   WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?) ORDER BY id"""
+        params = (user_id, before if before is not None else MAX_MESSAGE_ID, limit)
+    with span("sqlite", op="iter_chat_history"), get_pool().connection() as conn:
+        hot = conn.execute(query, params).fetchall()
+        archived = []
+        if after is not None:
+            # Any archived match is older than every hot row, so it takes the front of the page
+            below = hot[0][0] if hot else MAX_MESSAGE_ID
+            archived = _archived_after(conn, user_id, after, below, limit)
+            hot = hot[:limit - len(archived)]
+        elif len(hot) < limit:
+            archived = _archived_before(conn, user_id, hot[0][0] if hot else params[1], limit - len(hot))
+    yield from archived
+    for row in hot:
+        yield {"id": row[0], "timestamp": row[1], "message": row[2]}
+
+@timed("sqlite", op="has_messages_beyond")
+def has_messages_beyond(user_id: str, message_id: int, older: bool) -> bool:
+    """Whether the user has any message, hot or archived, older (or newer) than message_id."""
+    operator = "<" if older else ">"
+    segment_column = "first_id" if older else "last_id"
+    with get_pool().connection() as conn:
+        row = conn.execute(f"SELECT 1 FROM chat_history WHERE user_id = ? AND id {operator} ? LIMIT 1",
+                           (user_id, message_id)).fetchone()
+        if row is None:
+            row = conn.execute(f"SELECT 1 FROM archive_segments WHERE user_id = ? AND {segment_column} {operator} ? LIMIT 1",
+                               (user_id, message_id)).fetchone()
+    return row is not None
+
+@timed("sqlite", op="clear_chat_history")
 def clear_chat_history(user_id: str):
-    conn = sqlite3.connect("chat_history.db")
-    c = conn.cursor()
-    c.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    store = get_segment_store()
+    with get_pool().connection() as conn:
+        paths = [row[0] for row in conn.execute("SELECT path FROM archive_segments WHERE user_id = ?", (user_id,))]
+        conn.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM archive_segments WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM conversation_summary WHERE user_id = ?", (user_id,))
+        conn.commit()
+    for path in paths:
+        store.remove(path)
+
+def iter_history_users() -> Iterator[str]:
+    """Each user with messages in the chat_history table, one index lookup per user (no table scan)."""
+    user_id = ""
+    while True:
+        with get_pool().connection() as conn:
+            row = conn.execute("SELECT MIN(user_id) FROM chat_history WHERE user_id > ?", (user_id,)).fetchone()
+        if row[0] is None:
+            return
+        user_id = row[0]
+        yield user_id
+
+@timed("sqlite", op="archive_messages")
+def archive_messages(user_id: str, older_than: str, keep_recent: int, segment_size: int, codec: str) -> int:
+    """
+    Move up to segment_size of the user's oldest messages that are older than older_than (and
+    not among the newest keep_recent) into a new archive segment; returns how many moved.
+    Writing the segment, indexing it and deleting the rows happen under one write lock, so
+    concurrent archivers in other worker processes never archive the same rows twice.
+    """
+    store = get_segment_store()
+    path = None
+    with get_pool().connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            boundary = MAX_MESSAGE_ID
+            if keep_recent > 0:
+                row = conn.execute("SELECT id FROM chat_history WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                   (user_id, keep_recent - 1)).fetchone()
+                boundary = row[0] if row else 0
+            rows = []
+            for row in conn.execute('''SELECT id, timestamp, message FROM chat_history WHERE user_id = ? AND id < ?
+                                       ORDER BY id LIMIT ?''', (user_id, boundary, segment_size)):
+                # Stop at the first recent message, so the archive stays an unbroken prefix of the history
+                if row[1] >= older_than:
+                    break
+                rows.append({"id": row[0], "timestamp": row[1], "message": row[2]})
+            if not rows:
+                conn.rollback()
+                return 0
+            first, last = rows[0], rows[-1]
+            path = segment_path(user_id, first["id"], last["id"], codec)
+            size = store.write(path, rows)
+            conn.execute('''INSERT INTO archive_segments (user_id, first_id, last_id, first_timestamp, last_timestamp,
+                                                          message_count, path, bytes, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                         (user_id, first["id"], last["id"], first["timestamp"], last["timestamp"], len(rows),
+                          path, size, time.time()))
+            conn.execute("DELETE FROM chat_history WHERE user_id = ? AND id BETWEEN ? AND ?",
+                         (user_id, first["id"], last["id"]))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            if path is not None:
+                store.remove(path)
+            raise
+    return len(rows)
+
+@timed("sqlite", op="compact_segments")
+def compact_segments(user_id: str, segment_size: int, codec: str) -> int:
+    """
+    Merge runs of the user's small, adjacent archive segments into segments of up to
+    segment_size messages; returns how many segments were merged away. The replaced files are
+    retired, not deleted: a concurrent page may have read the old index and still open them, so
+    the archiver's orphan sweep removes them after its grace period.
+    """
+    store = get_segment_store()
+    written, replaced = [], []
+    with get_pool().connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            segments = conn.execute('''SELECT first_id, message_count, path FROM archive_segments
+                                       WHERE user_id = ? ORDER BY first_id''', (user_id,)).fetchall()
+            runs, run = [], []
+            for segment in segments:
+                if run and sum(s[1] for s in run) + segment[1] > segment_size:
+                    runs.append(run)
+                    run = []
+                run.append(segment)
+            runs.append(run)
+            for run in runs:
+                if len(run) < 2:
+                    continue
+                rows = [row for segment in run for row in store.read(segment[2]).rows()]
+                first, last = rows[0], rows[-1]
+                path = segment_path(user_id, first["id"], last["id"], codec)
+                size = store.write(path, rows)
+                written.append(path)
+                conn.executemany("DELETE FROM archive_segments WHERE user_id = ? AND first_id = ?",
+                                 [(user_id, segment[0]) for segment in run])
+                conn.execute('''INSERT INTO archive_segments (user_id, first_id, last_id, first_timestamp,
+                                    last_timestamp, message_count, path, bytes, created_at)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                             (user_id, first["id"], last["id"], first["timestamp"], last["timestamp"], len(rows),
+                              path, size, time.time()))
+                replaced.extend(segment[2] for segment in run)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            for path in written:
+                store.remove(path)
+            raise
+    for path in replaced:
+        store.retire(path)
+    return len(replaced) - len(written)
+
+def list_fragmented_archives(segment_size: int) -> List[str]:
+    """Users with more than one archive segment smaller than segment_size."""
+    with get_pool().connection() as conn:
+        rows = conn.execute('''SELECT user_id FROM archive_segments WHERE message_count < ?
+                               GROUP BY user_id HAVING COUNT(*) > 1''', (segment_size,)).fetchall()
+    return [row[0] for row in rows]
+
+def list_segment_paths() -> set:
+    with get_pool().connection() as conn:
+        return {row[0] for row in conn.execute("SELECT path FROM archive_segments")}
+
+@timed("sqlite", op="reclaim_space")
+def reclaim_space(full: bool = False):
+    """
+    Return pages freed by archived and deleted rows to the filesystem: an incremental vacuum
+    (if the database was created with auto_vacuum) and a WAL checkpoint. `full` rebuilds the
+    whole file with VACUUM, switching it to incremental auto_vacuum; it blocks writers
+    while it runs, so it is left to maintenance windows.
+    """
+    with get_pool().connection() as conn:
+        if full:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            # execute() would step the pragma once, freeing a single page; executescript runs it to the end
+            conn.executescript("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+def get_archive_totals() -> dict:
+    with get_pool().connection() as conn:
+        row = conn.execute('''SELECT COUNT(*), COALESCE(SUM(message_count), 0), COALESCE(SUM(bytes), 0),
+                                     COUNT(DISTINCT user_id) FROM archive_segments''').fetchone()
+    return {"segments": row[0], "messages": row[1], "bytes": row[2], "users": row[3]}
+
+@timed("sqlite", op="load_progress")
+def load_progress(user_id: str) -> Tuple[int, int]:
+    """Return (correct_answers, total_questions) for a user, zeros if unknown."""
+    with get_pool().connection() as conn:
+        row = conn.execute("SELECT correct_answers, total_questions FROM user_progress WHERE user_id = ?",
+                           (user_id,)).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+@timed("sqlite", op="add_progress_deltas")
+def add_progress_deltas(deltas: List[Tuple[str, int, int]]):
+    """Add (user_id, correct, total) increments in one transaction; additive so workers never clobber each other."""
+    with get_pool().connection() as conn:
+        conn.executemany('''INSERT INTO user_progress (user_id, correct_answers, total_questions, updated_at)
+                            VALUES (?, ?, ?, datetime('now'))
+                            ON CONFLICT(user_id) DO UPDATE SET
+                                correct_answers = correct_answers + excluded.correct_answers,
+                                total_questions = total_questions + excluded.total_questions,
+                                updated_at = excluded.updated_at''', deltas)
+        conn.commit()
+
+
+@timed("sqlite", op="load_summary")
+def load_summary(user_id: str) -> Tuple[str, int]:
+    """Return (summary, id of the last message folded into it), or ("", 0) if there is none."""
+    with get_pool().connection() as conn:
+        row = conn.execute("SELECT summary, last_message_id FROM conversation_summary WHERE user_id = ?",
+                           (user_id,)).fetchone()
+    return (row[0], row[1]) if row else ("", 0)
+
+@timed("sqlite", op="save_summary")
+def save_summary(user_id: str, summary: str, last_message_id: int):
+    """Store a user's rolling summary unless a newer one (covering later messages) is already stored."""
+    with get_pool().connection() as conn:
+        conn.execute('''INSERT INTO conversation_summary (user_id, summary, last_message_id, updated_at)
+                        VALUES (?, ?, ?, datetime('now'))
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            summary = excluded.summary,
+                            last_message_id = excluded.last_message_id,
+                            updated_at = excluded.updated_at
+                        WHERE excluded.last_message_id > conversation_summary.last_message_id''',
+                     (user_id, summary, last_message_id))
+        conn.commit()
+
+@timed("sqlite", op="save_job_result")
+def save_job_result(job_id: str, kind: str, status: str, result: str = None, error: str = None):
+    with get_pool().connection() as conn:
+        conn.execute('''INSERT OR REPLACE INTO job_results (id, kind, status, result, error, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)''', (job_id, kind, status, result, error, time.time()))
+        conn.commit()
+
+@timed("sqlite", op="load_job_result")
+def load_job_result(job_id: str, newer_than: float) -> Optional[dict]:
+    """A job's stored status and result, or None if unknown or last updated before newer_than."""
+    with get_pool().connection() as conn:
+        row = conn.execute("SELECT kind, status, result, error FROM job_results WHERE id = ? AND updated_at >= ?",
+                           (job_id, newer_than)).fetchone()
+    return {"kind": row[0], "status": row[1], "result": row[2], "error": row[3]} if row else None
+
+@timed("sqlite", op="prune_job_results")
+def prune_job_results(older_than: float) -> int:
+    """Delete job results last updated before older_than; returns how many were removed."""
+    with get_pool().connection() as conn:
+        count = conn.execute("DELETE FROM job_results WHERE updated_at < ?", (older_than,)).rowcount
+        conn.commit()
+    return count
\ No newline at end of file
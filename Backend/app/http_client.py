@@ -0,0 +1,39 @@
+import threading
+from typing import Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import http_pool_connections, http_pool_maxsize, http_connect_timeout, http_read_timeout
+
+# (connect, read) timeout for outbound calls
+HTTP_TIMEOUT: Tuple[float, float] = (http_connect_timeout, http_read_timeout)
+
+def create_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    """
+    A session whose connections stay open between calls, so repeated requests to the same host
+    skip the TCP and TLS handshakes. Up to pool_maxsize connections per host are kept; callers
+    beyond that open a temporary connection instead of waiting.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Global session instance
+http_session = None
+_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    global http_session
+    if http_session is None:
+        with _session_lock:
+            if http_session is None:
+                http_session = create_session(http_pool_connections, http_pool_maxsize)
+    return http_session
+
+def close_http_session():
+    global http_session
+    with _session_lock:
+        if http_session is not None:
+            http_session.close()
+            http_session = None
@@ -0,0 +1,225 @@
+import asyncio
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterator, List, Tuple
+from app.config import (
+    intent_training_path,
+    intent_model_threshold,
+    intent_llm_fallback,
+    intent_llm_min_confidence,
+    intent_llm_timeout,
+    intent_llm_cache_size,
+)
+from app.intent_router import DEFAULT_AGENT, IntentRouter, router as keyword_router
+from app.metrics import span
+from app.resilience import get_breaker
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Character n-gram lengths used as features; short grams carry the frame words ("was bedeutet",
+# "aussprache") across spelling variants and inflections
+NGRAM_SIZES = (2, 3, 4)
+
+INTENT_PROMPT = """You route messages from a German learner to the right helper.
+Reply with exactly one of these labels and nothing else:
+conversation_agent: chatting or practising a conversation
+grammar_agent: asks to check or correct a sentence
+grammar_explain_agent: asks why a sentence is built the way it is, or to explain its grammar
+vocabulary_agent: asks what a word means
+pronunciation_agent: asks how something is pronounced or to hear it
+translator_en_agent: asks for an English translation
+translator_bn_agent: asks for a Bangla (Bengali) translation
+
+Message: {message}"""
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def char_ngrams(text: str) -> List[str]:
+    padded = f" {normalize(text)} "
+    return [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+def read_examples(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (label, utterance) pairs from a TSV; '#' lines are comments."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, utterance = line.split("\t", 1)
+            yield label, utterance
+
+class NaiveBayesIntentModel:
+    """
+    Multinomial naive Bayes over character n-grams, trained in one pass over labelled examples
+    (a few milliseconds for a few hundred). The confidence is the softmax of the class scores
+    divided by the square root of the number of known n-grams: raw naive Bayes scores make
+    almost every input look certain, plain per-n-gram averages make none of them look certain.
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self._priors: List[float] = []
+        self._weights: Dict[str, List[float]] = {}
+
+    def fit(self, examples: List[Tuple[str, str]]) -> "NaiveBayesIntentModel":
+        counts: Dict[str, Counter] = {}
+        documents = Counter()
+        for label, utterance in examples:
+            counts.setdefault(label, Counter()).update(char_ngrams(utterance))
+            documents[label] += 1
+        self.labels = sorted(counts)
+        vocabulary = set().union(*counts.values())
+        self._priors = [math.log(documents[label] / len(examples)) for label in self.labels]
+        totals = [sum(counts[label].values()) + self.alpha * len(vocabulary) for label in self.labels]
+        self._weights = {
+            gram: [math.log((counts[label][gram] + self.alpha) / total) for label, total in zip(self.labels, totals)]
+            for gram in vocabulary
+        }
+        return self
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(most likely label, its confidence between 0 and 1)."""
+        scores = list(self._priors)
+        seen = 0
+        for gram in char_ngrams(text):
+            weights = self._weights.get(gram)
+            if weights is not None:
+                seen += 1
+                scores = [score + weight for score, weight in zip(scores, weights)]
+        if not seen:
+            return DEFAULT_AGENT, 0.0
+        scaled = [score / math.sqrt(seen) for score in scores]
+        top = max(scaled)
+        exps = [math.exp(score - top) for score in scaled]
+        best = scaled.index(top)
+        return self.labels[best], exps[best] / sum(exps)
+
+class TieredIntentRouter:
+    """
+    Routes in up to three tiers, each only consulted when the previous one can't decide:
+    1. keyword: the compiled keyword rules (explicit commands such as "translate to english")
+    2. model: the n-gram classifier, accepted when its confidence reaches `threshold`
+    3. llm: the LLM picks the agent; answers are memoized per normalized message
+    Below the threshold, only a guess of a helper agent with at least `llm_min_confidence` goes
+    to the LLM; a conversation guess or a weaker one goes straight to the conversation agent
+    ("default"), so ordinary chat never waits on an extra LLM round-trip. If the LLM is
+    disabled, unavailable or slow, the message goes to the conversation agent too.
+    """
+
+    TIERS = ("keyword", "model", "default", "llm_cache", "llm", "fallback")
+
+    def __init__(self, keywords: IntentRouter, model: NaiveBayesIntentModel, threshold: float,
+                 llm_fallback: bool, llm_timeout: float, cache_size: int, llm_min_confidence: float = 0.0):
+        self.keywords = keywords
+        self.model = model
+        self.threshold = threshold
+        self.llm_min_confidence = llm_min_confidence
+        self.llm_fallback = llm_fallback
+        self.llm_timeout = llm_timeout
+        self.cache_size = cache_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {tier: {"handled": 0, "seconds": 0.0} for tier in self.TIERS}
+
+    def _record(self, tier: str, started: float) -> None:
+        with self._lock:
+            self.stats[tier]["handled"] += 1
+            self.stats[tier]["seconds"] += time.perf_counter() - started
+
+    def route_local(self, user_input: str) -> Tuple[str, str, float]:
+        """
+        (agent, tier, confidence) from the keyword and model tiers; tier is "default" for messages
+        sent to the conversation agent without asking the LLM, "ambiguous" for those that need it.
+        """
+        with span("intent", tier="keyword"):
+            agent = self.keywords.route(user_input)
+        if agent != self.keywords.default:
+            return agent, "keyword", 1.0
+        with span("intent", tier="model"):
+            agent, confidence = self.model.predict(user_input)
+        if confidence >= self.threshold:
+            return agent, "model", confidence
+        if agent == DEFAULT_AGENT or confidence < self.llm_min_confidence:
+            return DEFAULT_AGENT, "default", confidence
+        return agent, "ambiguous", confidence
+
+    async def _ask_llm(self, user_input: str) -> str:
+        from langchain_core.messages import HumanMessage
+        from app.config import get_llm
+        prompt = INTENT_PROMPT.format(message=user_input)
+        # Its own breaker: this tier's short timeout must not open the one guarding conversation replies
+        with span("llm", mode="intent"), get_breaker("llm_intent").guard():
+            answer = (await asyncio.wait_for(get_llm().ainvoke([HumanMessage(content=prompt)]), self.llm_timeout)).content
+        answer = answer.strip().lower()
+        return next((label for label in self.model.labels if label in answer), DEFAULT_AGENT)
+
+    async def route(self, user_input: str) -> str:
+        started = time.perf_counter()
+        agent, tier, confidence = self.route_local(user_input)
+        if tier != "ambiguous":
+            self._record(tier, started)
+            return agent
+        if not self.llm_fallback:
+            self._record("fallback", started)
+            return DEFAULT_AGENT
+
+        key = normalize(user_input)
+        with self._lock:
+            memoized = self._memo.get(key)
+            if memoized is not None:
+                self._memo.move_to_end(key)
+        if memoized is not None:
+            self._record("llm_cache", started)
+            return memoized
+
+        try:
+            with span("intent", tier="llm"):
+                agent = await self._ask_llm(user_input)
+        except Exception as e:
+            logger.warning(f"LLM intent routing failed, using the conversation agent: {str(e)}")
+            self._record("fallback", started)
+            return DEFAULT_AGENT
+        with self._lock:
+            self._memo[key] = agent
+            while len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        logger.info(f"LLM routed an ambiguous message (model guess {confidence:.2f}) to {agent}")
+        self._record("llm", started)
+        return agent
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {
+                tier: {"handled": s["handled"], "mean_ms": s["seconds"] / s["handled"] * 1000 if s["handled"] else 0.0}
+                for tier, s in self.stats.items()
+            }
+            stats["memoized"] = len(self._memo)
+        return stats
+
+def load_intent_model(path: str = intent_training_path) -> NaiveBayesIntentModel:
+    return NaiveBayesIntentModel().fit(list(read_examples(path)))
+
+# Global router instance
+intent_router = None
+_router_lock = threading.Lock()
+
+def get_intent_router() -> TieredIntentRouter:
+    global intent_router
+    if intent_router is None:
+        with _router_lock:
+            if intent_router is None:
+                intent_router = TieredIntentRouter(
+                    keyword_router,
+                    load_intent_model(),
+                    threshold=intent_model_threshold,
+                    llm_fallback=intent_llm_fallback,
+                    llm_timeout=intent_llm_timeout,
+                    cache_size=intent_llm_cache_size,
+                    llm_min_confidence=intent_llm_min_confidence,
+                )
+    return intent_router
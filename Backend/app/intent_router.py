@@ -0,0 +1,58 @@
+import re
+from typing import Dict, List, Tuple
+
+DEFAULT_AGENT = "conversation_agent"
+
+# Keyword phrases in priority order: when several match, the earliest rule wins.
+# Specific multi-word phrases come before the bare words they contain, so
+# "explain grammar" is not taken by the generic "grammar" rule.
+INTENT_RULES: List[Tuple[str, List[str]]] = [
+    ("grammar_explain_agent", ["explain grammar", "grammar explanation"]),
+    ("grammar_agent", ["check grammar", "grammar check"]),
+    ("translator_en_agent", ["translate to english", "translation english"]),
+    ("translator_bn_agent", ["translate to bangla", "translation bangla"]),
+    ("pronunciation_agent", ["pronounce", "pronunciation"]),
+    ("vocabulary_agent", ["vocabulary", "define", "meaning"]),
+    ("grammar_agent", ["grammar"]),
+    ("grammar_explain_agent", ["explain"]),
+    ("translator_en_agent", ["english", "en"]),
+    ("translator_bn_agent", ["bangla", "bn"]),
+    ("pronunciation_agent", ["say"]),
+    ("vocabulary_agent", ["word"]),
+]
+
+class IntentRouter:
+    """
+    Routes an utterance to an agent with one precompiled, word-boundary-aware regex.
+    Keywords only match as whole words, so "en" does not fire inside "lernen".
+    """
+
+    def __init__(self, rules: List[Tuple[str, List[str]]], default: str = DEFAULT_AGENT):
+        self.default = default
+        self._phrases: Dict[str, Tuple[int, str]] = {}
+        for priority, (agent, phrases) in enumerate(rules):
+            for phrase in phrases:
+                self._phrases.setdefault(self._normalize(phrase), (priority, agent))
+        alternatives = sorted(self._phrases, key=len, reverse=True)
+        pattern = "|".join(r"\s+".join(map(re.escape, phrase.split())) for phrase in alternatives)
+        self._regex = re.compile(rf"\b(?:{pattern})\b")
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def route(self, user_input: str) -> str:
+        best = None
+        for match in self._regex.finditer(user_input.lower()):
+            rule = self._phrases[self._normalize(match.group(0))]
+            if best is None or rule[0] < best[0]:
+                best = rule
+                if best[0] == 0:
+                    break
+        return best[1] if best else self.default
+
+router = IntentRouter(INTENT_RULES)
+
+def route_intent(user_input: str) -> str:
+    """Return the agent name for the input, or the conversation agent if no keyword matches."""
+    return router.route(user_input)
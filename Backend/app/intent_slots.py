@@ -0,0 +1,67 @@
+import re
+from typing import List, Pattern
+
+# Language names as learners write them, in English and German ("auf Englisch", "ins Bengalische")
+LANGUAGES = r"(?:english|englisch(?:e[nm]?)?|german|deutsch(?:e[nm]?)?|bangla|bengali|bengalisch(?:e[nm]?)?)\b"
+
+# Trailing "auf Englisch" / "in English" on a term or phrase
+LANGUAGE_SUFFIX = re.compile(rf"\s+(?:auf|in|im|ins)\s+{LANGUAGES}$", re.IGNORECASE)
+
+# Articles and frame words that can sit between the question and the word asked about
+WORD_FRAME = r"(?:the\s+(?:german\s+)?(?:word|verb|noun|adjective)\s+|(?:eigentlich\s+)?das\s+wort\s+|eigentlich\s+)?"
+
+# Questions about a word, most specific first; group 1 is the word
+TERM_PATTERNS: List[Pattern] = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    rf"^what\s+does\s+{WORD_FRAME}(.+?)\s+mean\b",
+    rf"^what(?:\s+is|'s)\s+the\s+meaning\s+of\s+{WORD_FRAME}(.+)",
+    rf"^(?:meaning|definition|bedeutung)\s+(?:of|von)\s+{WORD_FRAME}(.+)",
+    rf"^was\s+ist\s+die\s+bedeutung\s+von\s+{WORD_FRAME}(.+)",
+    rf"^was\s+(?:bedeutet|hei(?:ß|ss)t)\s+{WORD_FRAME}(.+)",
+    rf"^was\s+versteht\s+man\s+unter\s+{WORD_FRAME}(.+)",
+    r"^(?:was\s+ist|what(?:\s+is|'s))\s+(?:ein|eine|der|die|das|a|an|the)\s+(.+)",
+    r"^what(?:\s+is|'s)\s+(.+?)\s+in\s+\w+",
+    rf"^(?:define|look\s+up|explain)\s+{WORD_FRAME}(.+)",
+    r"^[^:]{1,30}:\s*(.+)",
+    r"\b(?:the\s+word|das\s+wort)\s+(.+)",
+]]
+
+# Requests to translate a phrase; group 1 is the phrase
+TRANSLATION_PATTERNS: List[Pattern] = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r"^[^:]{1,60}:\s*(.+)",
+    rf"^(?:was\s+(?:hei(?:ß|ss)t|bedeutet)|wie\s+sagt\s+man|what\s+is|what's|how\s+do\s+you\s+say)\s+(.+?)"
+    rf"\s+(?:auf|in|im|ins)\s+{LANGUAGES}\W*$",
+    rf"^(?:(?:please\s+)?translate|übersetze|translation)(?:\s+this)?(?:\s+(?:to|into|ins|auf|in))?\s+{LANGUAGES}\s+(.+)",
+    rf"^(.+?)\s+(?:auf|in|ins)\s+{LANGUAGES}\W*$",
+]]
+
+# Quotes and sentence punctuation around an extracted word
+PUNCTUATION = " \t\"'“”„‚‘’?!.,;"
+
+def _clean(text: str) -> str:
+    return LANGUAGE_SUFFIX.sub("", text.strip(PUNCTUATION)).strip(PUNCTUATION)
+
+def extract_term(user_input: str) -> str:
+    """
+    The word a vocabulary question asks about ("What does Kühlschrank mean?" -> "Kühlschrank",
+    "Was bedeutet Haus auf Englisch?" -> "Haus"); the last word when no pattern fits.
+    """
+    text = user_input.strip()
+    for pattern in TERM_PATTERNS:
+        match = pattern.search(text)
+        if match and _clean(match.group(1)):
+            return _clean(match.group(1))
+    words = text.split()
+    return _clean(words[-1]) if words else ""
+
+def extract_translation_source(user_input: str) -> str:
+    """
+    The text a translation request wants translated ("translate to english: Ich habe Hunger"
+    -> "Ich habe Hunger", "Was heißt Hund auf Englisch?" -> "Hund"); the whole message when
+    no pattern fits. Case is kept.
+    """
+    text = user_input.strip()
+    for pattern in TRANSLATION_PATTERNS:
+        match = pattern.search(text)
+        if match and match.group(1).strip():
+            return match.group(1).strip()
+    return text
@@ -0,0 +1,215 @@
+import hashlib
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from app.config import job_workers, job_max_pending, job_result_ttl
+from app.database import save_job_result, load_job_result, prune_job_results
+from app.metrics import span
+from app.tools import synthesize_pronunciation, build_grammar_explanation
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("done", "failed")
+
+# Slow tool work that can run in the background, by job kind. Handlers raise on failure (the
+# tools would return the error as text, which would be stored and deduplicated as a result)
+JOB_HANDLERS: Dict[str, Callable[[str], str]] = {
+    "pronunciation": synthesize_pronunciation,
+    "grammar_explain": build_grammar_explanation,
+}
+
+# Finished jobs between sweeps of expired results
+PRUNE_EVERY = 100
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds job_max_pending jobs."""
+
+def job_key(kind: str, payload: str) -> str:
+    """Content hash used as the job id, so identical requests share one job and one result."""
+    return hashlib.sha256(f"{kind}\n{payload}".encode("utf-8")).hexdigest()[:32]
+
+class Job:
+    def __init__(self, job_id: str, kind: str, payload: str = "", status: str = "queued",
+                 result: Optional[str] = None, error: Optional[str] = None):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.status = status
+        self.result = result
+        self.error = error
+        self.callbacks: List[Callable[["Job"], None]] = []
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "kind": self.kind, "status": self.status, "result": self.result, "error": self.error}
+
+class JobQueue:
+    """
+    Runs slow tool calls on a fixed set of worker threads, outside the request. Jobs are
+    identified by a hash of their kind and input: resubmitting work that is queued, running or
+    finished (within the result TTL) returns the existing job instead of doing it again.
+    Status and results are written to the database, so any worker process can answer a poll.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[str], str]], workers: int, max_pending: int, result_ttl: float):
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._finished_since_prune = 0
+        self.stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, kind: str, payload: str) -> Job:
+        """Queue a job, or return the matching queued, running or finished one. Raises JobQueueFull."""
+        job_id = job_key(kind, payload)
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                self.stats["deduplicated"] += 1
+                return job
+        stored = load_job_result(job_id, time.time() - self.result_ttl)
+        if stored is not None and stored["status"] == "done":
+            with self._lock:
+                self.stats["deduplicated"] += 1
+            return Job(job_id, kind, status="done", result=stored["result"])
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                self.stats["deduplicated"] += 1
+                return job
+            # Jobs are only added under the lock, so the queue can't fill up between check and put
+            if self._queue.full():
+                self.stats["rejected"] += 1
+                raise JobQueueFull(f"{self._queue.maxsize} jobs already pending")
+            job = Job(job_id, kind, payload)
+            # Stored before a worker can pick the job up, so "queued" never overwrites its outcome
+            save_job_result(job_id, kind, "queued")
+            self._active[job_id] = job
+            self._queue.put_nowait(job)
+            self.stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is not None:
+            return job
+        stored = load_job_result(job_id, time.time() - self.result_ttl)
+        if stored is None:
+            return None
+        return Job(job_id, stored["kind"], status=stored["status"], result=stored["result"], error=stored["error"])
+
+    def add_done_callback(self, job_id: str, callback: Callable[[Job], None]) -> None:
+        """Call callback(job) on a worker thread once the job finishes (right away if it already has)."""
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                job.callbacks.append(callback)
+                return
+        job = self.get(job_id)
+        if job is not None:
+            callback(job)
+
+    def _run_job(self, job: Job) -> None:
+        job.status = "running"
+        save_job_result(job.id, job.kind, "running")
+        status, result, error = "done", None, None
+        try:
+            with span("job", kind=job.kind):
+                result = self.handlers[job.kind](job.payload)
+        except Exception as e:
+            status, error = "failed", str(e)
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+        # Callbacks (e.g. saving the result to the chat history) run before the outcome is
+        # published, so a client that sees the job finish also finds what they wrote
+        finished = Job(job.id, job.kind, job.payload, status, result, error)
+        while True:
+            with self._lock:
+                callbacks, job.callbacks = job.callbacks, []
+            if not callbacks:
+                break
+            self._run_callbacks(finished, callbacks)
+        save_job_result(job.id, job.kind, status, result, error)
+        # The outcome becomes visible and the job stops deduplicating in one step: a resubmit
+        # never joins a job that has already failed, and a poll never sees one still "running"
+        with self._lock:
+            job.status, job.result, job.error = status, result, error
+            self.stats["completed" if status == "done" else "failed"] += 1
+            self._active.pop(job.id, None)
+            callbacks, job.callbacks = job.callbacks, []
+        # Registered while the outcome was being stored
+        self._run_callbacks(finished, callbacks)
+
+    def _run_callbacks(self, job: Job, callbacks: List[Callable[[Job], None]]) -> None:
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error(f"Callback for job {job.id} failed: {str(e)}")
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                self._run_job(job)
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+            with self._lock:
+                self._finished_since_prune += 1
+                prune = self._finished_since_prune >= PRUNE_EVERY
+                if prune:
+                    self._finished_since_prune = 0
+            if prune:
+                try:
+                    prune_job_results(time.time() - self.result_ttl)
+                except Exception as e:
+                    logger.warning(f"Failed to prune job results: {str(e)}")
+
+    def start(self) -> None:
+        if not self._threads:
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            logger.info(f"Job queue started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 30) -> None:
+        """Finish queued jobs, then stop the workers; gives up after timeout (the workers are daemons)."""
+        deadline = time.monotonic() + timeout
+        try:
+            for _ in self._threads:
+                # The stop markers queue behind pending jobs, so wait for room rather than block forever
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            logger.warning(f"Job queue still full after {timeout}s, not waiting for the workers")
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["active"] = len(self._active)
+        stats["pending"] = self._queue.qsize()
+        stats["workers"] = len(self._threads)
+        return stats
+
+# Global queue instance
+job_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    global job_queue
+    if job_queue is None:
+        with _queue_lock:
+            if job_queue is None:
+                job_queue = JobQueue(JOB_HANDLERS, job_workers, job_max_pending, job_result_ttl)
+    return job_queue
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+from app.config import (
+    language_tool_language,
+    language_tool_pool_size,
+    language_tool_checkout_timeout,
+    language_tool_health_check_interval,
+)
+from app.resilience import time_left
+import logging
+
+if TYPE_CHECKING:
+    from language_tool_python import LanguageTool
+
+logger = logging.getLogger(__name__)
+
+def create_language_tool(language: str) -> "LanguageTool":
+    # Imported on first use: language_tool_python is slow to import and only needed once the pool starts
+    from language_tool_python import LanguageTool
+    return LanguageTool(language)
+
+class LanguageToolPoolTimeout(Exception):
+    """Raised when no LanguageTool instance becomes free within the checkout timeout."""
+
+class LanguageToolPool:
+    """
+    A fixed-size pool of warm LanguageTool instances (one JVM-backed server each). A slot whose
+    instance could not be (re)started holds None until a checkout manages to start one.
+    """
+
+    def __init__(self, size: int, language: str = "de-DE", checkout_timeout: float = 30.0,
+                 health_check_interval: float = 60.0):
+        self.size = max(1, size)
+        self.language = language
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.Queue()
+        self._last_checked = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+        for _ in range(self.size):
+            self._idle.put(self._start_instance())
+        logger.info(f"LanguageTool pool started with {self.size} instance(s)")
+
+    def _start_instance(self) -> "LanguageTool":
+        instance = create_language_tool(self.language)
+        self._last_checked[id(instance)] = time.monotonic()
+        return instance
+
+    def _is_healthy(self, instance: "LanguageTool") -> bool:
+        try:
+            instance.check("Test")
+            return True
+        except Exception as e:
+            logger.warning(f"LanguageTool health check failed: {str(e)}")
+            return False
+
+    def _restart(self, instance: "LanguageTool") -> "LanguageTool":
+        self._last_checked.pop(id(instance), None)
+        try:
+            instance.close()
+        except Exception:
+            pass
+        with self._lock:
+            self.stats["restarts"] += 1
+        logger.info("Restarting LanguageTool instance")
+        return self._start_instance()
+
+    def _ensure_healthy(self, instance: "LanguageTool") -> "LanguageTool":
+        last_checked = self._last_checked.get(id(instance), 0.0)
+        if time.monotonic() - last_checked < self.health_check_interval:
+            return instance
+        if not self._is_healthy(instance):
+            return self._restart(instance)
+        self._last_checked[id(instance)] = time.monotonic()
+        return instance
+
+    def acquire(self, timeout: float = None) -> "LanguageTool":
+        """Check out an instance, waiting at most `timeout` seconds for one to become free."""
+        if self._closed:
+            raise RuntimeError("LanguageTool pool is closed")
+        timeout = self.checkout_timeout if timeout is None else timeout
+        left = time_left()
+        if left is not None:
+            # Don't wait for an instance past the caller's deadline
+            timeout = max(0.0, min(timeout, left))
+        started = time.monotonic()
+        try:
+            instance = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise LanguageToolPoolTimeout(f"No LanguageTool instance available after {timeout}s")
+        waited = time.monotonic() - started
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+        try:
+            if instance is None:
+                # A slot whose instance failed to (re)start earlier: try again now
+                return self._start_instance()
+            return self._ensure_healthy(instance)
+        except Exception:
+            # Never leak a slot: leave it empty for the next checkout to start again
+            self._idle.put(None)
+            raise
+
+    def release(self, instance: "LanguageTool", broken: bool = False) -> None:
+        """Return an instance to the pool, replacing it if it failed while checked out."""
+        if self._closed:
+            instance.close()
+            return
+        if broken:
+            try:
+                instance = self._restart(instance)
+            except Exception as e:
+                logger.error(f"Failed to restart LanguageTool instance, retrying on next checkout: {str(e)}")
+                instance = None
+        self._idle.put(instance)
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        instance = self.acquire(timeout)
+        broken = False
+        try:
+            yield instance
+        except Exception:
+            broken = not self._is_healthy(instance)
+            raise
+        finally:
+            self.release(instance, broken=broken)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        )
+        return stats
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                instance = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if instance is None:
+                continue
+            try:
+                instance.close()
+            except Exception as e:
+                logger.warning(f"Failed to close LanguageTool instance: {str(e)}")
+        logger.info("LanguageTool pool closed")
+
+# Global pool instance
+pool = None
+_pool_lock = threading.Lock()
+
+def init_language_tool_pool():
+    global pool
+    with _pool_lock:
+        if pool is None:
+            pool = LanguageToolPool(
+                size=language_tool_pool_size,
+                language=language_tool_language,
+                checkout_timeout=language_tool_checkout_timeout,
+                health_check_interval=language_tool_health_check_interval,
+            )
+    return pool
+
+def get_language_tool_pool() -> LanguageToolPool:
+    if pool is None:
+        init_language_tool_pool()
+    return pool
+
+def get_language_tool_pool_stats() -> dict:
+    """Pool stats, without starting the pool just to report on it."""
+    current = pool
+    return current.get_stats() if current is not None else {"started": False}
+
+def close_language_tool_pool():
+    global pool
+    with _pool_lock:
+        if pool is not None:
+            pool.close()
+            pool = None
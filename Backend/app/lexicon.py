@@ -0,0 +1,287 @@
+import itertools
+import os
+import sqlite3
+import sys
+import tarfile
+import threading
+import unicodedata
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.config import lexicon_dictionary, lexicon_source, lexicon_path
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARTICLES = {"m": "der", "f": "die", "n": "das"}
+
+# FreeDict part-of-speech and gender codes, mapped to the labels the override TSV uses
+FREEDICT_POS = {"n": "noun", "v": "verb", "vi": "verb", "vt": "verb", "adj": "adjective", "adv": "adverb",
+                "prep": "preposition", "conj": "conjunction", "pron": "pronoun", "art": "article",
+                "num": "numeral", "int": "interjection", "ptcl": "particle"}
+FREEDICT_GENDER = {"masc": "m", "fem": "f", "neut": "n", "m": "m", "f": "f", "n": "n"}
+
+# Inflectional endings tried (longest first) when a word isn't in the lexicon as written
+SUFFIXES = ("ungen", "eren", "ern", "est", "ten", "tet", "en", "er", "es", "em", "st", "te", "et", "e", "n", "s", "t")
+
+# Longest prefix scan and largest edit distance used for "did you mean" suggestions
+FUZZY_CANDIDATES = 5000
+FUZZY_MAX_DISTANCE = 2
+
+def fold(word: str) -> str:
+    """
+    Lookup key for a word: case-insensitive, umlauts folded to the base vowel, ß to ss. Applied
+    to both lexicon and query, so "Häuser" and "HAUSER" meet at "hauser".
+    """
+    text = unicodedata.normalize("NFKD", word.strip().casefold().replace("ß", "ss"))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+def lookup_keys(word: str) -> List[str]:
+    """
+    Keys to try for a query, in order: the folded word, then (only as a fallback, since "Feuer"
+    and "Museum" really are spelled that way) with ae/oe/ue read as umlauts, so "haeuser" still
+    finds "Häuser".
+    """
+    key = fold(word)
+    return list(dict.fromkeys([key, key.replace("ae", "a").replace("oe", "o").replace("ue", "u")]))
+
+def candidate_keys(key: str) -> Dict[str, int]:
+    """
+    Possible base forms of an inflected key, ranked by the stem they come from (0 = most likely):
+    plural, case and conjugation endings stripped, ge- participles, and verb infinitives of each
+    stem (lernt -> lern -> lernen).
+    """
+    stems = [key[:-len(suffix)] for suffix in SUFFIXES if key.endswith(suffix) and len(key) - len(suffix) >= 2]
+    if key.startswith("ge") and len(key) > 5:
+        stems.extend(stem[2:] for stem in list(stems) if stem.startswith("ge"))
+    candidates = {}
+    for rank, stem in enumerate(stems):
+        for candidate in (stem, stem + "en", stem + "n", stem + "e"):
+            candidates.setdefault(candidate, rank)
+    return candidates
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) once it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def read_source(path: str) -> Iterator[Tuple[str, str, str, str, List[str]]]:
+    """Yield (headword, pos, gender, senses, forms) rows from a lexicon TSV; '#' lines are comments."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            headword, pos, gender, senses, forms = (line.split("\t") + [""] * 5)[:5]
+            yield headword, pos, gender, senses, [form.strip() for form in forms.split(",") if form.strip()]
+
+def _read_tei(f) -> Iterator[Tuple[str, str, str, str, List[str]]]:
+    def local(tag: str) -> str:
+        return tag.rsplit("}", 1)[-1]
+
+    for _, element in ET.iterparse(f):
+        if local(element.tag) != "entry":
+            continue
+        orths, pos, gender, translations = [], "", "", []
+        for child in element.iter():
+            name, text = local(child.tag), (child.text or "").strip()
+            if name == "orth" and text:
+                orths.append(text)
+            elif name == "pos" and text and not pos:
+                pos = FREEDICT_POS.get(text.rstrip("."), text)
+            elif name == "gen" and text and not gender:
+                gender = FREEDICT_GENDER.get(text.rstrip("."), "")
+            elif name == "cit" and child.get("type") == "trans":
+                translations.extend(quote.text.strip() for quote in child
+                                    if local(quote.tag) == "quote" and quote.text and quote.text.strip())
+            elif name == "tr" and text:
+                translations.append(text)
+        element.clear()
+        if orths and translations:
+            yield orths[0], pos, gender, "; ".join(dict.fromkeys(translations)), orths[1:]
+
+def read_freedict(path: str) -> Iterator[Tuple[str, str, str, str, List[str]]]:
+    """
+    Yield (headword, pos, gender, senses, forms) rows from a FreeDict TEI dictionary (e.g.
+    deu-eng from https://freedict.org), given as the .tei file or its release tarball and
+    streamed entry by entry. Entries without an English translation are skipped.
+    """
+    if not tarfile.is_tarfile(path):
+        with open(path, "rb") as f:
+            yield from _read_tei(f)
+        return
+    with tarfile.open(path) as archive:
+        member = next((member for member in archive if member.isfile() and member.name.endswith(".tei")), None)
+        if member is None:
+            raise ValueError(f"No .tei file in {path}")
+        yield from _read_tei(archive.extractfile(member))
+
+def build_lexicon(source: str, path: str, dictionary: Optional[str] = None) -> int:
+    """
+    Compile the lexicon into a read-only SQLite file: entries plus an index of folded headwords
+    and listed inflected forms. Entries come from a FreeDict dictionary, if given, with the
+    curated TSV entries taking precedence (a headword in the TSV replaces every dictionary entry
+    for it). Written to a temporary file and moved into place, so running processes never see a
+    half-built lexicon. Returns the number of entries.
+    """
+    overrides = list(read_source(source)) if os.path.exists(source) else []
+    overridden = {headword for headword, *_ in overrides}
+    rows = iter(overrides)
+    if dictionary:
+        rows = itertools.chain(rows, (row for row in read_freedict(dictionary) if row[0] not in overridden))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute('''CREATE TABLE entries
+                        (id INTEGER PRIMARY KEY, headword TEXT NOT NULL, pos TEXT, gender TEXT, senses TEXT NOT NULL)''')
+        conn.execute('''CREATE TABLE forms
+                        (key TEXT NOT NULL, entry_id INTEGER NOT NULL, PRIMARY KEY (key, entry_id)) WITHOUT ROWID''')
+        count = 0
+        for entry_id, (headword, pos, gender, senses, forms) in enumerate(rows, 1):
+            conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", (entry_id, headword, pos, gender, senses))
+            conn.executemany("INSERT OR IGNORE INTO forms VALUES (?, ?)",
+                             [(fold(form), entry_id) for form in [headword, *forms]])
+            count = entry_id
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+class Lexicon:
+    """
+    German-English lookups against the SQLite file from build_lexicon. Nothing is loaded into
+    memory up front; each lookup is one or two indexed queries on a per-thread read-only connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def _entries(self, keys: List[str]) -> List[Tuple[str, str, str, str, str]]:
+        """(key, headword, pos, gender, senses) for entries matching any of the keys."""
+        placeholders = ",".join("?" * len(keys))
+        return self._connection().execute(
+            f'''SELECT f.key, e.headword, e.pos, e.gender, e.senses FROM forms f JOIN entries e ON e.id = f.entry_id
+                WHERE f.key IN ({placeholders}) ORDER BY e.id''', keys).fetchall()
+
+    def lookup(self, word: str) -> List[Tuple[str, str, str, str, str]]:
+        """Entries for a word as written, or else for the most likely base form of it."""
+        keys = lookup_keys(word)
+        rows = []
+        for key in keys:
+            rows = self._entries([key])
+            if rows:
+                break
+        if not rows:
+            candidates = {}
+            for key in keys:
+                for candidate, rank in candidate_keys(key).items():
+                    candidates.setdefault(candidate, rank)
+            rows = self._entries(list(candidates)) if candidates else []
+            if rows:
+                # Keep only the entries reached from the most likely stem
+                best = min(candidates[row[0]] for row in rows)
+                rows = [row for row in rows if candidates[row[0]] == best]
+        # An entry can match through several keys (spiel, spiele); list it once
+        unique = {}
+        for row in rows:
+            unique.setdefault(row[1:], row)
+        return list(unique.values())
+
+    def suggest(self, word: str, limit: int = 5) -> List[str]:
+        """Headwords starting with the word, or failing that, headwords within a small edit distance."""
+        keys = lookup_keys(word)
+        key = keys[0]
+        if not key:
+            return []
+        conn = self._connection()
+        for prefix in keys:
+            rows = conn.execute('''SELECT DISTINCT e.headword FROM forms f JOIN entries e ON e.id = f.entry_id
+                                   WHERE f.key >= ? AND f.key < ? ORDER BY f.key LIMIT ?''',
+                                (prefix, prefix + "\uffff", limit)).fetchall()
+            if rows:
+                return [row[0] for row in rows]
+        candidates = conn.execute('''SELECT f.key, e.headword FROM forms f JOIN entries e ON e.id = f.entry_id
+                                     WHERE f.key >= ? AND f.key < ? AND length(f.key) BETWEEN ? AND ? LIMIT ?''',
+                                  (key[0], key[0] + "\uffff", len(key) - FUZZY_MAX_DISTANCE,
+                                   len(key) + FUZZY_MAX_DISTANCE, FUZZY_CANDIDATES)).fetchall()
+        scored = sorted((edit_distance(key, candidate, FUZZY_MAX_DISTANCE), headword)
+                        for candidate, headword in candidates)
+        return list(dict.fromkeys(headword for distance, headword in scored
+                                  if distance <= FUZZY_MAX_DISTANCE))[:limit]
+
+    def define(self, word: str) -> str:
+        word = word.strip(" \t.,;:!?\"'()")
+        rows = self.lookup(word)
+        if not rows:
+            suggestions = self.suggest(word)
+            if suggestions:
+                return f"No definition found for '{word}'. Did you mean: {', '.join(suggestions)}?"
+            return f"No definition found for '{word}'. Try another word!"
+        lines = []
+        for key, headword, pos, gender, senses in rows:
+            label = ", ".join(part for part in (pos, ARTICLES.get(gender)) if part)
+            prefix = f"{word} → " if fold(headword) != fold(word) else ""
+            lines.append(f"{prefix}{headword}{f' ({label})' if label else ''}: {senses}")
+        return "\n".join(lines)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+def ensure_lexicon(source: str = lexicon_source, path: str = lexicon_path,
+                   dictionary: str = lexicon_dictionary) -> None:
+    """(Re)build the lexicon file if it is missing or older than the dictionary or the overrides."""
+    sources = [name for name in (dictionary, source) if name and os.path.exists(name)]
+    if os.path.exists(path) and all(os.path.getmtime(path) >= os.path.getmtime(name) for name in sources):
+        return
+    if not sources:
+        raise FileNotFoundError(f"Lexicon not found at {path} and no source at {dictionary} or {source}")
+    if dictionary not in sources:
+        logger.warning(f"Dictionary {dictionary} not found; building the lexicon from {source} alone")
+    count = build_lexicon(source, path, dictionary if dictionary in sources else None)
+    logger.info(f"Built lexicon {path} with {count} entries from {', '.join(sources)}")
+
+# Global lexicon instance
+lexicon = None
+_lexicon_lock = threading.Lock()
+
+def get_lexicon() -> Lexicon:
+    global lexicon
+    if lexicon is None:
+        with _lexicon_lock:
+            if lexicon is None:
+                ensure_lexicon()
+                lexicon = Lexicon(lexicon_path)
+    return lexicon
+
+if __name__ == "__main__":
+    # python -m app.lexicon [dictionary.tei|.tar.xz] [overrides.tsv] [lexicon.db]
+    dictionary = sys.argv[1] if len(sys.argv) > 1 else lexicon_dictionary
+    source = sys.argv[2] if len(sys.argv) > 2 else lexicon_source
+    path = sys.argv[3] if len(sys.argv) > 3 else lexicon_path
+    if not os.path.exists(dictionary):
+        print(f"Dictionary {dictionary} not found; building from {source} alone")
+        dictionary = None
+    print(f"Built {path} with {build_lexicon(source, path, dictionary)} entries")
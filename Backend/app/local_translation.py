@@ -0,0 +1,87 @@
+import threading
+from typing import Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# NLLB models name languages by FLORES-200 code instead of ISO 639-1
+NLLB_LANGUAGE_CODES = {"de": "deu_Latn", "en": "eng_Latn", "bn": "ben_Beng"}
+
+# Local models translate from German; "auto" is taken to mean German as well
+SOURCE_LANGUAGE = "de"
+
+class LocalTranslator:
+    """
+    On-device translation with Hugging Face seq2seq models (MarianMT or NLLB), one model per
+    target language. Each model is loaded once on first use (optionally int8-quantized for CPU)
+    and translates batches of sentences in a single generate() call. Inference per model is
+    serialized, since torch already spreads one batch over `threads` cores.
+
+    Needs the optional torch, transformers and sentencepiece packages (requirements-local.txt).
+    Models are downloaded on first load unless `models` points at local directories or
+    HF_HUB_OFFLINE is set.
+    """
+
+    name = "local"
+
+    def __init__(self, models: Dict[str, str], threads: int, batch_size: int, max_length: int, quantize: bool):
+        self.models = models
+        self.threads = threads
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.quantize = quantize
+        self._loaded = {}
+        self._locks = {target: threading.Lock() for target in models}
+
+    def supports(self, source: str, target: str) -> bool:
+        return source in ("auto", SOURCE_LANGUAGE) and target in self.models
+
+    def _load(self, target: str) -> Tuple[object, object, bool]:
+        """(model, tokenizer, is_nllb) for a target language; call with that target's lock held."""
+        if target in self._loaded:
+            return self._loaded[target]
+        try:
+            import torch
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError(f"Local translation needs torch and transformers (pip install -r requirements-local.txt): {e}")
+        name = self.models[target]
+        is_nllb = "nllb" in name.lower()
+        torch.set_num_threads(self.threads)
+        tokenizer_kwargs = {"src_lang": NLLB_LANGUAGE_CODES[SOURCE_LANGUAGE]} if is_nllb else {}
+        tokenizer = AutoTokenizer.from_pretrained(name, **tokenizer_kwargs)
+        model = AutoModelForSeq2SeqLM.from_pretrained(name).eval()
+        if self.quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        logger.info(f"Loaded local translation model {name} for '{target}' ({self.threads} threads)")
+        self._loaded[target] = (model, tokenizer, is_nllb)
+        return self._loaded[target]
+
+    def warm_up(self) -> None:
+        for target in self.models:
+            with self._locks[target]:
+                self._load(target)
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        import torch
+        results = []
+        with self._locks[target]:
+            model, tokenizer, is_nllb = self._load(target)
+            generate_kwargs = {"max_new_tokens": self.max_length}
+            if is_nllb:
+                generate_kwargs["forced_bos_token_id"] = tokenizer.convert_tokens_to_ids(NLLB_LANGUAGE_CODES[target])
+            for start in range(0, len(texts), self.batch_size):
+                chunk = texts[start:start + self.batch_size]
+                inputs = tokenizer(chunk, return_tensors="pt", padding=True, truncation=True, max_length=self.max_length)
+                with torch.inference_mode():
+                    output = model.generate(**inputs, **generate_kwargs)
+                results.extend(tokenizer.batch_decode(output, skip_special_tokens=True))
+        return results
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        """Translate line by line (one batch), keeping the text's line structure."""
+        lines = text.split("\n")
+        indexes = [i for i, line in enumerate(lines) if line.strip()]
+        for i, translated in zip(indexes, self.translate_batch([lines[i] for i in indexes], source, target)):
+            lines[i] = translated
+        return "\n".join(lines)
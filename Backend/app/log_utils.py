@@ -0,0 +1,21 @@
+import logging
+import random
+from app.config import log_payload_max_chars, log_payload_sample_rate
+
+def log_payload(logger: logging.Logger, label: str, text: str) -> None:
+    """
+    Log a message payload (prompt, reply, translation) within the configured budget.
+    Payloads are truncated to LOG_PAYLOAD_MAX_CHARS (0 logs only the length) and logged for
+    a LOG_PAYLOAD_SAMPLE_RATE fraction of calls.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    if log_payload_sample_rate < 1 and random.random() >= log_payload_sample_rate:
+        return
+    text = "" if text is None else str(text)
+    if log_payload_max_chars <= 0:
+        logger.info(f"{label}: <{len(text)} chars>")
+    elif len(text) > log_payload_max_chars:
+        logger.info(f"{label}: {text[:log_payload_max_chars]}... <{len(text)} chars>")
+    else:
+        logger.info(f"{label}: {text}")
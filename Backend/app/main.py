@@ -1,24 +1,98 @@
+import math
 import os
+import time
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.config import configure_cors, init_llm
-from app.database import init_db
+from app.config import (
+    configure_cors,
+    audio_cache_dir,
+    audio_cache_url_prefix,
+    server_timing_header,
+    warmup_on_startup,
+)
+from app.database import init_db, close_db
+from app.language_tool_pool import close_language_tool_pool
+from app.concurrency import shutdown_executor
+from app.http_client import close_http_session
+from app.progress import get_progress_store
+from app.jobs import get_job_queue
+from app.archive import get_history_archiver
+from app.warmup import warm_up
+from app.metrics import request_spans, request_seconds, format_server_timing
 from app.routes import router
+from app.admission import RateLimited, Overloaded
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files named by content hash; a URL never changes content, so clients may cache it forever."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
 app = FastAPI()
 
-# Configure CORS and mount static files
+# Configure CORS and mount static files (the audio cache mount must come before /static)
 configure_cors(app)
+os.makedirs("static", exist_ok=True)
+os.makedirs(audio_cache_dir, exist_ok=True)
+app.mount(audio_cache_url_prefix, ImmutableStaticFiles(directory=audio_cache_dir), name="audio")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize LLM and database
-init_llm()
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    """Observe request latency and, if enabled, report the span breakdown in a Server-Timing header."""
+    spans = []
+    token = request_spans.set(spans)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_spans.reset(token)
+    route = request.scope.get("route")
+    request_seconds.observe(
+        time.perf_counter() - started,
+        route=route.path if route is not None else "unmatched",
+        method=request.method,
+    )
+    if server_timing_header and spans:
+        response.headers["Server-Timing"] = format_server_timing(spans)
+    return response
+
+@app.exception_handler(RateLimited)
+@app.exception_handler(Overloaded)
+async def admission_rejected(request: Request, exc: Exception):
+    """Requests turned away by admission control: 429 over the user's rate, 503 at capacity."""
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=429 if isinstance(exc, RateLimited) else 503,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
 @app.on_event("startup")
 async def startup_event():
     init_db()
-    if not os.path.exists("static"):
-        os.makedirs("static")
+    get_progress_store().start()
+    get_job_queue().start()
+    get_history_archiver().start()
+    # Backends load on first use unless warm-up is enabled, which moves the LanguageTool JVM
+    # start and client setup out of each worker's first requests
+    if warmup_on_startup:
+        warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Jobs still queued use the tool backends, so let them finish first
+    get_job_queue().stop()
+    get_history_archiver().stop()
+    close_language_tool_pool()
+    shutdown_executor()
+    close_http_session()
+    get_progress_store().stop()
+    close_db()
 
 # Include API routes
 app.include_router(router)
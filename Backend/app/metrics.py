@@ -0,0 +1,95 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) shared by all latency histograms
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans recorded while handling the current request, as (name, seconds); None outside requests
+request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+
+class Histogram:
+    """A Prometheus-style cumulative histogram with one series per label set."""
+
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Tuple[str, str], ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # bucket counts, then +Inf count, then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in key)
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-1]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+request_seconds = Histogram("germanbuddy_request_seconds", "HTTP request latency by route and method.")
+span_seconds = Histogram("germanbuddy_span_seconds", "Latency of graph nodes, tools and storage calls.")
+
+@contextmanager
+def span(name: str, **labels):
+    """Time a block into the span histogram and the current request's timing breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        span_seconds.observe(elapsed, span=name, **labels)
+        spans = request_spans.get()
+        if spans is not None:
+            detail = "-".join([name, *labels.values()])
+            spans.append((detail, elapsed))
+
+def timed(name: str, **labels):
+    """Decorator form of span() for plain and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def format_server_timing(spans: List[Tuple[str, float]]) -> str:
+    """Render spans as a Server-Timing header value (durations in milliseconds)."""
+    return ", ".join(f"{detail};dur={elapsed * 1000:.1f}" for detail, elapsed in spans)
+
+def render_metrics() -> str:
+    return "\n".join(request_seconds.render() + span_seconds.render()) + "\n"
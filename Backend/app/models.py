@@ -1,5 +1,14 @@
+from typing import List
 from pydantic import BaseModel
 
 class ChatRequest(BaseModel):
     user_id: str
-    message: str
\ No newline at end of file
+    message: str
+
+class BatchTextRequest(BaseModel):
+    texts: List[str]
+
+class BatchTranslateRequest(BaseModel):
+    texts: List[str]
+    target: str = "en"
+    source: str = "auto"
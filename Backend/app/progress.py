@@ -0,0 +1,141 @@
+import threading
+import time
+from app.config import progress_cache_ttl, progress_flush_interval, progress_flush_batch_size
+from app.database import load_progress, add_progress_deltas
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UserProgress:
+    def __init__(self, correct_answers: int = 0, total_questions: int = 0):
+        self.correct_answers = correct_answers
+        self.total_questions = total_questions
+        self.level_thresholds = {"advanced": 0.8, "intermediate": 0.5}
+
+    def update(self, is_correct: bool) -> None:
+        """Update progress based on user performance"""
+        self.total_questions += 1
+        if is_correct:
+            self.correct_answers += 1
+        logger.info(f"Progress updated: {self.correct_answers}/{self.total_questions}")
+
+    def get_level(self) -> str:
+        """Determine user level based on accuracy"""
+        accuracy = self.correct_answers / self.total_questions if self.total_questions > 0 else 0
+        if accuracy > self.level_thresholds["advanced"]:
+            return "advanced"
+        elif accuracy > self.level_thresholds["intermediate"]:
+            return "intermediate"
+        return "beginner"
+
+class ProgressStore:
+    """
+    Per-user progress with a short-lived in-memory cache and write-behind to the database.
+    Updates are queued as (correct, total) deltas and flushed in batches as additive upserts,
+    so several worker processes can update the same user without overwriting each other.
+    """
+
+    def __init__(self, cache_ttl: float, flush_interval: float, flush_batch_size: int):
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._cache = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Bumped when a flush takes the pending deltas and again once they are committed (or
+        # queued again), so it is odd while a flush is in flight
+        self._flush_epoch = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, user_id: str) -> UserProgress:
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+                return cached[0]
+            epoch = self._flush_epoch
+        while True:
+            if epoch % 2:
+                # Deltas a flush has taken but not yet committed are in neither the database nor
+                # _pending; wait for it rather than cache a total that misses them
+                with self._flush_lock:
+                    pass
+                with self._lock:
+                    epoch = self._flush_epoch
+                continue
+            correct_answers, total_questions = load_progress(user_id)
+            with self._lock:
+                # A flush that ran during the read may have moved deltas into the database after
+                # (or before) we read it; read again rather than count them twice or not at all
+                if self._flush_epoch != epoch:
+                    epoch = self._flush_epoch
+                    continue
+                # Include our own updates that haven't reached the database yet
+                pending = self._pending.get(user_id, (0, 0))
+                progress = UserProgress(correct_answers + pending[0], total_questions + pending[1])
+                self._cache[user_id] = (progress, time.monotonic())
+            return progress
+
+    def get_level(self, user_id: str) -> str:
+        return self.get(user_id).get_level()
+
+    def update(self, user_id: str, is_correct: bool) -> None:
+        progress = self.get(user_id)
+        with self._lock:
+            progress.update(is_correct)
+            correct, total = self._pending.get(user_id, (0, 0))
+            self._pending[user_id] = (correct + int(is_correct), total + 1)
+            full_batch = len(self._pending) >= self.flush_batch_size
+        if full_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all queued deltas to the database in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if not pending:
+                    return
+                self._flush_epoch += 1
+            try:
+                add_progress_deltas([(user_id, correct, total) for user_id, (correct, total) in pending.items()])
+                logger.info(f"Flushed progress for {len(pending)} user(s)")
+            except Exception as e:
+                logger.error(f"Failed to flush progress: {str(e)}")
+                with self._lock:
+                    for user_id, (correct, total) in pending.items():
+                        queued = self._pending.get(user_id, (0, 0))
+                        self._pending[user_id] = (queued[0] + correct, queued[1] + total)
+            finally:
+                with self._lock:
+                    self._flush_epoch += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+# Global store instance
+store = None
+_store_lock = threading.Lock()
+
+def get_progress_store() -> ProgressStore:
+    global store
+    if store is None:
+        with _store_lock:
+            if store is None:
+                store = ProgressStore(progress_cache_ttl, progress_flush_interval, progress_flush_batch_size)
+    return store
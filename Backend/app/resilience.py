@@ -0,0 +1,196 @@
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple, Type
+from app.config import retry_backoff_base, retry_backoff_max, breaker_failure_threshold, breaker_reset_timeout
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable, retrying in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the caller's time budget (see deadline_after) runs out before or during a call."""
+
+# Monotonic time by which the current operation has to finish, if it has a budget. run_blocking
+# copies it into the worker thread, so the calls made there can stop when their caller gives up
+call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+@contextmanager
+def deadline_after(seconds: float):
+    """Give the calls made inside the block (and blocking work started from it) `seconds` in total."""
+    token = call_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        call_deadline.reset(token)
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline (negative once it has passed), or None without one."""
+    deadline = call_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def bounded_timeout(timeout):
+    """A requests timeout (seconds or a (connect, read) pair) cut down to the time left, if any."""
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("Deadline passed before the call was made")
+    if isinstance(timeout, tuple):
+        return tuple(min(part, left) for part in timeout)
+    return min(timeout, left)
+
+class CircuitBreaker:
+    """
+    Fails fast after `failure_threshold` consecutive failures of a dependency. The circuit then
+    stays open for `reset_timeout` seconds, after which one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may go ahead now."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "open" or (self.state == "half_open" and self._trial_running):
+                self.stats["rejected"] += 1
+                retry_after = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+                raise CircuitOpen(self.name, retry_after)
+            if self.state == "half_open":
+                self._trial_running = True
+            self.stats["calls"] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.stats["failures"] += 1
+            self._trial_running = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failure(s)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    @contextmanager
+    def guard(self):
+        """Wrap one call (sync or awaited inside the block) to the dependency."""
+        self.before_call()
+        try:
+            yield
+        except DeadlineExceeded:
+            # The caller ran out of time, which says nothing about the dependency
+            with self._lock:
+                self._trial_running = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled, not failed: let the next call be the trial instead
+            with self._lock:
+                self._trial_running = False
+            raise
+        self.record_success()
+
+    def call(self, func, *args, **kwargs):
+        with self.guard():
+            return func(*args, **kwargs)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["state"] = self.state
+            stats["consecutive_failures"] = self.failures
+            if self.state == "open":
+                stats["retry_after"] = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 1)
+        return stats
+
+def backoff_delay(attempt: int, base: float = retry_backoff_base, cap: float = retry_backoff_max) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt, capped."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def retry_call(func, *args, retries: int, retry_on: Tuple[Type[BaseException], ...] = (OSError,),
+               retry_if: Optional[Callable[[BaseException], bool]] = None, **kwargs):
+    """
+    Call func, retrying up to `retries` more times on the given (transient) errors with jittered
+    backoff; `retry_if` can narrow those down further. CircuitOpen is never retried, so a breaker
+    that opens mid-way ends the retries, and under a deadline no retry is started that couldn't
+    finish in the time left.
+    """
+    for attempt in range(retries + 1):
+        left = time_left()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded(f"Deadline passed after {attempt} attempt(s)")
+        try:
+            return func(*args, **kwargs)
+        except (CircuitOpen, DeadlineExceeded):
+            raise
+        except retry_on as e:
+            if attempt == retries or (retry_if is not None and not retry_if(e)):
+                raise
+            delay = backoff_delay(attempt)
+            left = time_left()
+            if left is not None and delay >= left:
+                raise
+            logger.warning(f"Retry {attempt + 1}/{retries} in {delay:.2f}s after: {str(e)}")
+            time.sleep(delay)
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a network error is worth retrying: connection errors and timeouts are, HTTP error
+    responses only for 429 and 5xx. A 4xx (requests.HTTPError is an OSError too) fails again,
+    and so does anything that isn't a network error. Client libraries that wrap these in their
+    own exception (gTTS keeps the response as .rsp, the requests error as the context) are
+    judged by what they wrap.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        response = getattr(error, "rsp", None)
+    if response is None:
+        return isinstance(error, OSError) or isinstance(error.__context__, OSError)
+    return response.status_code == 429 or response.status_code >= 500
+
+# Circuit breakers by dependency name, created on first use
+breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = breakers.get(name)
+            if breaker is None:
+                breaker = breakers[name] = CircuitBreaker(name, breaker_failure_threshold, breaker_reset_timeout)
+    return breaker
+
+def get_breaker_stats() -> Dict[str, dict]:
+    return {name: breaker.get_stats() for name, breaker in sorted(breakers.items())}
@@ -0,0 +1,104 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Optional, Set, Tuple
+from app.config import response_cache_size, response_cache_ttl, response_cache_similarity
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_input(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a learner message."""
+    text = unicodedata.normalize("NFC", text).lower()
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class ResponseCache:
+    """
+    LRU cache with TTL for fully composed conversation replies (German, translations and
+    grammar explanation), keyed by (level, normalized input). When a similarity threshold is
+    set, a miss falls back to the closest cached input of the same level by character-trigram
+    Jaccard similarity, found through an inverted trigram index.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, similarity: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()
+        self._index = {}
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        _, _, grams = self._entries.pop(key)
+        for gram in grams:
+            keys = self._index.get((key[0], gram))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[(key[0], gram)]
+
+    def _closest(self, level: str, grams: Set[str]) -> Optional[Tuple[str, str]]:
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._index.get((level, gram), ()))
+        best_key, best_score = None, self.similarity
+        for key, count in shared.items():
+            score = count / (len(grams) + len(self._entries[key][2]) - count)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(self, level: str, text: str) -> Optional[str]:
+        normalized = normalize_input(text)
+        key = (level, normalized)
+        now = time.time()
+        with self._lock:
+            hit = "exact_hits"
+            if key not in self._entries and self.similarity > 0:
+                key = self._closest(level, trigrams(normalized)) or key
+                hit = "similar_hits"
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[1] <= now:
+                self._remove(key)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats[hit] += 1
+            return entry[0]
+
+    def put(self, level: str, text: str, response: str) -> None:
+        normalized = normalize_input(text)
+        key = (level, normalized)
+        grams = trigrams(normalized) if self.similarity > 0 else set()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (response, time.time() + self.ttl, grams)
+            for gram in grams:
+                self._index.setdefault((level, gram), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["exact_hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        return stats
+
+# Global cache instance
+cache = ResponseCache(response_cache_size, response_cache_ttl, response_cache_similarity)
+
+def get_response_cache() -> ResponseCache:
+    return cache
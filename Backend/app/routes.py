@@ -1,39 +1,212 @@
-from fastapi import APIRouter, HTTPException
-from app.models import ChatRequest
-from app.database import save_message, get_chat_history, clear_chat_history
-from app.agents import app_graph
+import asyncio
+import json
+import time
+from typing import Iterator, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from app.models import ChatRequest, BatchTextRequest, BatchTranslateRequest
+from app.database import save_message, iter_chat_history, has_messages_beyond, clear_chat_history
+from app.agents import get_graph, stream_agent_events
+from app.concurrency import run_blocking
+from app.language_tool_pool import get_language_tool_pool_stats, LanguageToolPoolTimeout
+from app.translation import get_translation_cache, translate_batch
+from app.tools import check_grammar_batch
+from app.config import batch_max_items
+from app.metrics import render_metrics
+from app.audio_cache import get_audio_cache
+from app.response_cache import get_response_cache
+from app.warmup import startup_report
+from app.admission import get_admission_controller
+from app.jobs import FINISHED_STATUSES, get_job_queue
+from app.resilience import get_breaker_stats
+from app.archive import get_history_archiver
+from app.intent_classifier import get_intent_router
 
 router = APIRouter()
 
+# How often a long-polling /jobs request rechecks a job it is waiting on
+JOB_POLL_INTERVAL = 0.25
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    Holds the request's admission slot until the stream has been sent, not just until it
+    starts. The slot is released here rather than in the body generator: when the client
+    disconnects before the first chunk, Starlette cancels the stream without ever running the
+    generator, so its finally block would never release the slot.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            get_admission_controller().release()
+
+def deliver_job_result(user_id: str, job_id: Optional[str]) -> None:
+    """Append a background job's outcome to the chat history once it finishes."""
+    if job_id is None:
+        return
+
+    def on_done(job):
+        save_message(user_id, f"Teacher: {job.result if job.status == 'done' else f'Error: {job.error}'}")
+
+    get_job_queue().add_done_callback(job_id, on_done)
+
 @router.post("/chat")
 async def process_chat(request: ChatRequest):
     user_id = request.user_id
     message = request.message
-    
-    save_message(user_id, f"You: {message}")
-    
-    state = {"messages": [{"role": "human", "content": message}], "next": ""}
-    final_state = None
-    for output in app_graph.stream(state):
-        final_state = output
-    
-    if not final_state:
-        raise HTTPException(status_code=500, detail="Failed to process message")
-    
-    for key, value in final_state.items():
-        if "messages" in value and value["messages"]:
-            response = value["messages"][-1]["content"]
-            save_message(user_id, f"Teacher: {response}")
-            return {"response": response, "timestamp": get_chat_history(user_id)[-1]["timestamp"]}
-    
-    raise HTTPException(status_code=500, detail="No response generated")
+
+    async with get_admission_controller().admit(user_id):
+        await run_blocking(save_message, user_id, f"You: {message}")
+
+        state = {"messages": [{"role": "human", "content": message}], "next": "", "user_id": user_id, "job_id": None}
+        final_state = None
+        async for output in get_graph().astream(state):
+            final_state = output
+
+        if not final_state:
+            raise HTTPException(status_code=500, detail="Failed to process message")
+
+        for key, value in final_state.items():
+            if "messages" in value and value["messages"]:
+                response = value["messages"][-1]["content"]
+                timestamp = await run_blocking(save_message, user_id, f"Teacher: {response}")
+                job_id = value.get("job_id")
+                await run_blocking(deliver_job_result, user_id, job_id)
+                return {"response": response, "timestamp": timestamp, "job_id": job_id}
+
+        raise HTTPException(status_code=500, detail="No response generated")
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def stream_chat(request: ChatRequest):
+    """Server-sent events version of /chat: tokens first, then translations and grammar as they finish."""
+    user_id = request.user_id
+    message = request.message
+
+    await get_admission_controller().acquire(user_id)
+    try:
+        await run_blocking(save_message, user_id, f"You: {message}")
+    except BaseException:
+        get_admission_controller().release()
+        raise
+    state = {"messages": [{"role": "human", "content": message}], "next": "", "user_id": user_id, "job_id": None}
+
+    async def events():
+        async for event, data in stream_agent_events(state):
+            if event != "response":
+                yield format_sse(event, data)
+                continue
+            response = data["content"]
+            timestamp = await run_blocking(save_message, user_id, f"Teacher: {response}")
+            await run_blocking(deliver_job_result, user_id, data.get("job_id"))
+            yield format_sse("done", {"response": response, "timestamp": timestamp, "job_id": data.get("job_id")})
+
+    return AdmittedStreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """
+    Status of a background job; the result is included once it is done. With `wait`, the
+    request is held for up to that many seconds until the job finishes (long polling).
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        job = await run_blocking(get_job_queue().get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired job")
+        if job.status in FINISHED_STATUSES or time.monotonic() >= deadline:
+            return job.to_dict()
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+def encode_history_page(user_id: str, rows: Iterator[dict], older: bool) -> Iterator[str]:
+    """Encode a page of history as JSON one row at a time, followed by the paging cursors."""
+    yield '{"history": ['
+    first_id = last_id = None
+    for row in rows:
+        yield ("" if first_id is None else ",") + json.dumps(row, ensure_ascii=False)
+        if first_id is None:
+            first_id = row["id"]
+        last_id = row["id"]
+    boundary = first_id if older else last_id
+    has_more = boundary is not None and has_messages_beyond(user_id, boundary, older)
+    yield (f'], "has_more": {json.dumps(has_more)}, '
+           f'"next_before": {json.dumps(first_id)}, "next_after": {json.dumps(last_id)}}}')
 
 @router.get("/history/{user_id}")
-async def get_history(user_id: str):
-    history = get_chat_history(user_id)
-    return {"history": history}
+async def get_history(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+):
+    """
+    One page of history, oldest first. With no cursor this is the newest page; `before`
+    pages back from a message id, `after` returns only newer messages.
+    """
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use only one of before and after")
+    rows = iter_chat_history(user_id, limit, before=before, after=after)
+    return StreamingResponse(encode_history_page(user_id, rows, after is None), media_type="application/json")
 
 @router.delete("/history/{user_id}")
 async def clear_history(user_id: str):
-    clear_chat_history(user_id)
-    return {"message": "Chat history cleared"}
\ No newline at end of file
+    await run_blocking(clear_chat_history, user_id)
+    return {"message": "Chat history cleared"}
+
+def check_batch_size(texts):
+    if not texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    if len(texts) > batch_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {batch_max_items} texts per batch")
+
+@router.post("/batch/grammar")
+async def batch_grammar(request: BatchTextRequest):
+    """Grammar-check a list of texts; results come back in the same order, with per-item errors."""
+    check_batch_size(request.texts)
+    try:
+        async with get_admission_controller().admit():
+            results = await run_blocking(check_grammar_batch, request.texts)
+    except LanguageToolPoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"results": results}
+
+@router.post("/batch/translate")
+async def batch_translate(request: BatchTranslateRequest):
+    """Translate a list of texts; results come back in the same order, with per-item errors."""
+    check_batch_size(request.texts)
+    async with get_admission_controller().admit():
+        translated = await run_blocking(translate_batch, request.texts, request.target, request.source)
+    results = []
+    for text, (translation, error) in zip(request.texts, translated):
+        item = {"text": text, "translation": translation}
+        if error is not None:
+            item["error"] = error
+        results.append(item)
+    return {"results": results}
+
+@router.get("/stats")
+async def get_stats():
+    return {
+        "language_tool_pool": get_language_tool_pool_stats(),
+        "translation_cache": get_translation_cache().get_stats(),
+        "audio_cache": get_audio_cache().get_stats(),
+        "response_cache": get_response_cache().get_stats(),
+        "admission": get_admission_controller().get_stats(),
+        "jobs": get_job_queue().get_stats(),
+        "breakers": get_breaker_stats(),
+        "intent_router": get_intent_router().get_stats(),
+        "history_archive": get_history_archiver().get_stats(),
+        "startup": startup_report,
+    }
+
+@router.get("/metrics")
+async def get_metrics():
+    """Latency histograms in the Prometheus text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,167 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List
+try:
+    import zstandard
+except ImportError:  # segments are written with gzip instead
+    zstandard = None
+from app.config import archive_dir, archive_compression, archive_segment_cache_size
+from app.metrics import span
+import logging
+
+logger = logging.getLogger(__name__)
+
+# File extension per codec; a segment is always read with the codec its name says it was written with
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+def default_codec() -> str:
+    if archive_compression == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, archiving chat history with gzip")
+        return "gzip"
+    return archive_compression if archive_compression in EXTENSIONS else "gzip"
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive segment is zstd-compressed; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+def codec_of(path: str) -> str:
+    return next((codec for codec, extension in EXTENSIONS.items() if path.endswith(extension)), "gzip")
+
+def segment_path(user_id: str, first_id: int, last_id: int, codec: str) -> str:
+    """
+    Path of a segment relative to the archive directory. Users get a directory named by the
+    hash of their id (safe for any id, and spread over 256 parent directories); the file name
+    is the id range it holds, so a merged segment never overwrites one it replaces.
+    """
+    user_hash = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(user_hash[:2], user_hash, f"{first_id:020d}-{last_id:020d}{EXTENSIONS[codec]}")
+
+def encode_row(row: dict) -> str:
+    return json.dumps({"id": row["id"], "timestamp": row["timestamp"], "message": row["message"]}, ensure_ascii=False)
+
+# Every line starts with the message id ('{"id": 123, ...'), see encode_row
+ID_OFFSET = len('{"id": ')
+
+class Segment:
+    """
+    A decompressed segment. Only the message ids are read up front; parsing JSON costs far more
+    than decompressing it, so rows are parsed when a page asks for them.
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.ids = [int(line[ID_OFFSET:line.index(",", ID_OFFSET)]) for line in lines]
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def rows(self, start: int = 0, stop: int = None) -> List[dict]:
+        return [json.loads(line) for line in self.lines[start:stop]]
+
+    def index_of_id(self, message_id: int) -> int:
+        """Position of the first message with an id of at least message_id."""
+        return bisect_left(self.ids, message_id)
+
+class SegmentStore:
+    """
+    Compressed JSONL files of archived chat messages, one message ({"id", "timestamp",
+    "message"}) per line in id order. Segments are immutable once written, so decoded ones
+    are kept in a small LRU cache: paging back through an archive decompresses each segment once.
+    """
+
+    def __init__(self, directory: str, cache_size: int):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"written": 0, "read": 0, "cache_hits": 0}
+
+    def write(self, relative_path: str, rows: List[dict]) -> int:
+        """Write a segment atomically; returns its compressed size in bytes."""
+        path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = "".join(encode_row(row) + "\n" for row in rows).encode("utf-8")
+        with span("archive", op="write_segment"):
+            data = compress(data, codec_of(path))
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        self.stats["written"] += 1
+        return len(data)
+
+    def read(self, relative_path: str) -> Segment:
+        with self._lock:
+            segment = self._cache.get(relative_path)
+            if segment is not None:
+                self._cache.move_to_end(relative_path)
+                self.stats["cache_hits"] += 1
+                return segment
+        path = os.path.join(self.directory, relative_path)
+        with span("archive", op="read_segment"):
+            with open(path, "rb") as f:
+                data = decompress(f.read(), codec_of(path))
+            segment = Segment(data.decode("utf-8").splitlines())
+        with self._lock:
+            self.stats["read"] += 1
+            self._cache[relative_path] = segment
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return segment
+
+    def remove(self, relative_path: str) -> None:
+        with self._lock:
+            self._cache.pop(relative_path, None)
+        try:
+            os.remove(os.path.join(self.directory, relative_path))
+        except FileNotFoundError:
+            pass
+
+    def retire(self, relative_path: str) -> None:
+        """
+        Leave a segment that is no longer indexed for the archiver's orphan sweep instead of
+        deleting it: a read that looked the index up just before may still open it. The file's
+        mtime is reset so the sweep's grace period starts now.
+        """
+        try:
+            os.utime(os.path.join(self.directory, relative_path))
+        except FileNotFoundError:
+            pass
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached"] = len(self._cache)
+        return stats
+
+# Global segment store instance
+segment_store = None
+_store_lock = threading.Lock()
+
+def get_segment_store() -> SegmentStore:
+    global segment_store
+    if segment_store is None:
+        with _store_lock:
+            if segment_store is None:
+                segment_store = SegmentStore(archive_dir, archive_segment_cache_size)
+    return segment_store
@@ -0,0 +1,25 @@
+import os
+import uvicorn
+from app.config import server_host, server_port, server_workers
+
+def main():
+    """
+    Production entry point: runs WEB_CONCURRENCY uvicorn worker processes without reload.
+    With more than one worker, each pre-warms its own LLM client, graph and LanguageTool pool
+    at startup unless WARMUP_ON_STARTUP is set to false; a single worker runs in this process
+    and follows WARMUP_ON_STARTUP as configured (off by default). Shared state (chat history,
+    progress, translation cache, audio files) lives in DATA_DIR and the audio directory, so
+    every worker sees the same data.
+    """
+    if server_workers > 1:
+        os.environ.setdefault("WARMUP_ON_STARTUP", "true")
+    uvicorn.run(
+        "app.main:app",
+        host=server_host,
+        port=server_port,
+        workers=server_workers,
+        proxy_headers=True,
+    )
+
+if __name__ == "__main__":
+    main()
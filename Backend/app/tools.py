@@ -1,8 +1,14 @@
+import logging
+from typing import List
 from langchain_core.tools import tool
-from gtts import gTTS
-from language_tool_python import LanguageTool
-from deep_translator import GoogleTranslator
-import os
+from app.translation import translate, translate_batch
+from app.audio_cache import get_audio_cache
+from app.language_tool_pool import get_language_tool_pool
+from app.lexicon import get_lexicon
+from app.metrics import span
+from app.log_utils import log_payload
+
+logger = logging.getLogger(__name__)
 
 @tool
 def check_grammar(text: str) -> str:
@@ -10,8 +16,8 @@ def check_grammar(text: str) -> str:
     try:
         if not text.strip():
             return "Please provide text to check grammar."
-        tool = LanguageTool('de-DE')
-        matches = tool.check(text)
+        with span("languagetool"), get_language_tool_pool().checkout() as language_tool:
+            matches = language_tool.check(text)
         if not matches:
             return "No grammar errors found!"
         corrections = [f"Error: {match.ruleId} - {match.message}" for match in matches]
@@ -19,28 +25,61 @@ def check_grammar(text: str) -> str:
     except Exception as e:
         return f"Error checking grammar: {str(e)}"
 
+def check_grammar_batch(texts: List[str]) -> List[dict]:
+    """
+    Check many texts with a single LanguageTool checkout, returning one result per text in order.
+    A failure on one text is reported on that item and does not stop the rest of the batch.
+    """
+    results = []
+    with get_language_tool_pool().checkout() as language_tool:
+        for text in texts:
+            if not text.strip():
+                results.append({"text": text, "error": "Empty text"})
+                continue
+            try:
+                with span("languagetool", mode="batch"):
+                    matches = language_tool.check(text)
+            except Exception as e:
+                results.append({"text": text, "error": f"Error checking grammar: {str(e)}"})
+                continue
+            results.append({
+                "text": text,
+                "correct": not matches,
+                "corrections": [
+                    {
+                        "rule_id": match.ruleId,
+                        "message": match.message,
+                        "offset": match.offset,
+                        "length": match.errorLength,
+                        "replacements": match.replacements[:5],
+                    }
+                    for match in matches
+                ],
+            })
+    return results
+
 @tool
 def define_word(word: str) -> str:
-    """Defines a German word using a mock dictionary."""
+    """Defines a German word in English using the German-English lexicon."""
     try:
         if not word.strip():
             return "Please provide a word to define."
-        mock_definitions = {"Haus": "house", "Auto": "car", "lernen": "to learn"}
-        return mock_definitions.get(word.lower(), f"No definition found for '{word}'. Try another word!")
+        with span("lexicon"):
+            return get_lexicon().define(word)
     except Exception as e:
         return f"Error defining word: {str(e)}"
 
+def synthesize_pronunciation(text: str) -> str:
+    """The URL of the German audio for a text; raises if speech synthesis fails."""
+    return get_audio_cache().get_or_synthesize(text, lang='de')
+
 @tool
 def pronounce_text(text: str) -> str:
     """Generates pronunciation audio for the given text in German and returns the file URL."""
     try:
         if not text.strip():
             return "Please provide text to pronounce."
-        os.makedirs("static", exist_ok=True)
-        audio_file = "static/pronunciation.mp3"
-        tts = gTTS(text=text, lang='de')
-        tts.save(audio_file)
-        return "/static/pronunciation.mp3"
+        return synthesize_pronunciation(text)
     except Exception as e:
         return f"Error generating pronunciation: {str(e)}"
 
@@ -50,9 +89,8 @@ def language_translator_en(text: str) -> str:
     try:
         if not text.strip():
             return "Please provide text to translate to English."
-        translator = GoogleTranslator(source='auto', target='en')
-        result = translator.translate(text)
-        print(f"Translated (to English): {result}")
+        result = translate(text, 'en')
+        log_payload(logger, "Translated (to English)", result)
         return result
     except Exception as e:
         return f"Error translating to English: {str(e)}"
@@ -63,41 +101,44 @@ def language_translator_bn(text: str) -> str:
     try:
         if not text.strip():
             return "Please provide text to translate to Bengali."
-        translator = GoogleTranslator(source='auto', target='bn')
-        result = translator.translate(text)
-        print(f"Translated (to Bengali): {result}")
+        result = translate(text, 'bn')
+        log_payload(logger, "Translated (to Bengali)", result)
         return result
     except Exception as e:
         return f"Error translating to Bengali: {str(e)}"
 
+def build_grammar_explanation(text: str) -> str:
+    """The German and English grammar explanation of a text; raises if LanguageTool fails."""
+    with span("languagetool"), get_language_tool_pool().checkout() as language_tool:
+        matches = language_tool.check(text)
+    # Basic grammar analysis (expand as needed)
+    explanation_de = "Grammatikalische Erklärung:\n"
+    explanation_en = "Grammar Explanation:\n"
+    
+    if not matches:
+        explanation_de += "Der Satz ist grammatikalisch korrekt.\n"
+        explanation_en += "The sentence is grammatically correct.\n"
+    else:
+        # One grouped translation for all matches; a message that fails stays in German
+        translations = translate_batch([match.message for match in matches], 'en')
+        for match, (translation, error) in zip(matches, translations):
+            explanation_de += f"- {match.ruleId}: {match.message} (z.B. {match.context})\n"
+            explanation_en += f"- {match.ruleId}: {translation or match.message} (e.g., {match.context})\n"
+
+    # Add simple structure explanation (example)
+    words = text.split()
+    if len(words) >= 3 and "bin" in words:
+        explanation_de += "Struktur: Subjekt + Verb + Adjektiv (z.B. 'Ich bin gut').\n"
+        explanation_en += "Structure: Subject + Verb + Adjective (e.g., 'I am good').\n"
+
+    return f"{explanation_de}\n{explanation_en}"
+
 @tool
 def explain_grammar(text: str) -> str:
     """Explains the grammar of the given German text in German and English."""
     try:
         if not text.strip():
             return "Please provide text to explain grammar."
-
-        tool = LanguageTool('de-DE')
-        matches = tool.check(text)
-        print("explain_grammar")
-        # Basic grammar analysis (expand as needed)
-        explanation_de = "Grammatikalische Erklärung:\n"
-        explanation_en = "Grammar Explanation:\n"
-        
-        if not matches:
-            explanation_de += "Der Satz ist grammatikalisch korrekt.\n"
-            explanation_en += "The sentence is grammatically correct.\n"
-        else:
-            for match in matches:
-                explanation_de += f"- {match.ruleId}: {match.message} (z.B. {match.context})\n"
-                explanation_en += f"- {match.ruleId}: {GoogleTranslator(source='auto', target='en').translate(match.message)} (e.g., {match.context})\n"
-
-        # Add simple structure explanation (example)
-        words = text.split()
-        if len(words) >= 3 and "bin" in words:
-            explanation_de += "Struktur: Subjekt + Verb + Adjektiv (z.B. 'Ich bin gut').\n"
-            explanation_en += "Structure: Subject + Verb + Adjective (e.g., 'I am good').\n"
-
-        return f"{explanation_de}\n{explanation_en}"
+        return build_grammar_explanation(text)
     except Exception as e:
         return f"Error explaining grammar: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,368 @@
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.metrics import span
+from app.http_client import HTTP_TIMEOUT, get_http_session
+from app.resilience import DeadlineExceeded, bounded_timeout, get_breaker, is_transient, retry_call
+from app.local_translation import LocalTranslator
+from app.config import (
+    google_translate_url,
+    tool_max_retries,
+    translation_batch_max_chars,
+    translator_backend,
+    translator_backend_by_language,
+    local_translation_models,
+    local_translation_threads,
+    local_translation_batch_size,
+    local_translation_max_length,
+    local_translation_quantize,
+    translation_cache_path,
+    translation_cache_memory_size,
+    translation_cache_disk_size,
+    translation_cache_ttl,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Runs of spaces and tabs, collapsed in cache keys. Line breaks are kept: they survive
+# translation, so text that differs only in them translates differently
+HORIZONTAL_SPACE = re.compile(r"[ \t]+")
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: Unicode NFC, collapsed spaces and tabs, line breaks kept. Case is kept."""
+    lines = unicodedata.normalize("NFC", text).replace("\r\n", "\n").strip().split("\n")
+    return "\n".join(HORIZONTAL_SPACE.sub(" ", line).strip(" ") for line in lines)
+
+def stub_translate(text: str, source: str, target: str) -> str:
+    """Offline stand-in for tests and benchmarks: tags each line with the target language."""
+    return "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+
+class CallableTranslator:
+    """
+    Adapts a translate(text, source, target) function to the translator backend interface
+    (name, supports, translate, translate_batch, warm_up). Batches are sent as one call with
+    the texts joined by newlines.
+    """
+
+    def __init__(self, name: str, func):
+        self.name = name
+        self.func = func
+
+    def supports(self, source: str, target: str) -> bool:
+        return True
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return self.func(text, source, target)
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        lines = self.func("\n".join(texts), source, target).split("\n")
+        if len(lines) != len(texts):
+            raise ValueError("Grouped translation changed the line count")
+        return [line.strip() for line in lines]
+
+    def warm_up(self) -> None:
+        pass
+
+class GoogleTranslateClient:
+    """
+    Translates one source-target pair through Google Translate's no-JavaScript page, which
+    returns the translation in the HTML. Clients are long-lived and send their requests on the
+    shared keep-alive HTTP session.
+    """
+
+    def __init__(self, source: str, target: str, session, url: str = google_translate_url, timeout=HTTP_TIMEOUT):
+        self.source = source
+        self.target = target
+        self.session = session
+        self.url = url
+        self.timeout = timeout
+
+    def translate(self, text: str) -> str:
+        import requests
+        from bs4 import BeautifulSoup
+        timeout = bounded_timeout(self.timeout)
+        try:
+            response = self.session.get(
+                self.url,
+                params={"sl": self.source, "tl": self.target, "q": text},
+                timeout=timeout,
+            )
+        except requests.Timeout as e:
+            if timeout != self.timeout:
+                # Cut short by the caller's deadline, not a slow translator
+                raise DeadlineExceeded(str(e)) from e
+            raise
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if element is None:
+            raise ValueError(f"No translation found in the response for '{text[:50]}'")
+        return element.get_text(strip=True)
+
+class GoogleTranslatorBackend(CallableTranslator):
+    """The Google backend: one client per (source, target) pair, created on first use and kept."""
+
+    def __init__(self):
+        super().__init__("google", self._translate)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, source: str, target: str) -> GoogleTranslateClient:
+        client = self._clients.get((source, target))
+        if client is None:
+            with self._lock:
+                client = self._clients.get((source, target))
+                if client is None:
+                    client = self._clients[(source, target)] = GoogleTranslateClient(source, target, get_http_session())
+        return client
+
+    def _translate(self, text: str, source: str, target: str) -> str:
+        return self.client(source, target).translate(text)
+
+    def warm_up(self) -> None:
+        import bs4  # noqa: F401
+        get_http_session()
+
+def parse_language_map(value: str) -> Dict[str, str]:
+    """Parse "en=local,bn=google" into {"en": "local", "bn": "google"}."""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {language.strip(): setting.strip() for language, setting in pairs}
+
+def create_local_translator() -> LocalTranslator:
+    return LocalTranslator(
+        parse_language_map(local_translation_models),
+        threads=local_translation_threads,
+        batch_size=local_translation_batch_size,
+        max_length=local_translation_max_length,
+        quantize=local_translation_quantize,
+    )
+
+# Translator backends by name, each created on first use
+TRANSLATOR_BACKENDS = {
+    "google": GoogleTranslatorBackend,
+    "local": create_local_translator,
+    "stub": lambda: CallableTranslator("stub", stub_translate),
+}
+
+# Backend name per target language; others use TRANSLATOR_BACKEND
+backend_by_language = parse_language_map(translator_backend_by_language)
+
+backends = {}
+_backends_lock = threading.Lock()
+
+def get_translator_backend(name: str):
+    backend = backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = backends.get(name)
+            if backend is None:
+                backend = backends[name] = TRANSLATOR_BACKENDS[name]()
+    return backend
+
+def select_backend(source: str, target: str):
+    """The backend configured for the target language, or the default one if it can't translate the pair."""
+    backend = get_translator_backend(backend_by_language.get(target, translator_backend))
+    if not backend.supports(source, target):
+        backend = get_translator_backend(translator_backend)
+    return backend
+
+def call_backend(backend, method: str, *args):
+    """Call a backend method behind the backend's circuit breaker, retrying transient network errors with backoff."""
+    breaker = get_breaker(f"translator:{backend.name}")
+    return retry_call(breaker.call, getattr(backend, method), *args, retries=tool_max_retries, retry_if=is_transient)
+
+def warm_up_translators() -> None:
+    """Create every configured backend and load what it needs (e.g. local models)."""
+    for name in dict.fromkeys([translator_backend, *backend_by_language.values()]):
+        get_translator_backend(name).warm_up()
+
+class TranslationCache:
+    """In-process LRU in front of a SQLite table, keyed by (source, target, normalized text)."""
+
+    def __init__(self, path: str, memory_size: int = 1024, disk_size: int = 100000, ttl: float = 30 * 86400):
+        self.path = path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        # Shared by every worker process, so use WAL and wait on locks instead of failing
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS translation_cache
+                              (source TEXT, target TEXT, text TEXT, translation TEXT,
+                               created_at REAL, last_used REAL,
+                               PRIMARY KEY (source, target, text))''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used ON translation_cache (last_used)")
+        self._conn.commit()
+
+    def _remember(self, key: Tuple[str, str, str], translation: str, expires_at: float) -> None:
+        self._memory[key] = (translation, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, source: str, target: str, text: str) -> Optional[str]:
+        key = (source, target, normalize_text(text))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT translation, created_at FROM translation_cache WHERE source = ? AND target = ? AND text = ?",
+                key,
+            ).fetchone()
+            if row is None or row[1] + self.ttl <= now:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE translation_cache SET last_used = ? WHERE source = ? AND target = ? AND text = ?",
+                (now, *key),
+            )
+            self._conn.commit()
+            self._remember(key, row[0], row[1] + self.ttl)
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, source: str, target: str, text: str, translation: str) -> None:
+        key = (source, target, normalize_text(text))
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now + self.ttl)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translation_cache (source, target, text, translation, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, translation, now, now),
+            )
+            self._conn.commit()
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired rows, then the least recently used rows above the disk size limit."""
+        self._writes_since_prune = 0
+        expired = self._conn.execute("DELETE FROM translation_cache WHERE created_at <= ?", (now - self.ttl,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM translation_cache WHERE rowid IN "
+            "(SELECT rowid FROM translation_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.disk_size,),
+        ).rowcount
+        self._conn.commit()
+        self.stats["evictions"] += expired + overflow
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# Global cache instance
+cache = None
+_cache_lock = threading.Lock()
+
+def get_translation_cache() -> TranslationCache:
+    global cache
+    if cache is None:
+        with _cache_lock:
+            if cache is None:
+                cache = TranslationCache(
+                    translation_cache_path,
+                    memory_size=translation_cache_memory_size,
+                    disk_size=translation_cache_disk_size,
+                    ttl=translation_cache_ttl,
+                )
+    return cache
+
+def translate(text: str, target: str, source: str = "auto") -> str:
+    """Translate text, serving repeats from the cache and only calling the backend on a miss."""
+    translation_cache = get_translation_cache()
+    cached = translation_cache.get(source, target, text)
+    if cached is not None:
+        return cached
+    backend = select_backend(source, target)
+    with span("translator", target=target, backend=backend.name):
+        result = call_backend(backend, "translate", text, source, target)
+    if result is not None:
+        translation_cache.put(source, target, text, result)
+    return result
+
+def _translate_group(texts: List[str], source: str, target: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Translate several single-line texts with one batched backend call.
+    Falls back to one call per text if the batch fails or comes back with the wrong length.
+    """
+    backend = select_backend(source, target)
+    if len(texts) > 1:
+        try:
+            with span("translator", target=target, backend=backend.name, mode="batch"):
+                translations = call_backend(backend, "translate_batch", texts, source, target)
+            if len(translations) == len(texts):
+                return [(translation, None) for translation in translations]
+            logger.warning("Grouped translation changed the line count; translating one by one")
+        except Exception as e:
+            logger.warning(f"Grouped translation failed, translating one by one: {str(e)}")
+    results = []
+    for text in texts:
+        try:
+            with span("translator", target=target, backend=backend.name):
+                results.append((call_backend(backend, "translate", text, source, target), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+def translate_batch(texts: List[str], target: str, source: str = "auto") -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Translate many texts, returning (translation, error) per text in input order.
+    Cached texts are answered from the cache; the rest are sent in grouped backend calls
+    of up to TRANSLATION_BATCH_MAX_CHARS characters each.
+    """
+    translation_cache = get_translation_cache()
+    results: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * len(texts)
+    groups, group, group_chars = [], [], 0
+    for i, text in enumerate(texts):
+        if not text.strip():
+            results[i] = (None, "Empty text")
+            continue
+        cached = translation_cache.get(source, target, text)
+        if cached is not None:
+            results[i] = (cached, None)
+            continue
+        if "\n" in text:
+            groups.append([i])
+            continue
+        if group and group_chars + len(text) + 1 > translation_batch_max_chars:
+            groups.append(group)
+            group, group_chars = [], 0
+        group.append(i)
+        group_chars += len(text) + 1
+    if group:
+        groups.append(group)
+
+    for indexes in groups:
+        translated = _translate_group([texts[i] for i in indexes], source, target)
+        for i, (translation, error) in zip(indexes, translated):
+            if translation is not None:
+                translation_cache.put(source, target, texts[i], translation)
+            results[i] = (translation, error)
+    return results
@@ -0,0 +1,42 @@
+import importlib
+import time
+from typing import Callable, Dict, List, Tuple
+from app.config import get_llm
+from app.agents import get_graph
+from app.language_tool_pool import init_language_tool_pool
+from app.translation import get_translation_cache, warm_up_translators
+from app.audio_cache import get_audio_cache
+from app.lexicon import get_lexicon
+from app.intent_classifier import get_intent_router
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _import_backend(module: str) -> Callable[[], None]:
+    return lambda: importlib.import_module(module)
+
+# Backends the app otherwise loads on first use, in warm-up order: (step, loader)
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("llm", get_llm),
+    ("graph", get_graph),
+    ("language_tool_pool", init_language_tool_pool),
+    ("translation_cache", get_translation_cache),
+    ("translators", warm_up_translators),
+    ("audio_cache", get_audio_cache),
+    ("lexicon", get_lexicon),
+    ("intent_router", get_intent_router),
+    ("import gtts", _import_backend("gtts")),
+]
+
+# Seconds spent per warm-up step in this process, for /stats
+startup_report: Dict[str, float] = {}
+
+def warm_up() -> Dict[str, float]:
+    """Load every lazily initialized backend now, timing each step."""
+    for name, load in WARMUP_STEPS:
+        started = time.perf_counter()
+        load()
+        startup_report[name] = time.perf_counter() - started
+        logger.info(f"Warm-up {name}: {startup_report[name] * 1000:.0f} ms")
+    logger.info(f"Warm-up finished in {sum(startup_report.values()):.2f}s")
+    return dict(startup_report)
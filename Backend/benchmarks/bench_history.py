@@ -0,0 +1,149 @@
+"""
+/history latency as the chat history grows to millions of messages, with and without the
+archive (app.archive).
+
+For each size a throwaway database is seeded with that many messages spread over --users users
+and --days days, in the order real traffic would write them. The history pages are then read
+twice: with every message still in the chat_history table ("hot"), and after one archiver run
+has moved all but the recent ones into compressed segments ("archived"). Each page does what
+the /history endpoint does: read the rows, then ask whether there are more beyond them.
+
+- newest: the newest page (the common case: opening the chat)
+- older:  a page before a random message of the user's history (scrolling back; mostly archived)
+- after:  a page after a random message (catching up from a cursor)
+
+Archived pages cost at most a segment decompression or two on a cache miss, so they depend on
+ARCHIVE_SEGMENT_SIZE, not on how many messages there are. Alongside the latencies it reports
+the archiver run time and the bytes on disk for the database and the archive.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_history --sizes 100000,1000000,3000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from benchmarks.results import summarize, print_table, save_results
+
+PAGE_SIZE = 50
+
+def label(size: int) -> str:
+    return f"{size // 1000000}M" if size >= 1000000 and size % 1000000 == 0 else f"{size // 1000}k"
+
+def seed(conn, size: int, users: int, days: float) -> None:
+    """Messages round-robin over users, timestamps rising evenly up to now."""
+    now = time.time()
+    step = days * 86400 / size
+
+    def rows():
+        for i in range(size):
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - (size - i) * step))
+            yield (f"user-{i % users}", timestamp, f"{'You' if i % 2 == 0 else 'Teacher'}: Nachricht {i} über das Wetter")
+
+    conn.executemany("INSERT INTO chat_history (user_id, timestamp, message) VALUES (?, ?, ?)", rows())
+    conn.commit()
+
+def history_page(user_id: str, **cursor) -> None:
+    from app.database import iter_chat_history, has_messages_beyond
+    rows = list(iter_chat_history(user_id, PAGE_SIZE, **cursor))
+    if rows:
+        older = "after" not in cursor
+        has_messages_beyond(user_id, rows[0]["id"] if older else rows[-1]["id"], older)
+
+def measure_pages(size: int, users: int, calls: int) -> dict:
+    """Latency of the three page kinds; ids are seeded round-robin, so id k belongs to user (k - 1) % users."""
+    scenarios = {
+        "newest": lambda k: history_page(f"user-{(k - 1) % users}"),
+        "older": lambda k: history_page(f"user-{(k - 1) % users}", before=k),
+        "after": lambda k: history_page(f"user-{(k - 1) % users}", after=k),
+    }
+    results = {}
+    for name, page in scenarios.items():
+        rng = random.Random(name)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(calls):
+            k = rng.randint(1, size)
+            call_started = time.perf_counter()
+            page(k)
+            latencies.append(time.perf_counter() - call_started)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+def disk_bytes(*paths: str) -> int:
+    total = 0
+    for path in paths:
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+        for root, _, files in os.walk(path):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def run_size(size: int, args, workdir: str) -> dict:
+    from app import database, segments
+    from app.archive import HistoryArchiver
+    database.close_db()
+    for name in os.listdir(workdir):
+        path = os.path.join(workdir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    # Segment names repeat across sizes, so drop segments decoded for the previous database
+    segments.segment_store = None
+    database.init_db()
+    with database.get_pool().connection() as conn:
+        seed(conn, size, args.users, args.days)
+    db_path = database.database_path
+    db_files = (db_path, f"{db_path}-wal")
+
+    results = {f"{label(size)} hot {name}": r for name, r in measure_pages(size, args.users, args.calls).items()}
+    hot_bytes = disk_bytes(*db_files)
+    archiver = HistoryArchiver(0, args.hot_days, args.keep_recent, args.segment_size)
+    started = time.perf_counter()
+    run = archiver.run_once()
+    archive_seconds = time.perf_counter() - started
+    results.update({f"{label(size)} archived {name}": r for name, r in measure_pages(size, args.users, args.calls).items()})
+
+    with database.get_pool().connection() as conn:
+        hot_rows = conn.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+    totals = database.get_archive_totals()
+    print(f"{label(size)}: archived {run['archived']} messages into {totals['segments']} {archiver.codec} segments "
+          f"in {archive_seconds:.1f}s, {hot_rows} left hot; database {hot_bytes / 1e6:.1f} MB -> "
+          f"{disk_bytes(*db_files) / 1e6:.1f} MB, archive {totals['bytes'] / 1e6:.1f} MB")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000,3000000", help="comma-separated message counts")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=float, default=365, help="time span of the seeded history")
+    parser.add_argument("--calls", type=int, default=2000, help="pages read per scenario")
+    parser.add_argument("--hot-days", type=float, default=30, help="HISTORY_HOT_DAYS for the archiver run")
+    parser.add_argument("--keep-recent", type=int, default=50, help="HISTORY_HOT_MESSAGES for the archiver run")
+    parser.add_argument("--segment-size", type=int, default=1000, help="ARCHIVE_SEGMENT_SIZE")
+    parser.add_argument("--output", help="results file (default benchmarks/results/history-<timestamp>.json)")
+    args = parser.parse_args()
+
+    # Configuration is read at import, so point it at throwaway files before importing the app
+    workdir = tempfile.mkdtemp(prefix="germanbuddy-history-")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "chat_history.db")
+    os.environ["ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+
+    results = {}
+    try:
+        for size in (int(size) for size in args.sizes.split(",")):
+            results.update(run_size(size, args, workdir))
+    finally:
+        from app.database import close_db
+        close_db()
+        shutil.rmtree(workdir, ignore_errors=True)
+    print()
+    print_table(results)
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    print(f"\nsaved {save_results('history', results, params, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Accuracy and speed of the teacher's intent routing over the labelled utterances in
+intents/corpus.tsv (held out from the classifier's training file).
+
+Compares the keyword rules (app.intent_router), the n-gram classifier on its own, the local
+tiers of the tiered router (keyword, then classifier; ambiguous inputs counted as going to the
+conversation agent, as they do without the LLM tier) and the old substring scan. For the tiered
+router it also reports how many utterances each tier decides (including how many would wait on
+the LLM), and how accurate those decisions are.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_intent_router
+"""
+import argparse
+import os
+import timeit
+from collections import Counter
+from app.intent_classifier import read_examples
+from app.intent_router import route_intent, DEFAULT_AGENT
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "intents", "corpus.tsv")
+
+def legacy_route(user_input: str) -> str:
+    """The substring scan teacher_agent used before the compiled router, kept for comparison."""
+    intents = {
+        "grammar_agent": ["grammar", "check grammar", "grammar check"],
+        "vocabulary_agent": ["vocabulary", "word", "define", "meaning"],
+        "pronunciation_agent": ["pronounce", "pronunciation", "say"],
+        "translator_en_agent": ["translate to english", "translation english", "english", "en"],
+        "translator_bn_agent": ["translate to bangla", "translation bangla", "bangla", "bn"],
+        "grammar_explain_agent": ["explain grammar", "grammar explanation", "explain"],
+    }
+    user_input = user_input.lower().strip()
+    for agent, keywords in intents.items():
+        if any(keyword in user_input for keyword in keywords):
+            return agent
+    return DEFAULT_AGENT
+
+def evaluate(route, corpus):
+    errors = [(label, utterance, route(utterance)) for label, utterance in corpus]
+    errors = [error for error in errors if error[0] != error[2]]
+    return 1 - len(errors) / len(corpus), errors
+
+def time_per_call(route, corpus, repeat: int) -> float:
+    """Best-of-5 mean time in microseconds to route one utterance."""
+    utterances = [utterance for _, utterance in corpus]
+    timer = timeit.Timer(lambda: [route(utterance) for utterance in utterances])
+    best = min(timer.repeat(repeat=5, number=repeat))
+    return best / (repeat * len(utterances)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus per timing run")
+    parser.add_argument("--show-errors", action="store_true", help="list misrouted utterances")
+    args = parser.parse_args()
+
+    from app.intent_classifier import TieredIntentRouter, load_intent_model
+    from app.intent_router import router as keyword_router
+    from app.config import intent_model_threshold, intent_llm_min_confidence
+
+    model = load_intent_model()
+    tiered = TieredIntentRouter(keyword_router, model, intent_model_threshold, llm_fallback=False, llm_timeout=0,
+                                cache_size=0, llm_min_confidence=intent_llm_min_confidence)
+
+    def tiered_local(utterance: str) -> str:
+        agent, tier, _ = tiered.route_local(utterance)
+        return DEFAULT_AGENT if tier == "ambiguous" else agent
+
+    corpus = list(read_examples(CORPUS_PATH))
+    print(f"{len(corpus)} labelled utterances")
+    routes = (
+        ("keyword", route_intent),
+        ("model", lambda utterance: model.predict(utterance)[0]),
+        ("tiered", tiered_local),
+        ("legacy", legacy_route),
+    )
+    for name, route in routes:
+        accuracy, errors = evaluate(route, corpus)
+        micros = time_per_call(route, corpus, args.repeat)
+        print(f"{name:>8}: accuracy {accuracy:6.1%}  {micros:7.2f} us/utterance  {len(errors)} misrouted")
+        if args.show_errors:
+            for label, utterance, routed in errors:
+                print(f"          expected {label:<22} got {routed:<22} {utterance}")
+
+    print(f"\ntiered router (threshold {intent_model_threshold}):")
+    decided, correct = Counter(), Counter()
+    for label, utterance in corpus:
+        agent, tier, _ = tiered.route_local(utterance)
+        decided[tier] += 1
+        correct[tier] += agent == label
+    for tier in ("keyword", "model", "default", "ambiguous"):
+        share = decided[tier] / len(corpus)
+        accuracy = f"{correct[tier] / decided[tier]:6.1%} correct" if decided[tier] and tier != "ambiguous" else "-> LLM tier"
+        print(f"{tier:>10}: {decided[tier]:4} ({share:6.1%})  {accuracy}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Latency and throughput of the translator backends, bypassing the translation cache.
+
+For each backend and target language it measures:
+- single: one sentence per call (what a chat reply's translation branch pays)
+- batch: all sentences through translate_batch in groups of --batch-size (what /batch/translate
+  and grouped grammar explanations pay), reported as sentences per second
+
+Run from the Backend directory (the local backend needs requirements-local.txt):
+    python -m benchmarks.bench_translation --backends google local --targets en bn
+    LOCAL_TRANSLATION_THREADS=8 python -m benchmarks.bench_translation --backends local
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from benchmarks.results import summarize, print_table, save_results, compare
+
+SENTENCES = [
+    "Ich heiße Anna und komme aus Hamburg.",
+    "Wie geht es dir heute?",
+    "Gestern bin ich mit dem Zug nach Berlin gefahren.",
+    "Kannst du mir bitte helfen?",
+    "Das Wetter ist heute sehr schön, aber morgen soll es regnen.",
+    "Ich lerne seit drei Monaten Deutsch.",
+    "Wir treffen uns um acht Uhr am Bahnhof.",
+    "Meine Schwester wohnt in einer kleinen Wohnung in der Stadt.",
+    "Ich hätte gern einen Kaffee mit Milch.",
+    "Nach der Arbeit gehe ich oft in den Park.",
+    "Hast du am Wochenende Zeit?",
+    "Der Film war langweilig, deshalb sind wir früher gegangen.",
+    "Entschuldigung, wo ist die nächste Apotheke?",
+    "Ich habe meinen Schlüssel zu Hause vergessen.",
+    "Im Sommer fahren wir an die Ostsee.",
+    "Mein Lieblingsessen ist Spaghetti mit Tomatensoße.",
+]
+
+def bench_single(backend, sentences, target: str) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for sentence in sentences:
+        call_started = time.perf_counter()
+        backend.translate(sentence, "auto", target)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def bench_batch(backend, sentences, target: str, batch_size: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for start in range(0, len(sentences), batch_size):
+        call_started = time.perf_counter()
+        backend.translate_batch(sentences[start:start + batch_size], "auto", target)
+        latencies.append(time.perf_counter() - call_started)
+    wall_time = time.perf_counter() - started
+    result = summarize(latencies, wall_time)
+    # Throughput in sentences, not calls
+    result["rps"] = len(sentences) / wall_time if wall_time else 0.0
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["google", "local"])
+    parser.add_argument("--targets", nargs="+", default=["en", "bn"])
+    parser.add_argument("--rounds", type=int, default=2, help="passes over the sentences per measurement")
+    parser.add_argument("--batch-size", type=int, default=16, help="sentences per translate_batch call")
+    parser.add_argument("--output", help="results file (default benchmarks/results/translation-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare p50 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TRANSLATION_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "translation_cache.db"))
+    from app.translation import get_translator_backend
+
+    sentences = SENTENCES * args.rounds
+    results = {}
+    for name in args.backends:
+        backend = get_translator_backend(name)
+        started = time.perf_counter()
+        backend.warm_up()
+        print(f"{name}: warm-up {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        for target in args.targets:
+            if not backend.supports("auto", target):
+                print(f"{name}: skipping unsupported target '{target}'", file=sys.stderr)
+                continue
+            # One untimed call so lazy per-language setup isn't counted
+            backend.translate(SENTENCES[0], "auto", target)
+            results[f"{name}:{target}:single"] = bench_single(backend, sentences, target)
+            results[f"{name}:{target}:batch"] = bench_batch(backend, sentences, target, args.batch_size)
+
+    print_table(results)
+    print("(rps is sentences per second)")
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    print(f"\nsaved {save_results('translation', results, params, args.output)}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, "p50_ms", args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Local stand-ins for the external services the backend calls, with configurable latency,
+so benchmarks run offline and repeatably:
+
+- a DeepSeek (OpenAI-compatible) chat completions server, streaming and non-streaming
+- a Google Translate page server for the real "google" backend client
+- a translator backend registered in place of Google
+- a speech synthesizer used by the audio cache instead of gTTS
+- a LanguageTool replacement that needs no Java server
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+FAKE_REPLY = "Hallo! Ich bin dein Deutschlehrer. Wie geht es dir heute? Ich bin gut."
+
+class Faults:
+    """Latency and error rate a fake server applies to each request; may be changed while it runs."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+
+    async def inject(self) -> bool:
+        """Wait out the latency, then return True if this request should fail."""
+        await asyncio.sleep(self.latency)
+        return bool(self.error_rate) and random.random() < self.error_rate
+
+def create_fake_deepseek_app(latency: float = 0.3, token_delay: float = 0.01, error_rate: float = 0.0,
+                             faults: Faults = None) -> FastAPI:
+    """OpenAI-compatible /v1/chat/completions that waits `latency` seconds before answering."""
+    app = FastAPI()
+    faults = faults or Faults(latency, error_rate)
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        if await faults.inject():
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "deepseek-chat")
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": FAKE_REPLY},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 20, "completion_tokens": 20, "total_tokens": 40},
+            }
+
+        async def chunks():
+            words = FAKE_REPLY.split(" ")
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else f" {word}"}
+                if i == 0:
+                    delta["role"] = "assistant"
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_delay)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+def create_fake_google_translate_app(faults: Faults) -> FastAPI:
+    """The /m page GoogleTranslateClient reads, answering each line as "[target] line"."""
+    app = FastAPI()
+
+    @app.get("/m")
+    async def translate_page(q: str, tl: str, sl: str = "auto"):
+        if await faults.inject():
+            return HTMLResponse("<html><body>injected failure</body></html>", status_code=503)
+        translated = "\n".join(f"[{tl}] {line}" for line in q.split("\n"))
+        return HTMLResponse(f'<html><body><div class="result-container">{translated}</div></body></html>')
+
+    return app
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a free local port in a daemon thread."""
+
+    def __init__(self, app):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "BackgroundServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+def make_fake_translator(latency: float = 0.15):
+    def fake_translate(text: str, source: str, target: str) -> str:
+        time.sleep(latency)
+        return "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+    return fake_translate
+
+def make_fake_synthesizer(latency: float = 0.4, size: int = 16 * 1024):
+    def fake_synthesize(text: str, lang: str, slow: bool, tld: str, path: str) -> None:
+        time.sleep(latency)
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+    return fake_synthesize
+
+class FakeMatch:
+    def __init__(self, text: str):
+        self.ruleId = "FAKE_RULE"
+        self.message = "Möglicherweise fehlt ein Komma."
+        self.context = text[:40]
+        self.offset = 0
+        self.errorLength = min(len(text), 5)
+        self.replacements = []
+
+class FakeLanguageTool:
+    """Drop-in for language_tool_python.LanguageTool: reports one match for every text containing 'habe gegangen'."""
+
+    latency = 0.05
+
+    def __init__(self, language: str):
+        self.language = language
+
+    def check(self, text: str):
+        time.sleep(self.latency)
+        return [FakeMatch(text)] if "habe gegangen" in text else []
+
+    def close(self):
+        pass
+
+def install_fakes(llm_latency: float, translator_latency: float, tts_latency: float, languagetool_latency: float,
+                  error_rate: float = 0.0) -> BackgroundServer:
+    """
+    Start the fake DeepSeek server and point the app's config at the fakes.
+    Must run before anything imports app.main.
+    """
+    import os
+    server = BackgroundServer(create_fake_deepseek_app(latency=llm_latency, error_rate=error_rate)).start()
+    os.environ["DEEPSEEK_API_KEY"] = "fake-key"
+    os.environ["DEEPSEEK_BASE_URL"] = f"{server.url}/v1"
+    os.environ["TRANSLATOR_BACKEND"] = "stub"
+
+    from app import translation, language_tool_pool, audio_cache
+    fake_translate = make_fake_translator(translator_latency)
+    translation.TRANSLATOR_BACKENDS["stub"] = lambda: translation.CallableTranslator("stub", fake_translate)
+    FakeLanguageTool.latency = languagetool_latency
+    language_tool_pool.create_language_tool = FakeLanguageTool
+    audio_cache.get_audio_cache().synthesize = make_fake_synthesizer(tts_latency)
+    return server
@@ -0,0 +1,149 @@
+"""
+Fault injection for the outbound calls: how /chat behaves while DeepSeek or Google Translate
+fails or hangs, and how it recovers.
+
+The app runs in-process against local fake servers for DeepSeek and the Google Translate page,
+so the real HTTP clients, timeouts, retries and circuit breakers are exercised. The run steps
+through phases that change the fakes' latency and error rate while the app keeps serving:
+
+- healthy:          both dependencies answer normally
+- translator_down:  every translation request fails; replies should lose their translations,
+                    the translator breaker should open and latency should drop back down
+- translator_slow:  translations take longer than HTTP_READ_TIMEOUT
+- llm_down:         every completion fails; replies should become the "unavailable" message
+                    and, once the llm breaker is open, come back without calling DeepSeek
+- recovered:        faults removed; after the breakers' reset timeout replies are complete again
+
+Each phase reports latency percentiles and how many replies were complete, degraded (German
+only), unavailable or errors, followed by the breaker states from /stats.
+tests/test_translator_faults.py asserts the translator side of this (breaker opening,
+half-open recovery, German-only replies) against the same fake page.
+
+Run from the Backend directory:
+    python -m benchmarks.fault_injection --requests 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import Tuple
+import httpx
+from benchmarks.results import summarize, print_table, save_results
+
+# (phase, llm (latency, error rate), translator (latency, error rate)); latencies are in units
+# of the run's --latency so slow phases scale with it
+PHASES = [
+    ("healthy", (1, 0.0), (0.5, 0.0)),
+    ("translator_down", (1, 0.0), (0.5, 1.0)),
+    ("translator_slow", (1, 0.0), (None, 0.0)),
+    ("llm_down", (1, 1.0), (0.5, 0.0)),
+    ("recovered", (1, 0.0), (0.5, 0.0)),
+]
+
+def classify(response: str) -> str:
+    if response.startswith("Ich bin gerade nicht erreichbar"):
+        return "unavailable"
+    if response.startswith("Error"):
+        return "error"
+    if "[en]" in response and "[bn]" in response:
+        return "complete"
+    return "degraded"
+
+async def run_phase(client: httpx.AsyncClient, total: int, concurrency: int) -> dict:
+    latencies, outcomes = [], {"complete": 0, "degraded": 0, "unavailable": 0, "error": 0}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.post("/chat", json={
+                "user_id": f"fault-{uuid.uuid4().hex[:8]}",
+                "message": f"Was hast du heute gemacht {i}?",
+            })
+            latencies.append(time.perf_counter() - started)
+            outcome = classify(response.json().get("response", "")) if response.status_code == 200 else "error"
+            outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - started, errors=outcomes.pop("error"))
+    result.update(outcomes)
+    return result
+
+async def run(args) -> Tuple[dict, dict]:
+    from benchmarks.fakes import (
+        BackgroundServer, Faults, FakeLanguageTool, create_fake_deepseek_app, create_fake_google_translate_app,
+        make_fake_synthesizer,
+    )
+    llm_faults, translator_faults = Faults(), Faults()
+    llm_server = BackgroundServer(create_fake_deepseek_app(faults=llm_faults)).start()
+    translator_server = BackgroundServer(create_fake_google_translate_app(translator_faults)).start()
+
+    workdir = tempfile.mkdtemp(prefix="germanbuddy-faults-")
+    os.environ.update({
+        "DATABASE_PATH": os.path.join(workdir, "chat_history.db"),
+        "TRANSLATION_CACHE_PATH": os.path.join(workdir, "translation_cache.db"),
+        "AUDIO_CACHE_DIR": os.path.join(workdir, "audio"),
+        "DEEPSEEK_API_KEY": "fake-key",
+        "DEEPSEEK_BASE_URL": f"{llm_server.url}/v1",
+        "GOOGLE_TRANSLATE_URL": f"{translator_server.url}/m",
+        "TRANSLATOR_BACKEND": "google",
+        # The fake LLM always gives the same reply; cached translations would hide the faults
+        "TRANSLATION_CACHE_TTL": "0",
+        "RATE_LIMIT_PER_SECOND": "0",
+        "LLM_TIMEOUT": str(args.timeout),
+        "HTTP_READ_TIMEOUT": str(args.timeout),
+        "BREAKER_RESET_TIMEOUT": str(args.reset_timeout),
+    })
+    from app import language_tool_pool, audio_cache
+    language_tool_pool.create_language_tool = FakeLanguageTool
+    audio_cache.get_audio_cache().synthesize = make_fake_synthesizer(0.1)
+    from app.main import app
+
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://faults", timeout=120) as client:
+                for name, (llm_latency, llm_errors), (translator_latency, translator_errors) in PHASES:
+                    if name == "recovered":
+                        # Let open breakers reach half-open before the first trial call
+                        await asyncio.sleep(args.reset_timeout)
+                    llm_faults.latency, llm_faults.error_rate = llm_latency * args.latency, llm_errors
+                    translator_faults.latency = (args.timeout * 2 if translator_latency is None
+                                                 else translator_latency * args.latency)
+                    translator_faults.error_rate = translator_errors
+                    results[name] = await run_phase(client, args.requests, args.concurrency)
+                    print(f"  {name} done", file=sys.stderr)
+                breakers = (await client.get("/stats")).json()["breakers"]
+    finally:
+        llm_server.stop()
+        translator_server.stop()
+    return results, breakers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="normal fake latency (s)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="LLM and HTTP read timeout (s)")
+    parser.add_argument("--reset-timeout", type=float, default=3.0, help="circuit breaker reset timeout (s)")
+    parser.add_argument("--output", help="results file (default benchmarks/results/faults-<timestamp>.json)")
+    args = parser.parse_args()
+
+    results, breakers = asyncio.run(run(args))
+    print_table(results)
+    print(f"\n{'phase':<28} {'complete':>9} {'degraded':>9} {'unavail.':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['complete']:>9} {r['degraded']:>9} {r['unavailable']:>9} {r['errors']:>7}")
+    print("\nbreakers:")
+    for name, stats in breakers.items():
+        print(f"  {name}: {stats}")
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    print(f"\nsaved {save_results('faults', results, params, args.output)}")
+
+if __name__ == "__main__":
+    main()
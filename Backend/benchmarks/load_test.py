@@ -0,0 +1,148 @@
+"""
+Load test for the HTTP API.
+
+Drives /chat (one scenario per routed agent), /chat/stream and /history at a fixed
+concurrency and reports p50/p95/p99 latency, requests per second and overlap (mean number
+of requests in flight; close to the concurrency when requests don't serialize).
+
+By default the app runs in-process against local fakes of DeepSeek, the translator, gTTS
+and LanguageTool with configurable latency, and a throwaway database and caches, so no
+network or Java is needed. With --url the same scenarios hit a running server instead.
+
+Run from the Backend directory:
+    python -m benchmarks.load_test --concurrency 16 --requests 64
+    python -m benchmarks.load_test --baseline benchmarks/results/load-baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+from benchmarks.results import summarize, print_table, save_results, compare
+
+# Message templates per scenario; {i} keeps requests unique so the response cache can't answer them
+CHAT_SCENARIOS = {
+    "chat:conversation_agent": "Wie geht es dir heute? Ich heiße Anna {i}.",
+    "chat:grammar_agent": "check grammar: Ich habe gegangen nach Hause {i}",
+    "chat:grammar_explain_agent": "explain grammar: Ich habe gegangen nach Hause {i}",
+    "chat:vocabulary_agent": "define Haus",
+    "chat:pronunciation_agent": "pronounce Guten Morgen {i}",
+    "chat:translator_en_agent": "translate to english: Ich bin heute sehr müde {i}",
+    "chat:translator_bn_agent": "translate to bangla: Ich bin heute sehr müde {i}",
+}
+
+async def run_scenario(client: httpx.AsyncClient, send, total: int, concurrency: int) -> dict:
+    """Issue `total` requests through `send(client, i)` with at most `concurrency` in flight."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await send(client, i)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+def chat_sender(template: str, run_id: str):
+    async def send(client, i):
+        return await client.post("/chat", json={"user_id": f"{run_id}-{i % 8}", "message": template.format(i=i)})
+    return send
+
+def stream_sender(run_id: str):
+    async def send(client, i):
+        payload = {"user_id": f"{run_id}-{i % 8}", "message": f"Was machst du am Wochenende {i}?"}
+        async with client.stream("POST", "/chat/stream", json=payload) as response:
+            async for _ in response.aiter_raw():
+                pass
+        return response
+    return send
+
+def history_sender(run_id: str):
+    async def send(client, i):
+        return await client.get(f"/history/{run_id}-{i % 8}", params={"limit": 50})
+    return send
+
+async def run_all(client: httpx.AsyncClient, args) -> dict:
+    run_id = f"bench-{uuid.uuid4().hex[:8]}"
+    scenarios = {name: chat_sender(template, run_id) for name, template in CHAT_SCENARIOS.items()}
+    scenarios["chat/stream"] = stream_sender(run_id)
+    # Runs last so every user already has history to page through
+    scenarios["history"] = history_sender(run_id)
+
+    results = {}
+    for name, send in scenarios.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        await run_scenario(client, send, min(args.concurrency, args.requests), args.concurrency)  # warm-up
+        results[name] = await run_scenario(client, send, args.requests, args.concurrency)
+        print(f"  {name} done", file=sys.stderr)
+    return results
+
+async def run_in_process(args) -> dict:
+    from benchmarks.fakes import install_fakes
+    workdir = tempfile.mkdtemp(prefix="germanbuddy-bench-")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "chat_history.db")
+    os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(workdir, "translation_cache.db")
+    os.environ["AUDIO_CACHE_DIR"] = os.path.join(workdir, "audio")
+    # A handful of users send every request, so per-user rate limits would reject most of them
+    os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+    server = install_fakes(
+        llm_latency=args.llm_latency,
+        translator_latency=args.translator_latency,
+        tts_latency=args.tts_latency,
+        languagetool_latency=args.languagetool_latency,
+        error_rate=args.error_rate,
+    )
+    from app.main import app
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                return await run_all(client, args)
+    finally:
+        server.stop()
+
+async def run_remote(args) -> dict:
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        return await run_all(client, args)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app with fakes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64, help="requests per scenario")
+    parser.add_argument("--only", nargs="*", help="run scenarios whose name contains any of these")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake DeepSeek response delay (s)")
+    parser.add_argument("--translator-latency", type=float, default=0.15, help="fake translator delay (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.4, help="fake gTTS delay (s)")
+    parser.add_argument("--languagetool-latency", type=float, default=0.05, help="fake LanguageTool delay (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake DeepSeek calls that fail")
+    parser.add_argument("--output", help="results file (default benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any scenario regressed")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_remote(args) if args.url else run_in_process(args))
+    print_table(results)
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    print(f"\nsaved {save_results('load', results, params, args.output)}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, "p95_ms", args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
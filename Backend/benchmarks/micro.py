@@ -0,0 +1,118 @@
+"""
+Micro-benchmarks for the hot paths that don't touch external services: teacher_agent
+routing, lexicon lookups and the database.py functions, on a throwaway database seeded
+with history.
+
+Reports per-call latency percentiles and calls per second, saves the results and can
+compare them against an earlier run like the load test.
+
+Run from the Backend directory:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --baseline benchmarks/results/micro-20250101-120000.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from benchmarks.results import summarize, print_table, save_results, compare
+
+def measure(func, calls: int) -> dict:
+    """Time `calls` sequential invocations of func(i)."""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(calls):
+        call_started = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def bench_routing(calls: int) -> dict:
+    from app.agents import teacher_agent
+    from app.intent_classifier import read_examples
+    from benchmarks.bench_intent_router import CORPUS_PATH
+    utterances = [utterance for _, utterance in read_examples(CORPUS_PATH)]
+    loop = asyncio.new_event_loop()
+
+    def route(i):
+        state = {"messages": [{"role": "human", "content": utterances[i % len(utterances)]}], "next": "", "user_id": "bench"}
+        loop.run_until_complete(teacher_agent(state))
+
+    try:
+        return {"teacher_agent": measure(route, calls)}
+    finally:
+        loop.close()
+
+def bench_lexicon(calls: int) -> dict:
+    from app.lexicon import get_lexicon
+    lexicon = get_lexicon()
+    exact = ["Haus", "lernen", "Straße", "Kind", "gehen"]
+    inflected = ["Häuser", "lernt", "gegangen", "Kindern", "sprichst"]
+    unknown = ["Hunf", "Strase", "Xylophon"]
+    return {
+        "lexicon:exact": measure(lambda i: lexicon.define(exact[i % len(exact)]), calls),
+        "lexicon:inflected": measure(lambda i: lexicon.define(inflected[i % len(inflected)]), calls),
+        "lexicon:suggest": measure(lambda i: lexicon.define(unknown[i % len(unknown)]), calls),
+    }
+
+def bench_database(calls: int, users: int, history: int) -> dict:
+    from app import database
+    database.init_db()
+    for u in range(users):
+        for m in range(history):
+            database.save_message(f"user-{u}", f"You: Nachricht {m}")
+
+    def newest_page(i):
+        list(database.iter_chat_history(f"user-{i % users}", 50))
+
+    # Message ids are global, so this cursor lands mid-way through every user's history
+    middle_id = users * history // 2
+
+    def older_page(i):
+        list(database.iter_chat_history(f"user-{i % users}", 50, before=middle_id))
+
+    return {
+        "db:save_message": measure(lambda i: database.save_message(f"user-{i % users}", f"You: neu {i}"), calls),
+        "db:iter_chat_history": measure(newest_page, calls),
+        "db:iter_chat_history_before": measure(older_page, calls),
+        "db:has_messages_beyond": measure(lambda i: database.has_messages_beyond(f"user-{i % users}", 1, True), calls),
+        "db:load_progress": measure(lambda i: database.load_progress(f"user-{i % users}"), calls),
+        "db:add_progress_deltas": measure(lambda i: database.add_progress_deltas([(f"user-{i % users}", 1, 1)]), calls),
+        "db:get_chat_history": measure(lambda i: database.get_chat_history(f"user-{i % users}"), max(1, calls // 10)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000, help="calls per benchmark")
+    parser.add_argument("--users", type=int, default=20, help="users seeded in the database")
+    parser.add_argument("--history", type=int, default=500, help="messages seeded per user")
+    parser.add_argument("--output", help="results file (default benchmarks/results/micro-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare p50 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any benchmark regressed")
+    args = parser.parse_args()
+
+    # Configuration is read at import, so point it at throwaway files before importing the app
+    workdir = tempfile.mkdtemp(prefix="germanbuddy-micro-")
+    os.environ.setdefault("DEEPSEEK_API_KEY", "fake-key")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "chat_history.db")
+    os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(workdir, "translation_cache.db")
+    os.environ["AUDIO_CACHE_DIR"] = os.path.join(workdir, "audio")
+    os.environ["LEXICON_PATH"] = os.path.join(workdir, "lexicon.db")
+    # Route locally only: ambiguous inputs would otherwise wait on the LLM tier
+    os.environ["INTENT_LLM_FALLBACK"] = "false"
+
+    results = bench_routing(args.calls)
+    results.update(bench_lexicon(args.calls))
+    results.update(bench_database(args.calls, args.users, args.history))
+    print_table(results)
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    print(f"\nsaved {save_results('micro', results, params, args.output)}")
+    if args.baseline:
+        regressions = compare(results, args.baseline, "p50_ms", args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
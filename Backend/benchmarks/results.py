@@ -0,0 +1,71 @@
+"""Summaries, persistence and regression checks shared by the benchmark scripts."""
+import json
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of samples (any order)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], wall_time: float, errors: int = 0) -> dict:
+    """Latency percentiles in milliseconds, throughput, and how many requests were in flight on average."""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rps": len(latencies) / wall_time if wall_time else 0.0,
+        "overlap": sum(latencies) / wall_time if wall_time else 0.0,
+    }
+
+def print_table(results: Dict[str, dict]) -> None:
+    print(f"{'scenario':<28} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>8} {'overlap':>8}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['requests']:>6} {r['errors']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['rps']:>8.1f} {r['overlap']:>8.2f}")
+
+def save_results(kind: str, results: Dict[str, dict], params: dict, path: Optional[str] = None) -> str:
+    """Write results as JSON (default benchmarks/results/<kind>-<timestamp>.json) and return the path."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    document = {
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    return path
+
+def compare(results: Dict[str, dict], baseline_path: str, metric: str, tolerance: float) -> List[str]:
+    """
+    Compare a metric (lower is better) against a saved run and return the scenarios that got
+    slower by more than `tolerance` (0.2 = 20%).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{metric} vs {os.path.basename(baseline_path)}")
+    for name, r in results.items():
+        if name not in baseline or not baseline[name].get(metric):
+            continue
+        before, after = baseline[name][metric], r[metric]
+        change = after / before - 1
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"  {name:<28} {before:>10.2f} -> {after:>10.2f}  {change:+7.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
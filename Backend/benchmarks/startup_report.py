@@ -0,0 +1,120 @@
+"""
+Cold-start report and budget check.
+
+Measures, each in a fresh interpreter:
+- wall time of `import app.main` (best of --repeat runs), with DEEPSEEK_API_KEY unset to
+  confirm importing needs no configuration
+- import cost per module (self time from `python -X importtime`, grouped by top-level
+  package, app modules listed individually)
+- with --warmup, the time of each app.warmup step (LanguageTool is faked unless --real-languagetool)
+
+Exits 1 when the import time exceeds --budget-ms, or when --baseline is given with
+--fail-on-regression and something got slower than --tolerance allows.
+
+Run from the Backend directory:
+    python -m benchmarks.startup_report
+    python -m benchmarks.startup_report --warmup --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from benchmarks.results import save_results, compare
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Maximum `import app.main` time; tests/test_startup.py holds the app to it too
+IMPORT_BUDGET_MS = 1500
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+WARMUP_SNIPPET = """
+import json, os, tempfile
+workdir = tempfile.mkdtemp(prefix="germanbuddy-startup-")
+os.environ.setdefault("DEEPSEEK_API_KEY", "fake-key")
+os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(workdir, "translation_cache.db")
+os.environ["AUDIO_CACHE_DIR"] = os.path.join(workdir, "audio")
+if {fake_languagetool}:
+    from app import language_tool_pool
+    from benchmarks.fakes import FakeLanguageTool
+    language_tool_pool.create_language_tool = FakeLanguageTool
+from app.warmup import warm_up
+print(json.dumps(warm_up()))
+"""
+
+def run_python(args, env=None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+                          check=True)
+
+def cold_env() -> dict:
+    env = dict(os.environ)
+    env.pop("DEEPSEEK_API_KEY", None)
+    return env
+
+def measure_import(repeat: int) -> float:
+    return min(float(run_python(["-c", IMPORT_SNIPPET], cold_env()).stdout.strip().splitlines()[-1])
+               for _ in range(repeat))
+
+def import_breakdown() -> dict:
+    """Self import time in seconds per app module and per other top-level package."""
+    stderr = run_python(["-X", "importtime", "-c", "import app.main"], cold_env()).stderr
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        group = name if name.startswith("app.") or name == "app" else name.split(".")[0]
+        totals[group] += int(self_us) / 1e6
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+def measure_warmup(fake_languagetool: bool) -> dict:
+    output = run_python(["-c", WARMUP_SNIPPET.format(fake_languagetool=fake_languagetool)]).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="cold imports to time; the fastest counts")
+    parser.add_argument("--top", type=int, default=15, help="modules to list in the breakdown")
+    parser.add_argument("--warmup", action="store_true", help="also time each warm-up step")
+    parser.add_argument("--real-languagetool", action="store_true", help="start real LanguageTool servers in warm-up")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="maximum allowed `import app.main` time")
+    parser.add_argument("--output", help="results file (default benchmarks/results/startup-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    import_seconds = measure_import(args.repeat)
+    breakdown = import_breakdown()
+    results = {"import app.main": {"ms": import_seconds * 1000}}
+
+    print(f"import app.main: {import_seconds * 1000:.0f} ms (best of {args.repeat}, budget {args.budget_ms:.0f} ms)")
+    print("\nimport self time by module:")
+    for name, seconds in list(breakdown.items())[:args.top]:
+        print(f"  {name:<36} {seconds * 1000:8.1f} ms")
+        results[f"import {name}"] = {"ms": seconds * 1000}
+
+    if args.warmup:
+        print("\nwarm-up:")
+        for name, seconds in measure_warmup(not args.real_languagetool).items():
+            print(f"  {name:<36} {seconds * 1000:8.1f} ms")
+            results[f"warmup {name}"] = {"ms": seconds * 1000}
+
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    print(f"\nsaved {save_results('startup', results, params, args.output)}")
+
+    failed = False
+    if import_seconds * 1000 > args.budget_ms:
+        print(f"FAIL: import app.main took {import_seconds * 1000:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if args.baseline:
+        regressions = compare(results, args.baseline, "ms", args.tolerance)
+        failed = failed or (bool(regressions) and args.fail_on_regression)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Configuration is read at import, so point it at throwaway files before any test imports the app
+workdir = tempfile.mkdtemp(prefix="germanbuddy-tests-")
+os.environ.update({
+    "DATA_DIR": workdir,
+    "DATABASE_PATH": os.path.join(workdir, "chat_history.db"),
+    "TRANSLATION_CACHE_PATH": os.path.join(workdir, "translation_cache.db"),
+    "AUDIO_CACHE_DIR": os.path.join(workdir, "audio"),
+    "ARCHIVE_DIR": os.path.join(workdir, "archive"),
+    "DEEPSEEK_API_KEY": "fake-key",
+    "INTENT_LLM_FALLBACK": "false",
+})
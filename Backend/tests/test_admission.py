@@ -0,0 +1,39 @@
+"""Rejected requests get 429/503 with Retry-After, and a 503 doesn't cost the user a rate-limit token."""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app import routes
+from app.admission import AdmissionController, Overloaded, TokenBucketLimiter
+from app.main import app
+
+def test_capacity_rejection_refunds_the_rate_limit_token():
+    controller = AdmissionController(max_concurrency=1, max_queue=0, max_wait=0.1,
+                                     limiter=TokenBucketLimiter(rate=0.001, burst=2))
+
+    async def run():
+        await controller.acquire("busy-user")
+        with pytest.raises(Overloaded):
+            await controller.acquire("busy-user")
+        controller.release()
+        # The rejected request's token is back, so the burst still allows one more
+        async with controller.admit("busy-user"):
+            pass
+
+    asyncio.run(run())
+    assert controller.stats["rate_limited"] == 0
+
+def post_chat(controller: AdmissionController, monkeypatch):
+    monkeypatch.setattr(routes, "get_admission_controller", lambda: controller)
+    return TestClient(app).post("/chat", json={"user_id": "rejected-user", "message": "Hallo"})
+
+def test_rate_limited_request_gets_429(monkeypatch):
+    limiter = TokenBucketLimiter(rate=0.001, burst=1)
+    limiter.acquire("rejected-user")
+    response = post_chat(AdmissionController(1, 0, 0.1, limiter), monkeypatch)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_request_over_capacity_gets_503(monkeypatch):
+    response = post_chat(AdmissionController(0, 0, 0.1, TokenBucketLimiter(rate=100, burst=100)), monkeypatch)
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
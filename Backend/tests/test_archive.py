@@ -0,0 +1,39 @@
+"""Compaction never deletes a segment file a concurrent history read may still open."""
+import os
+import pytest
+from app import archive, segments
+from app.archive import HistoryArchiver
+from app.database import archive_messages, compact_segments, init_db, iter_chat_history, save_message, get_pool
+from app.segments import SegmentStore
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+def archived_paths(user_id: str) -> list:
+    with get_pool().connection() as conn:
+        return [row[0] for row in conn.execute("SELECT path FROM archive_segments WHERE user_id = ? ORDER BY first_id",
+                                               (user_id,))]
+
+def test_replaced_segments_stay_readable_until_the_orphan_sweep(monkeypatch):
+    user_id = "archive-compaction"
+    for i in range(6):
+        save_message(user_id, f"You: Nachricht {i}")
+    while archive_messages(user_id, "9999-12-31", keep_recent=0, segment_size=2, codec="gzip"):
+        pass
+    # What a concurrent page looked up in the index just before the compaction commits
+    stale = archived_paths(user_id)
+    assert len(stale) == 3
+
+    assert compact_segments(user_id, segment_size=10, codec="gzip") == 2
+    assert archived_paths(user_id) != stale
+    # A fresh store has nothing cached, so each read opens the file
+    store = SegmentStore(segments.get_segment_store().directory, cache_size=0)
+    assert [len(store.read(path)) for path in stale] == [2, 2, 2]
+    assert [row["message"] for row in iter_chat_history(user_id, 10)] == [f"You: Nachricht {i}" for i in range(6)]
+
+    sweeper = HistoryArchiver(0, 0, 0, 10)
+    assert sweeper.remove_orphans() == 0
+    monkeypatch.setattr(archive, "ORPHAN_GRACE_SECONDS", -1)
+    assert sweeper.remove_orphans() == 3
+    assert not any(os.path.exists(os.path.join(store.directory, path)) for path in stale)
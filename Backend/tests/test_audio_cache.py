@@ -0,0 +1,43 @@
+"""Speech synthesis is retried on network trouble only, not on errors that would just repeat."""
+import pytest
+import requests
+from gtts.tts import gTTSError
+from app import resilience
+from app.audio_cache import AudioCache
+
+def rejected(status: int) -> gTTSError:
+    response = requests.Response()
+    response.status_code = status
+    return gTTSError(f"{status} (rejected)", response=response)
+
+def unreachable() -> gTTSError:
+    # gTTS raises its error while handling the requests one, which makes that the context
+    try:
+        try:
+            raise requests.ConnectionError("Failed to connect")
+        except requests.ConnectionError:
+            raise gTTSError("Failed to connect. Probable cause: Unknown")
+    except gTTSError as e:
+        return e
+
+@pytest.mark.parametrize("error, attempts", [
+    (rejected(400), 1),
+    (ValueError("Language not supported: xx"), 1),
+    (rejected(429), 3),
+    (rejected(503), 3),
+    (unreachable(), 3),
+])
+def test_only_transient_synthesis_errors_are_retried(error, attempts, tmp_path, monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    monkeypatch.setattr("app.audio_cache.tool_max_retries", 2)
+    monkeypatch.setitem(resilience.breakers, "gtts", resilience.CircuitBreaker("gtts", 10, 60))
+    calls = []
+
+    def synthesize(text, lang, slow, tld, path):
+        calls.append(text)
+        raise error
+
+    cache = AudioCache(str(tmp_path), "/static/audio", 10 ** 6, synthesize=synthesize)
+    with pytest.raises(type(error)):
+        cache.get_or_synthesize("Guten Morgen")
+    assert len(calls) == attempts
@@ -0,0 +1,32 @@
+"""Older messages are folded into the summary oldest first, and none are skipped."""
+import pytest
+from app.conversation_memory import ConversationMemory
+from app.database import init_db, save_message, save_summary
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+def test_backlog_is_folded_from_the_last_summarized_message():
+    user_id = "memory-backlog"
+    for i in range(30):
+        save_message(user_id, f"You: Nachricht {i}")
+    memory = ConversationMemory(recent_messages=4, token_budget=1000, message_max_tokens=50,
+                                summary_max_tokens=100, summary_batch=5)
+
+    context, to_fold = memory._load(user_id, "Nachricht 29")
+    assert [turn["content"] for turn in context.turns] == [f"Nachricht {i}" for i in range(25, 29)]
+    assert [row["message"] for row in to_fold] == [f"You: Nachricht {i}" for i in range(5)]
+
+    save_summary(user_id, "summary", to_fold[-1]["id"])
+    _, to_fold = memory._load(user_id, "Nachricht 29")
+    assert [row["message"] for row in to_fold] == [f"You: Nachricht {i}" for i in range(5, 10)]
+
+def test_partial_batch_waits():
+    user_id = "memory-partial"
+    for i in range(7):
+        save_message(user_id, f"You: Nachricht {i}")
+    memory = ConversationMemory(recent_messages=4, token_budget=1000, message_max_tokens=50,
+                                summary_max_tokens=100, summary_batch=5)
+    _, to_fold = memory._load(user_id, "Nachricht 6")
+    assert to_fold == []
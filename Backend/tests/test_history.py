@@ -0,0 +1,21 @@
+"""Paging forward through history returns every newer message, even several in one second."""
+import pytest
+from app.database import archive_messages, init_db, iter_chat_history, save_message
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+def test_after_cursor_returns_messages_stored_in_the_same_second():
+    user_id = "history-same-second"
+    for i in range(4):
+        save_message(user_id, f"You: Nachricht {i}")
+    # Archive the first two so the page spans a segment and the table
+    archive_messages(user_id, "9999-12-31", keep_recent=2, segment_size=2, codec="gzip")
+    first = next(iter_chat_history(user_id, 10))
+
+    newer = list(iter_chat_history(user_id, 10, after=first["id"]))
+    assert [row["message"] for row in newer] == [f"You: Nachricht {i}" for i in range(1, 4)]
+    save_message(user_id, "Teacher: Antwort")
+    newer = list(iter_chat_history(user_id, 10, after=newer[-1]["id"]))
+    assert [row["message"] for row in newer] == ["Teacher: Antwort"]
@@ -0,0 +1,45 @@
+"""Routing over the labelled utterances in intents/corpus.tsv (held out from the training file)."""
+import os
+from app.intent_classifier import TieredIntentRouter, load_intent_model, read_examples
+from app.intent_router import DEFAULT_AGENT, route_intent, router as keyword_router
+from app.config import intent_model_threshold, intent_llm_min_confidence
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "intents", "corpus.tsv")
+
+# Keyword-rule accuracy on the corpus when the rules were last changed; raise it when they improve
+MIN_KEYWORD_ACCURACY = 0.84
+
+# Accuracy of the keyword and model tiers together, with messages left to the LLM counted as its guess
+MIN_LOCAL_ACCURACY = 0.95
+
+# Share of messages that may wait on an LLM round-trip before the reply can start
+MAX_LLM_SHARE = 0.05
+
+corpus = list(read_examples(CORPUS_PATH))
+
+def accuracy(route) -> tuple:
+    errors = [(label, utterance, routed) for label, utterance in corpus if (routed := route(utterance)) != label]
+    return 1 - len(errors) / len(corpus), errors
+
+def test_keyword_rules_keep_their_accuracy():
+    keyword_accuracy, errors = accuracy(route_intent)
+    assert keyword_accuracy >= MIN_KEYWORD_ACCURACY, f"accuracy {keyword_accuracy:.1%}, misrouted: {errors}"
+
+def test_keyword_matches_are_never_wrong():
+    """A rule that fires must pick the right agent; unmatched input is left to the later tiers."""
+    wrong = [
+        (label, utterance, routed)
+        for label, utterance in corpus
+        if (routed := route_intent(utterance)) != DEFAULT_AGENT and routed != label
+    ]
+    assert not wrong
+
+def test_few_messages_wait_on_the_llm_and_small_talk_never_does():
+    router = TieredIntentRouter(keyword_router, load_intent_model(), intent_model_threshold, llm_fallback=True,
+                                llm_timeout=0, cache_size=0, llm_min_confidence=intent_llm_min_confidence)
+    decisions = [(label, utterance, *router.route_local(utterance)) for label, utterance in corpus]
+    to_llm = [decision for decision in decisions if decision[3] == "ambiguous"]
+    assert len(to_llm) / len(corpus) <= MAX_LLM_SHARE, to_llm
+    assert not [decision for decision in to_llm if decision[0] == DEFAULT_AGENT]
+    local_accuracy = sum(label == agent for label, _, agent, _, _ in decisions) / len(corpus)
+    assert local_accuracy >= MIN_LOCAL_ACCURACY
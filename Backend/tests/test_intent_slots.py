@@ -0,0 +1,58 @@
+"""Free-form vocabulary and translation requests reach their agents with the right word or text."""
+import asyncio
+import pytest
+from app import config, resilience
+from app.intent_classifier import TieredIntentRouter
+from app.intent_router import router as keyword_router
+from app.intent_slots import extract_term, extract_translation_source
+from app.resilience import CircuitBreaker
+
+@pytest.mark.parametrize("message, term", [
+    ("What does Kühlschrank mean?", "Kühlschrank"),
+    ("Was bedeutet Haus auf Englisch?", "Haus"),
+    ("What does the German word Flughafen mean?", "Flughafen"),
+    ("Was bedeutet das Wort verschlafen?", "verschlafen"),
+    ("Was ist die Bedeutung von Zukunft?", "Zukunft"),
+    ("Kennst du das Wort Schadenfreude?", "Schadenfreude"),
+    ("What's Apfel in English?", "Apfel"),
+    ("meaning: Fenster", "Fenster"),
+    ("Define the verb laufen", "laufen"),
+    ("define Haus", "Haus"),
+])
+def test_vocabulary_term(message, term):
+    assert extract_term(message) == term
+
+@pytest.mark.parametrize("message, text", [
+    ("Was heißt Hund auf Englisch?", "Hund"),
+    ("Wie sagt man Apfel auf Bengalisch?", "Apfel"),
+    ("translate to english: Ich habe Hunger", "Ich habe Hunger"),
+    ("translate to bangla Ich bin müde", "Ich bin müde"),
+    ("Was heißt das auf Englisch: Viel Glück", "Viel Glück"),
+    ("Übersetze ins Englische: Ich bin Student", "Ich bin Student"),
+    ("Ich wohne in Deutschland", "Ich wohne in Deutschland"),
+])
+def test_translation_source(message, text):
+    assert extract_translation_source(message) == text
+
+def test_intent_timeouts_leave_the_conversation_breaker_alone(monkeypatch):
+    class SlowLLM:
+        async def ainvoke(self, messages):
+            await asyncio.sleep(1)
+
+    conversation, intent = CircuitBreaker("llm", 2, 60), CircuitBreaker("llm_intent", 2, 60)
+    monkeypatch.setitem(resilience.breakers, "llm", conversation)
+    monkeypatch.setitem(resilience.breakers, "llm_intent", intent)
+    monkeypatch.setattr(config, "get_llm", lambda: SlowLLM())
+    class UnsureModel:
+        labels = ["conversation_agent", "vocabulary_agent"]
+
+        def predict(self, text):
+            return "vocabulary_agent", 0.5
+
+    router = TieredIntentRouter(keyword_router, UnsureModel(), threshold=0.99, llm_fallback=True,
+                                llm_timeout=0.01, cache_size=10, llm_min_confidence=0.3)
+
+    for i in range(3):
+        assert asyncio.run(router.route(f"qqq {i}")) == "conversation_agent"
+    assert intent.state == "open"
+    assert conversation.state == "closed" and conversation.get_stats()["calls"] == 0
@@ -0,0 +1,84 @@
+"""Background jobs store failures as failures, deliver results before reporting done, and stopping never hangs."""
+import threading
+import time
+import pytest
+from app import tools
+from app.database import init_db
+from app.jobs import JOB_HANDLERS, JobQueue
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+def wait_until_finished(queue: JobQueue, job_id: str):
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job.status in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_failed_job_is_not_reused_as_a_result():
+    calls = []
+
+    def flaky(text: str) -> str:
+        calls.append(text)
+        if len(calls) == 1:
+            raise ConnectionError("synthesis down")
+        return f"/audio/{text}.mp3"
+
+    queue = JobQueue({"pronunciation": flaky}, workers=1, max_pending=10, result_ttl=3600)
+    queue.start()
+    try:
+        job = wait_until_finished(queue, queue.submit("pronunciation", "Hallo jobs").id)
+        assert (job.status, job.error) == ("failed", "synthesis down")
+        job = wait_until_finished(queue, queue.submit("pronunciation", "Hallo jobs").id)
+        assert (job.status, job.result) == ("done", "/audio/Hallo jobs.mp3")
+        assert queue.get_stats()["failed"] == 1 and queue.get_stats()["completed"] == 1
+    finally:
+        queue.stop()
+
+def test_handlers_raise_instead_of_returning_error_text(monkeypatch):
+    class BrokenAudioCache:
+        def get_or_synthesize(self, text, lang="de"):
+            raise RuntimeError("Speech synthesis failed for this text")
+
+    monkeypatch.setattr(tools, "get_audio_cache", lambda: BrokenAudioCache())
+    with pytest.raises(RuntimeError):
+        JOB_HANDLERS["pronunciation"]("Hallo")
+
+def test_stop_gives_up_on_a_full_queue():
+    release = threading.Event()
+    queue = JobQueue({"grammar_explain": lambda text: release.wait(5) and text}, workers=1, max_pending=1,
+                     result_ttl=3600)
+    queue.start()
+    try:
+        queue.submit("grammar_explain", "stop running")
+        time.sleep(0.1)
+        queue.submit("grammar_explain", "stop queued")
+        started = time.monotonic()
+        queue.stop(timeout=0.2)
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+
+def test_done_callbacks_run_before_the_job_is_reported_done():
+    saved = []
+
+    def save_to_history(job):
+        time.sleep(0.1)
+        saved.append(job.result)
+
+    release = threading.Event()
+    queue = JobQueue({"grammar_explain": lambda text: release.wait(5) and f"explained: {text}"}, workers=1,
+                     max_pending=10, result_ttl=3600)
+    queue.start()
+    try:
+        job = queue.submit("grammar_explain", "callbacks first")
+        queue.add_done_callback(job.id, save_to_history)
+        release.set()
+        job = wait_until_finished(queue, job.id)
+        assert job.status == "done"
+        assert saved == ["explained: callbacks first"]
+    finally:
+        queue.stop()
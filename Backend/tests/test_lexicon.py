@@ -0,0 +1,74 @@
+"""The lexicon is built from a FreeDict dump with the curated TSV on top, and folds spellings only as a fallback."""
+import io
+import os
+import tarfile
+import pytest
+from app.config import lexicon_source
+from app.lexicon import Lexicon, build_lexicon, fold, lookup_keys, read_freedict
+
+# Entries in the shape of FreeDict deu-eng (TEI P5)
+FREEDICT_SAMPLE = """<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0"><text><body>
+  <entry>
+    <form><orth>Kühlschrank</orth></form>
+    <gramGrp><pos>n</pos><gen>masc</gen></gramGrp>
+    <sense><cit type="trans" xml:lang="en"><quote>refrigerator</quote></cit></sense>
+    <sense><cit type="trans" xml:lang="en"><quote>fridge</quote></cit></sense>
+  </entry>
+  <entry>
+    <form><orth>Flughafen</orth></form>
+    <gramGrp><pos>n</pos><gen>masc</gen></gramGrp>
+    <sense><cit type="trans" xml:lang="en"><quote>airport</quote></cit></sense>
+  </entry>
+  <entry>
+    <form><orth>Feuer</orth></form>
+    <gramGrp><pos>n</pos><gen>neut</gen></gramGrp>
+    <sense><cit type="trans" xml:lang="en"><quote>fire</quote></cit></sense>
+  </entry>
+  <entry>
+    <form><orth>Haus</orth></form>
+    <gramGrp><pos>n</pos><gen>neut</gen></gramGrp>
+    <sense><cit type="trans" xml:lang="en"><quote>building</quote></cit></sense>
+  </entry>
+  <entry>
+    <form><orth>ohne Übersetzung</orth></form>
+  </entry>
+</body></text></TEI>
+"""
+
+@pytest.fixture(scope="module")
+def dump(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("freedict")
+    path = directory / "freedict-deu-eng.src.tar.xz"
+    data = FREEDICT_SAMPLE.encode("utf-8")
+    with tarfile.open(path, "w:xz") as archive:
+        member = tarfile.TarInfo("deu-eng/deu-eng.tei")
+        member.size = len(data)
+        archive.addfile(member, io.BytesIO(data))
+    return str(path)
+
+@pytest.fixture(scope="module")
+def lexicon(dump, tmp_path_factory):
+    path = os.path.join(tmp_path_factory.mktemp("lexicon"), "lexicon.db")
+    build_lexicon(lexicon_source, path, dump)
+    lexicon = Lexicon(path)
+    yield lexicon
+    lexicon.close()
+
+def test_freedict_entries_are_read_from_the_release_tarball(dump):
+    rows = {row[0]: row for row in read_freedict(dump)}
+    assert rows["Kühlschrank"] == ("Kühlschrank", "noun", "m", "refrigerator; fridge", [])
+    assert "ohne Übersetzung" not in rows
+
+def test_dictionary_words_are_found(lexicon):
+    assert lexicon.define("Kühlschrank") == "Kühlschrank (noun, der): refrigerator; fridge"
+    assert lexicon.define("Flughafen") == "Flughafen (noun, der): airport"
+
+def test_curated_entries_override_the_dictionary(lexicon):
+    assert lexicon.define("Haus") == "Haus (noun, das): house; home"
+
+def test_spelled_out_umlauts_are_only_a_fallback(lexicon):
+    assert fold("Feuer") == "feuer"
+    assert lookup_keys("haeuser") == ["haeuser", "hauser"]
+    assert lexicon.define("Feuer") == "Feuer (noun, das): fire"
+    assert lexicon.define("haeuser").endswith("Haus (noun, das): house; home")
@@ -0,0 +1,56 @@
+"""Cache misses read progress without waiting on flushes, and never lose or double-count a delta."""
+import threading
+import time
+import pytest
+from app import progress
+from app.progress import ProgressStore
+
+@pytest.fixture
+def database(monkeypatch):
+    """Progress rows in a dict; add_progress_deltas blocks until `commit` is set."""
+    rows = {}
+    commit = threading.Event()
+    commit.set()
+
+    def add_progress_deltas(deltas):
+        commit.wait(5)
+        for user_id, correct, total in deltas:
+            row = rows.get(user_id, (0, 0))
+            rows[user_id] = (row[0] + correct, row[1] + total)
+
+    monkeypatch.setattr(progress, "load_progress", lambda user_id: rows.get(user_id, (0, 0)))
+    monkeypatch.setattr(progress, "add_progress_deltas", add_progress_deltas)
+    return rows, commit
+
+def in_thread(func, *args):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func(*args)), daemon=True)
+    thread.start()
+    return thread, result
+
+def test_cache_miss_does_not_take_the_flush_lock(database):
+    store = ProgressStore(cache_ttl=0, flush_interval=60, flush_batch_size=100)
+    with store._flush_lock:
+        thread, result = in_thread(store.get, "reader")
+        thread.join(1)
+        assert not thread.is_alive()
+    assert result[0].total_questions == 0
+
+def test_read_during_a_flush_counts_every_delta_once(database):
+    rows, commit = database
+    store = ProgressStore(cache_ttl=0, flush_interval=60, flush_batch_size=100)
+    for is_correct in (True, True, False):
+        store.update("learner", is_correct)
+
+    commit.clear()
+    flusher, _ = in_thread(store.flush)
+    # Once the flush has taken the deltas they are in neither _pending nor the database
+    while not store._flush_epoch % 2:
+        time.sleep(0.001)
+    reader, result = in_thread(store.get, "learner")
+    reader.join(0.1)
+    commit.set()
+    flusher.join(1)
+    reader.join(1)
+    assert rows["learner"] == (2, 3)
+    assert (result[0].correct_answers, result[0].total_questions) == (2, 3)
@@ -0,0 +1,70 @@
+"""The conversation response cache only ever stores complete replies."""
+import asyncio
+import time
+import pytest
+from app import agents
+from app.conversation_memory import ConversationContext
+from app.response_cache import ResponseCache
+
+def failing(text: str) -> str:
+    raise ConnectionError("translator down")
+
+def slow(text: str) -> str:
+    time.sleep(0.5)
+    return "too late"
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(max_entries=10, ttl=60)
+    monkeypatch.setattr(agents, "get_response_cache", lambda: cache)
+    for name in agents.POST_PROCESSING_BRANCHES:
+        monkeypatch.setitem(agents.POST_PROCESSING_BRANCHES, name, (lambda text, name=name: f"[{name}] {text}", 1.0))
+    return cache
+
+def reply(monkeypatch, branch=None, func=None, timeout=1.0, context=None):
+    """Run the post-processing branches on a German reply and cache the composed result."""
+    if branch is not None:
+        monkeypatch.setitem(agents.POST_PROCESSING_BRANCHES, branch, (func, timeout))
+
+    async def run():
+        tasks = agents.start_post_processing("Hallo!")
+        return dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+    results = asyncio.run(run())
+    response = agents.compose_conversation_response("Hallo!", results)
+    agents.cache_conversation_response("beginner", "hallo", response, results, context or ConversationContext())
+    return results
+
+def test_complete_reply_is_cached(cache, monkeypatch):
+    reply(monkeypatch)
+    assert cache.get("beginner", "hallo") == "Hallo!\n[english] Hallo!\n[bangla] Hallo!\n[grammar] Hallo!"
+
+def test_reply_with_a_failed_branch_is_not_cached(cache, monkeypatch):
+    results = reply(monkeypatch, "bangla", failing)
+    assert results["bangla"] is None
+    assert cache.get("beginner", "hallo") is None
+
+def test_reply_with_a_timed_out_branch_is_not_cached(cache, monkeypatch):
+    results = reply(monkeypatch, "grammar", slow, timeout=0.1)
+    assert results["grammar"] is None
+    assert cache.get("beginner", "hallo") is None
+
+def test_translation_errors_raise_instead_of_returning_error_text(monkeypatch):
+    """Post-processing calls translate(), which raises, not the tools that turn errors into text."""
+    from app import translation
+    monkeypatch.setattr(translation, "select_backend", lambda source, target: translation.CallableTranslator("down", failing_translate))
+    monkeypatch.setattr(translation, "tool_max_retries", 0)
+    with pytest.raises(ConnectionError):
+        agents.POST_PROCESSING_BRANCHES["english"][0](f"Neuer Satz {time.time()}")
+
+def test_replies_are_only_shared_between_identical_contexts(cache, monkeypatch):
+    context = ConversationContext("Learner is called Anna.", [{"role": "ai", "content": "Wie heißt du?"}])
+    reply(monkeypatch, context=context)
+    same = ConversationContext("Learner is called Anna.", [{"role": "ai", "content": "Wie heißt du?"}])
+    other = ConversationContext("Learner is called Ben.", [{"role": "ai", "content": "Wie heißt du?"}])
+    assert agents.get_cached_conversation_response("beginner", "hallo", same) is not None
+    assert agents.get_cached_conversation_response("beginner", "hallo", other) is None
+    assert agents.get_cached_conversation_response("beginner", "hallo", ConversationContext()) is None
+
+def failing_translate(text: str, source: str, target: str) -> str:
+    raise ConnectionError("translator down")
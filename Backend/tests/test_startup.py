@@ -0,0 +1,10 @@
+"""`import app.main` stays within the startup budget (see benchmarks/startup_report.py)."""
+from benchmarks.startup_report import IMPORT_BUDGET_MS, cold_env, measure_import, run_python
+
+def test_import_is_within_budget():
+    import_ms = measure_import(repeat=3) * 1000
+    assert import_ms <= IMPORT_BUDGET_MS, f"import app.main took {import_ms:.0f} ms, over the {IMPORT_BUDGET_MS} ms budget"
+
+def test_graph_libraries_load_on_first_use():
+    snippet = "import sys, app.main; print(sorted(m for m in sys.modules if m.split('.')[0] == 'langgraph'))"
+    assert run_python(["-c", snippet], cold_env()).stdout.strip().splitlines()[-1] == "[]"
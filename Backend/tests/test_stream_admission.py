@@ -0,0 +1,50 @@
+"""/chat/stream gives its admission slot back however the stream ends."""
+import asyncio
+import pytest
+from app import routes
+from app.admission import AdmissionController, TokenBucketLimiter
+from app.models import ChatRequest
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(max_concurrency=1, max_queue=0, max_wait=0.1,
+                                     limiter=TokenBucketLimiter(rate=100, burst=100))
+    monkeypatch.setattr(routes, "get_admission_controller", lambda: controller)
+    monkeypatch.setattr(routes, "save_message", lambda user_id, message: "2026-01-01 00:00:00")
+
+    async def events(state):
+        yield "token", {"content": "Hallo"}
+        yield "response", {"content": "Hallo!"}
+
+    monkeypatch.setattr(routes, "stream_agent_events", events)
+    return controller
+
+def serve(receive_messages):
+    """Run /chat/stream through the ASGI interface; returns the body chunks sent."""
+    sent = []
+
+    async def receive():
+        if receive_messages:
+            return receive_messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        # Writing to a real socket yields to the event loop, which lets a disconnect land first
+        await asyncio.sleep(0.01)
+        sent.append(message)
+
+    async def run():
+        response = await routes.stream_chat(ChatRequest(user_id="stream-user", message="Hallo"))
+        await response({"type": "http", "asgi": {"spec_version": "2.3"}}, receive, send)
+
+    asyncio.run(run())
+    return [message.get("body", b"") for message in sent if message["type"] == "http.response.body"]
+
+def test_slot_is_released_after_a_complete_stream(controller):
+    body = b"".join(serve([]))
+    assert b"event: done" in body
+    assert controller.in_flight == 0
+
+def test_slot_is_released_when_the_client_leaves_before_the_first_chunk(controller):
+    serve([{"type": "http.disconnect"}])
+    assert controller.in_flight == 0
@@ -0,0 +1,13 @@
+"""Translation cache keys ignore spacing differences but not line breaks."""
+from app.translation import TranslationCache, normalize_text
+
+def test_spaces_and_tabs_collapse_but_line_breaks_stay():
+    assert normalize_text("  Guten\t  Morgen ") == "Guten Morgen"
+    assert normalize_text("Guten Morgen\r\n  Wie geht's?") == "Guten Morgen\nWie geht's?"
+    assert normalize_text("Guten Morgen\nWie geht's?") != normalize_text("Guten Morgen Wie geht's?")
+
+def test_multi_line_text_is_not_served_the_single_line_translation(tmp_path):
+    cache = TranslationCache(str(tmp_path / "translation_cache.db"))
+    cache.put("de", "en", "Guten Morgen Wie geht's?", "Good morning how are you?")
+    assert cache.get("de", "en", "Guten  Morgen\tWie geht's?") == "Good morning how are you?"
+    assert cache.get("de", "en", "Guten Morgen\nWie geht's?") is None
@@ -0,0 +1,106 @@
+"""
+The translator's retries and circuit breaker against the fake Google Translate page
+(benchmarks.fakes), with injected failures: what benchmarks/fault_injection.py shows under
+load, pinned down as assertions.
+"""
+import asyncio
+import time
+import uuid
+import pytest
+import requests
+from app import agents, resilience, translation
+from app.resilience import CircuitBreaker, CircuitOpen, is_transient, retry_call
+from benchmarks.fakes import BackgroundServer, Faults, create_fake_google_translate_app
+
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 0.3
+
+@pytest.fixture(scope="module")
+def faults():
+    return Faults()
+
+@pytest.fixture(scope="module")
+def server(faults):
+    server = BackgroundServer(create_fake_google_translate_app(faults)).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def backend(server, faults, monkeypatch):
+    """A Google backend pointed at the fake page, with its own small breaker and no retries."""
+    faults.latency, faults.error_rate = 0.0, 0.0
+    name = f"fake-google-{uuid.uuid4().hex[:8]}"
+    session = requests.Session()
+    backend = translation.CallableTranslator(
+        name, lambda text, source, target: translation.GoogleTranslateClient(source, target, session, f"{server.url}/m").translate(text))
+    breaker = CircuitBreaker(name, FAILURE_THRESHOLD, RESET_TIMEOUT)
+    monkeypatch.setitem(resilience.breakers, f"translator:{name}", breaker)
+    monkeypatch.setattr(translation, "select_backend", lambda source, target: backend)
+    monkeypatch.setattr(translation, "tool_max_retries", 0)
+    backend.breaker = breaker
+    return backend
+
+def test_breaker_opens_after_consecutive_failures(backend, faults):
+    faults.error_rate = 1.0
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            translation.call_backend(backend, "translate", "Hallo", "de", "en")
+    assert backend.breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        translation.call_backend(backend, "translate", "Hallo", "de", "en")
+    assert backend.breaker.get_stats()["rejected"] == 1
+
+def test_half_open_trial_closes_or_reopens_the_breaker(backend, faults):
+    faults.error_rate = 1.0
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            translation.call_backend(backend, "translate", "Hallo", "de", "en")
+
+    # A failed trial opens the circuit again straight away
+    time.sleep(RESET_TIMEOUT)
+    with pytest.raises(requests.HTTPError):
+        translation.call_backend(backend, "translate", "Hallo", "de", "en")
+    assert backend.breaker.state == "open"
+
+    faults.error_rate = 0.0
+    time.sleep(RESET_TIMEOUT)
+    assert translation.call_backend(backend, "translate", "Hallo", "de", "en") == "[en] Hallo"
+    assert backend.breaker.state == "closed"
+
+def test_reply_degrades_to_german_while_the_translator_is_down(backend, faults, monkeypatch):
+    faults.error_rate = 1.0
+    monkeypatch.setitem(agents.POST_PROCESSING_BRANCHES, "grammar", (lambda text: "[grammar] ok", 1.0))
+    german = f"Wie war dein Tag {uuid.uuid4().hex[:8]}?"
+
+    async def reply():
+        tasks = agents.start_post_processing(german)
+        return dict(zip(tasks, await asyncio.gather(*tasks.values())))
+
+    results = asyncio.run(reply())
+    assert results["english"] is None and results["bangla"] is None
+    assert agents.compose_conversation_response(german, results) == f"{german}\n[grammar] ok"
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+@pytest.mark.parametrize("error, retried", [
+    (http_error(400), False),
+    (http_error(404), False),
+    (http_error(429), True),
+    (http_error(503), True),
+    (requests.ConnectionError("refused"), True),
+    (requests.Timeout("read timed out"), True),
+])
+def test_only_transient_errors_are_retried(error, retried, monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise error
+
+    with pytest.raises(type(error)):
+        retry_call(fail, retries=2, retry_if=is_transient)
+    assert len(calls) == (3 if retried else 1)
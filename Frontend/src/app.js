@@ -6,6 +6,15 @@ import ChatInput from "./components/ChatInput";
 import Sidebar from "./components/Sidebar";
 import "./App.css";
 
+const historyPageSize = 50;
+
+// Convert a stored history row ("You: ..." / "Teacher: ...") into a chat message
+const toChatMessage = (item) => {
+  const [role, ...contentParts] = item.message.split(": ");
+  const content = contentParts.join(": "); // Ensures message is split correctly
+  return { id: item.id, role, content, timestamp: item.timestamp };
+};
+
 const App = () => {
   const [messages, setMessages] = useState([]);
   const [isProcessing, setIsProcessing] = useState(false);
@@ -13,6 +22,8 @@ const App = () => {
   const chatContainerRef = useRef(null);
   const apiUrl = "http://localhost:8000";
   const [userId, setUserId] = useState("");
+  const [hasOlder, setHasOlder] = useState(false);
+  const newestIdRef = useRef(0);
 
   // Generate or retrieve user ID on component mount
   useEffect(() => {
@@ -30,14 +41,10 @@ const App = () => {
 
     const fetchHistory = async () => {
       try {
-        const response = await axios.get(`${apiUrl}/history/${userId}`);
-        setMessages(
-          response.data.history.map((item) => {
-            const [role, ...contentParts] = item.message.split(": ");
-            const content = contentParts.join(": "); // Ensures message is split correctly
-            return { role, content, timestamp: item.timestamp };
-          })
-        );
+        const response = await axios.get(`${apiUrl}/history/${userId}`, { params: { limit: historyPageSize } });
+        setMessages(response.data.history.map(toChatMessage));
+        setHasOlder(response.data.has_more);
+        if (response.data.next_after !== null) newestIdRef.current = response.data.next_after;
       } catch (error) {
         console.error("Error fetching history:", error);
       }
@@ -53,29 +60,139 @@ const App = () => {
     }
   }, [messages, isProcessing]);
 
+  const handleLoadOlder = async () => {
+    const oldest = messages.find((msg) => msg.id !== undefined);
+    if (!oldest) return;
+    try {
+      const response = await axios.get(`${apiUrl}/history/${userId}`, {
+        params: { limit: historyPageSize, before: oldest.id },
+      });
+      setMessages((prev) => [...response.data.history.map(toChatMessage), ...prev]);
+      setHasOlder(response.data.has_more);
+    } catch (error) {
+      console.error("Error fetching older history:", error);
+    }
+  };
+
+  // Fetch only the messages stored since the newest one we have, replacing the optimistic copies
+  const syncNewMessages = async () => {
+    try {
+      const response = await axios.get(`${apiUrl}/history/${userId}`, {
+        params: { limit: historyPageSize, after: newestIdRef.current },
+      });
+      if (response.data.next_after !== null) newestIdRef.current = response.data.next_after;
+      const newMessages = response.data.history.map(toChatMessage);
+      setMessages((prev) => [...prev.filter((msg) => !msg.pending), ...newMessages]);
+    } catch (error) {
+      console.error("Error syncing history:", error);
+    }
+  };
+
+  // Read server-sent events from /chat/stream and call onEvent(event, data) for each one
+  const readChatStream = async (message, onEvent) => {
+    const response = await fetch(`${apiUrl}/chat/stream`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ user_id: userId, message }),
+    });
+    if (!response.ok || !response.body) {
+      const error = new Error(`Stream request failed with status ${response.status}`);
+      error.status = response.status;
+      error.retryAfter = response.headers.get("Retry-After");
+      throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const frames = buffer.split("\n\n");
+      buffer = frames.pop();
+      frames.forEach((frame) => {
+        const eventLine = frame.split("\n").find((line) => line.startsWith("event: "));
+        const dataLine = frame.split("\n").find((line) => line.startsWith("data: "));
+        if (eventLine && dataLine) {
+          onEvent(eventLine.slice(7), JSON.parse(dataLine.slice(6)));
+        }
+      });
+    }
+  };
+
+  // Play pronunciation audio if a response links to it
+  const playAudioIn = (text) => {
+    const audioPath = text && text.match(/\/static\/audio\/[0-9a-f]+\.mp3/);
+    if (audioPath) {
+      const audio = new Audio(`${apiUrl}${audioPath[0]}`);
+      audio.play();
+    }
+  };
+
+  // Long-poll a background job until it finishes; its result is also appended to the history
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const response = await axios.get(`${apiUrl}/jobs/${jobId}`, { params: { wait: 25 } });
+      if (response.data.status === "done" || response.data.status === "failed") return response.data;
+    }
+  };
+
   const handleSend = async (message) => {
     if (!message.trim()) return;
 
-    const userMessage = { role: "You", content: message, timestamp: new Date().toISOString() };
+    const userMessage = { role: "You", content: message, timestamp: new Date().toISOString(), pending: true };
     setMessages((prev) => [...prev, userMessage]);
     setIsProcessing(true);
 
+    // Append a placeholder teacher message and fill it in as events arrive
+    let streamedContent = "";
+    const updateTeacherMessage = (content, timestamp) => {
+      setMessages((prev) => [
+        ...prev.slice(0, -1),
+        { role: "Teacher", content, timestamp: timestamp || prev[prev.length - 1].timestamp, pending: true },
+      ]);
+    };
+
     try {
-      const response = await axios.post(`${apiUrl}/chat`, { user_id: userId, message });
-      const aiMessage = { role: "Teacher", content: response.data.response, timestamp: response.data.timestamp };
-      setMessages((prev) => [...prev, aiMessage]);
-
-      // Play pronunciation audio if included in response
-      if (response.data.response.includes("/static/pronunciation.mp3")) {
-        const audio = new Audio(`${apiUrl}/static/pronunciation.mp3`);
-        audio.play();
+      let started = false;
+      let jobId = null;
+      await readChatStream(message, (event, data) => {
+        if (!started) {
+          started = true;
+          setIsProcessing(false);
+          setMessages((prev) => [
+            ...prev,
+            { role: "Teacher", content: "", timestamp: new Date().toISOString(), pending: true },
+          ]);
+        }
+        if (event === "token") {
+          streamedContent += data.token;
+          updateTeacherMessage(streamedContent);
+        } else if (event === "english" || event === "bangla" || event === "grammar") {
+          streamedContent += `\n${data.content}`;
+          updateTeacherMessage(streamedContent);
+        } else if (event === "done") {
+          updateTeacherMessage(data.response, data.timestamp);
+          jobId = data.job_id;
+          playAudioIn(data.response);
+        }
+      });
+      await syncNewMessages();
+      if (jobId) {
+        // Slow work (pronunciation, grammar explanations) finishes in the background
+        const job = await waitForJob(jobId);
+        await syncNewMessages();
+        playAudioIn(job.result);
       }
     } catch (error) {
       console.error("Error sending message:", error);
-      setMessages((prev) => [
-        ...prev,
-        { role: "Teacher", content: "Error processing your request.", timestamp: new Date().toISOString() },
-      ]);
+      // 429: this user is sending too fast; 503: the server is at capacity
+      const busy = error.status === 429 || error.status === 503;
+      const content = busy
+        ? `The teacher is busy right now. Please try again in ${error.retryAfter || "a few"} seconds.`
+        : "Error processing your request.";
+      setMessages((prev) => [...prev, { role: "Teacher", content, timestamp: new Date().toISOString() }]);
     } finally {
       setIsProcessing(false);
     }
@@ -85,6 +202,7 @@ const App = () => {
     try {
       await axios.delete(`${apiUrl}/history/${userId}`);
       setMessages([]);
+      setHasOlder(false);
     } catch (error) {
       console.error("Error clearing history:", error);
     }
@@ -97,7 +215,14 @@ const App = () => {
 
   return (
     <div className={`app ${theme}`}>
-      <Sidebar history={messages} onClear={handleClearHistory} onToggleTheme={toggleTheme} theme={theme} />
+      <Sidebar
+        history={messages}
+        hasOlder={hasOlder}
+        onLoadOlder={handleLoadOlder}
+        onClear={handleClearHistory}
+        onToggleTheme={toggleTheme}
+        theme={theme}
+      />
       <div className="main-content">
         <header className="header">
           <h1>German Buddy</h1>
@@ -1,12 +1,17 @@
 import React from 'react';
 
-const Sidebar = ({ history, onClear, onToggleTheme, theme }) => {
+const Sidebar = ({ history, hasOlder, onLoadOlder, onClear, onToggleTheme, theme }) => {
   return (
     <aside className="sidebar">
       <div className="sidebar-header">
         <h2>Chat History</h2>
       </div>
       <div className="history-list">
+        {hasOlder && (
+          <button className="load-older" onClick={onLoadOlder}>
+            Load older messages
+          </button>
+        )}
         {history.length === 0 ? (
           <p>No history yet.</p>
         ) : (